@@ -0,0 +1,43 @@
+import hashlib
+from datetime import datetime
+from typing import Optional
+
+from fastapi import Response
+
+from app.config import get_settings
+
+settings = get_settings()
+
+
+def make_etag(representation: str, row_id: int, version: Optional[datetime]) -> str:
+    """
+    Strong ETag for one representation of a row, derived from its id and last
+    modification time. Different representations of the same row (for example
+    an interview and its questions) get different tags.
+    """
+    raw = f"{representation}:{row_id}:{version.isoformat() if version else ''}"
+    return '"' + hashlib.sha256(raw.encode()).hexdigest()[:32] + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match check; uses weak comparison as required for GET revalidation"""
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+def cache_headers(etag: str) -> dict:
+    # "private": responses may be user data; must-revalidate makes clients
+    # send If-None-Match once max-age has passed
+    return {
+        "ETag": etag,
+        "Cache-Control": f"private, max-age={settings.read_cache_max_age_seconds}, must-revalidate",
+    }
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers=cache_headers(etag))
@@ -1,13 +1,60 @@
-from fastapi import APIRouter, Depends, UploadFile, File, HTTPException, Form
-from sqlalchemy.orm import Session
-from typing import List
-import io
-import pdfplumber
-from docx import Document
-from app.database import get_db
-from app.models import Interview
-from app.schemas import InterviewResponse, InterviewQuestionsResponse
-from app.services import get_llm_service, LLMService
+from fastapi import APIRouter, Depends, UploadFile, File, HTTPException, Form, Header, Query, Response
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from starlette.background import BackgroundTask
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, load_only, sessionmaker
+from typing import TYPE_CHECKING, AsyncIterator, Awaitable, Dict, List, Literal, NamedTuple, Optional, Tuple
+import asyncio
+import json
+import logging
+import time
+from app.api.conditional import cache_headers, etag_matches, make_etag, not_modified
+from app.config import get_settings
+from app.database import get_async_db, get_db
+from app.metrics import time_stage
+from app.models import Interview, InterviewQuestion, InterviewSession, SessionStatus, User
+from app.schemas import (
+    GenerationJobResponse,
+    InterviewResponse,
+    InterviewQuestionsResponse,
+    QuestionSearchResult,
+    SessionQuestionResponse,
+    SessionSearchResult,
+    SessionStatusResponse,
+    SessionSummaryResponse,
+)
+from app.services import get_llm_cache, get_llm_rate_limiter, get_llm_service, LLMService, OnComplete
+from app.services.compaction import append_additional_context
+from app.services.extraction import (
+    UnsupportedFileTypeError,
+    extract_text_async,
+    get_extraction_cache,
+    registry as extractor_registry,
+)
+from app.services.jobs import GenerationJob, QueueFullError, get_job_queue
+from app.services.pagination import InvalidCursorError, Page, akeyset_page
+from app.services.profiling import RequestProfile, get_profile_store
+from app.services.search import QUESTIONS, SESSIONS, asearch_page
+from app.services.uploads import (
+    BatchDocument,
+    FileTooLargeError,
+    InvalidArchiveError,
+    SpooledDocument,
+    spool_upload,
+    unpack_zip,
+)
+from app.services.sessions import (
+    create_pending_session,
+    get_or_create_anonymous_user,
+    save_generated_session,
+)
+
+if TYPE_CHECKING:
+    from app.services.question_bank import BankKey, BankMatch, QuestionBank
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
@@ -30,20 +77,227 @@ def validate_file_type(filename: str) -> None:
         )
 
 
-def extract_text_from_file(file_bytes: bytes, filename: str) -> str:
-    """Extract text from PDF, DOC, DOCX, or TXT file"""
-    file_ext = filename.lower().rsplit(".", 1)[-1]
+async def spool_upload_file(upload: UploadFile) -> SpooledDocument:
+    """
+    Read an upload in chunks, rejecting it with 413 as soon as it exceeds
+    max_file_size_mb; uploads above the spool threshold are kept on disk.
+    The caller must close() the returned document.
+    """
+    try:
+        return await spool_upload(
+            upload,
+            max_bytes=settings.max_file_size_mb * 1024 * 1024,
+            memory_threshold=settings.upload_spool_threshold_mb * 1024 * 1024,
+        )
+    except FileTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+
+
+async def spool_upload_files(
+    resume_file: UploadFile, job_desc_file: UploadFile
+) -> Tuple[SpooledDocument, SpooledDocument]:
+    """Spool both uploads, cleaning up the first if the second is rejected"""
+    resume_document = await spool_upload_file(resume_file)
+    try:
+        job_desc_document = await spool_upload_file(job_desc_file)
+    except BaseException:
+        resume_document.close()
+        raise
+    return resume_document, job_desc_document
+
+
+async def extract_upload_text(document: SpooledDocument, filename: str) -> str:
+    """Extract text from an uploaded file without blocking the event loop"""
+    try:
+        return await extract_text_async(document, filename)
+    except UnsupportedFileTypeError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def validate_job_desc_file_type(filename: str) -> None:
+    """Validate the job description file type (also allows .txt)"""
+    job_desc_ext = filename.lower().rsplit(".", 1)[-1] if "." in filename else ""
+    allowed_job_desc_exts = {".pdf", ".doc", ".docx", ".txt"}
+    if f".{job_desc_ext}" not in allowed_job_desc_exts:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid job description file type. Allowed: PDF, DOC, DOCX, TXT. Got: .{job_desc_ext}"
+        )
+
+
+class UploadedDocuments(NamedTuple):
+    resume_text: str
+    job_description_text: str
+    # Job description text with any additional context appended - what is sent to the LLM
+    full_context: str
+
+
+async def read_upload_documents(
+    resume_file: UploadFile, job_desc_file: UploadFile, additional_context: str
+) -> UploadedDocuments:
+    """
+    Validate and extract the uploaded resume and job description.
+    """
+    validate_file_type(resume_file.filename)
+    validate_job_desc_file_type(job_desc_file.filename)
+
+    # Read both files with the size limit enforced, then extract them concurrently off the event loop
+    with time_stage("read"):
+        resume_document, job_desc_document = await spool_upload_files(resume_file, job_desc_file)
+    try:
+        with time_stage("extract"):
+            resume_content, job_desc_content = await asyncio.gather(
+                extract_upload_text(resume_document, resume_file.filename),
+                extract_upload_text(job_desc_document, job_desc_file.filename),
+            )
+    finally:
+        resume_document.close()
+        job_desc_document.close()
+
+    if not resume_content or resume_content.strip() == "":
+        raise HTTPException(status_code=400, detail="Could not extract text from resume file")
+
+    if not job_desc_content or job_desc_content.strip() == "":
+        raise HTTPException(status_code=400, detail="Could not extract text from job description file")
+
+    # Combine job description with additional context if provided
+    full_context = append_additional_context(job_desc_content, additional_context)
+
+    return UploadedDocuments(resume_content, job_desc_content, full_context)
 
-    if file_ext == "pdf":
-        with pdfplumber.open(io.BytesIO(file_bytes)) as pdf:
-            return "\n".join([page.extract_text() or "" for page in pdf.pages])
-    elif file_ext in ["doc", "docx"]:
-        doc = Document(io.BytesIO(file_bytes))
-        return "\n".join([para.text for para in doc.paragraphs])
-    elif file_ext == "txt":
-        return file_bytes.decode("utf-8")
+
+class BankLookup(NamedTuple):
+    bank: "QuestionBank"
+    key: "BankKey"
+    # None on a miss
+    match: Optional["BankMatch"]
+    # The documents as prepared for the prompt (LLMService.prepare_inputs);
+    # the key was computed from them, and generation reuses them
+    resume: str
+    job_description: str
+
+
+def _question_bank() -> Optional["QuestionBank"]:
+    if not settings.question_bank_enabled:
+        return None
+    # Imported on first use, as it loads NumPy
+    from app.services.question_bank import get_question_bank
+
+    return get_question_bank()
+
+
+async def lookup_question_bank(
+    llm_service: LLMService, documents: UploadedDocuments, additional_context: str
+) -> Optional[BankLookup]:
+    """Look an upload up in the question bank; None when the bank is disabled"""
+    bank = _question_bank()
+    if bank is None:
+        return None
+    # Prepared once here: compacted text keeps hashing bounded, and generation
+    # is passed the same text instead of preparing the documents again
+    resume, job_description = await asyncio.to_thread(
+        llm_service.prepare_inputs, documents.resume_text, documents.full_context
+    )
+    with time_stage("bank"):
+        # Hashing the documents is CPU work
+        key = await asyncio.to_thread(bank.key, resume, job_description, additional_context)
+        return BankLookup(bank, key, bank.lookup(key), resume, job_description)
+
+
+def _bank_result(banked: BankLookup) -> OnComplete:
+    """
+    on_complete callback adding a generation to the question bank. Only
+    complete results are banked, by the same rule as the LLM result cache:
+    a partial fan-out result would otherwise be served to every later
+    near-duplicate upload.
+    """
+    return lambda questions: banked.bank.add(banked.key, questions)
+
+
+async def generate_questions(
+    llm_service: LLMService, documents: UploadedDocuments, banked: Optional[BankLookup]
+) -> List[Dict[str, str]]:
+    """Questions from the question bank on a hit, otherwise from the LLM (and added to the bank)"""
+    if banked is None:
+        return await llm_service.agenerate_interview_questions(documents.resume_text, documents.full_context)
+    if banked.match is not None:
+        return banked.match.questions
+    return await llm_service.agenerate_interview_questions(
+        banked.resume, banked.job_description, on_complete=_bank_result(banked), prepared=True
+    )
+
+
+async def stream_questions(
+    llm_service: LLMService, documents: UploadedDocuments, banked: Optional[BankLookup]
+) -> AsyncIterator[Dict[str, str]]:
+    """Streaming variant of generate_questions"""
+    if banked is None:
+        questions = llm_service.astream_interview_questions(documents.resume_text, documents.full_context)
+    elif banked.match is not None:
+        for question in banked.match.questions:
+            yield question
+        return
     else:
-        raise HTTPException(status_code=400, detail=f"Unsupported file format: .{file_ext}")
+        questions = llm_service.astream_interview_questions(
+            banked.resume, banked.job_description, on_complete=_bank_result(banked), prepared=True
+        )
+    async for question in questions:
+        yield question
+
+
+def _check_owner(db: Session, user_id: Optional[int]) -> None:
+    """
+    404 unless `user_id` is None or an existing user. Called before
+    generation, so an unknown user never costs an LLM call.
+    """
+    if user_id is None:
+        return
+    try:
+        if not db.query(User.id).filter(User.id == user_id).first():
+            raise HTTPException(status_code=404, detail="User not found")
+    finally:
+        # End the read transaction, so the request does not hold a pooled
+        # connection through generation while persisting checks out another
+        db.commit()
+
+
+def _resolve_user_id(db: Session, user_id: Optional[int]) -> int:
+    """Owner of a new session: the given user (404 if unknown), or the shared anonymous user"""
+    _check_owner(db, user_id)
+    return user_id if user_id is not None else get_or_create_anonymous_user(db).id
+
+
+def _persist_generation(
+    session_factory,
+    user_id: Optional[int],
+    resume_filename: str,
+    jd_filename: str,
+    documents: UploadedDocuments,
+    questions: List[Dict[str, str]],
+) -> Optional[int]:
+    """
+    Store generated questions as a session of `user_id` (checked by
+    _check_owner), or of the shared anonymous user; returns its id.
+    The questions were already paid for, so a storage failure, including
+    not reaching the database for the anonymous user, is logged and the
+    request still returns them (with no session id).
+    """
+    if not questions or not settings.persist_uploads:
+        return None
+    db = session_factory()
+    try:
+        with time_stage("persist"):
+            owner_id = user_id if user_id is not None else get_or_create_anonymous_user(db).id
+            return save_generated_session(
+                db, owner_id, resume_filename, jd_filename,
+                documents.resume_text, documents.job_description_text, questions,
+            )
+    except Exception:
+        db.rollback()
+        logger.exception("Error storing generated questions")
+        return None
+    finally:
+        db.close()
 
 
 @router.post("/upload")
@@ -51,63 +305,46 @@ async def upload_documents(
     resume_file: UploadFile = File(...),
     job_desc_file: UploadFile = File(...),
     additional_context: str = Form(""),
+    user_id: Optional[int] = Form(None),
+    db: Session = Depends(get_db),
     llm_service: LLMService = Depends(get_llm_service),
 ):
     """
     Upload resume file, job description file, and optional context to generate interview questions.
-    NO DATABASE STORAGE - directly returns generated questions.
+    The questions are returned directly and stored as an interview session.
 
     Args:
         resume_file: Resume file (PDF, DOC, DOCX)
         job_desc_file: Job description file (PDF, DOC, DOCX, TXT)
         additional_context: Optional additional background information
+        user_id: Optional owner of the stored session; anonymous uploads get a shared user
 
     Returns:
-        JSON object with questions and answers
+        JSON object with questions and answers, and the id of the stored session
     """
     try:
-        # Validate resume file type
-        validate_file_type(resume_file.filename)
-
-        # Validate job description file type (also allow .txt)
-        job_desc_ext = job_desc_file.filename.lower().rsplit(".", 1)[-1] if "." in job_desc_file.filename else ""
-        allowed_job_desc_exts = {".pdf", ".doc", ".docx", ".txt"}
-        if f".{job_desc_ext}" not in allowed_job_desc_exts:
-            raise HTTPException(
-                status_code=400,
-                detail=f"Invalid job description file type. Allowed: PDF, DOC, DOCX, TXT. Got: .{job_desc_ext}"
-            )
-
-        # Read and extract text from resume
-        resume_bytes = await resume_file.read()
-        resume_content = extract_text_from_file(resume_bytes, resume_file.filename)
-
-        if not resume_content or resume_content.strip() == "":
-            raise HTTPException(status_code=400, detail="Could not extract text from resume file")
-
-        # Read and extract text from job description
-        job_desc_bytes = await job_desc_file.read()
-        job_desc_content = extract_text_from_file(job_desc_bytes, job_desc_file.filename)
-
-        if not job_desc_content or job_desc_content.strip() == "":
-            raise HTTPException(status_code=400, detail="Could not extract text from job description file")
+        if settings.persist_uploads:
+            await asyncio.to_thread(_check_owner, db, user_id)
+        documents = await read_upload_documents(
+            resume_file, job_desc_file, additional_context
+        )
 
-        # Combine job description with additional context if provided
-        full_context = job_desc_content
-        if additional_context and additional_context.strip():
-            full_context += f"\n\nADDITIONAL CONTEXT:\n{additional_context.strip()}"
+        # Generate questions using LLM, unless the question bank has a near-duplicate upload
+        banked = await lookup_question_bank(llm_service, documents, additional_context)
+        questions_answers = await generate_questions(llm_service, documents, banked)
 
-        # Generate questions using LLM (no database storage)
-        questions_answers = llm_service.generate_interview_questions(
-            resume_content, full_context
+        session_id = await asyncio.to_thread(
+            _persist_generation,
+            sessionmaker(autocommit=False, autoflush=False, bind=db.get_bind()),
+            user_id, resume_file.filename, job_desc_file.filename, documents, questions_answers,
         )
 
-        # Return the questions directly
         return {
             "success": True,
             "message": "Interview questions generated successfully",
             "resume_filename": resume_file.filename,
             "job_desc_filename": job_desc_file.filename,
+            "session_id": session_id,
             "questions_count": len(questions_answers),
             "questions": questions_answers
         }
@@ -118,34 +355,685 @@ async def upload_documents(
         raise HTTPException(status_code=500, detail=f"Error processing documents: {str(e)}")
 
 
+def format_stream_event(event: str, data: Dict, stream_format: str) -> str:
+    """Serialize one streaming event as an NDJSON line or a server-sent event"""
+    if stream_format == "sse":
+        return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+    return json.dumps({"type": event, **data}) + "\n"
+
+
+@router.post("/upload/stream")
+async def upload_documents_stream(
+    resume_file: UploadFile = File(...),
+    job_desc_file: UploadFile = File(...),
+    additional_context: str = Form(""),
+    format: Literal["ndjson", "sse"] = Query("ndjson"),
+    user_id: Optional[int] = Form(None),
+    db: Session = Depends(get_db),
+    llm_service: LLMService = Depends(get_llm_service),
+):
+    """
+    Streaming variant of /upload: each question is sent as soon as Gemini has
+    finished generating it, instead of after the whole array is complete.
+    The complete result is stored as a session before the done event.
+
+    Args:
+        format: "ndjson" (one JSON object per line) or "sse" (text/event-stream)
+
+    Events:
+        question - {"index", "question", "answer"}
+        done     - {"questions_count", "session_id"}
+        error    - {"detail"}; sent if generation fails part-way through
+    """
+    # Validation and extraction errors are returned as normal HTTP errors
+    try:
+        if settings.persist_uploads:
+            await asyncio.to_thread(_check_owner, db, user_id)
+        documents = await read_upload_documents(
+            resume_file, job_desc_file, additional_context
+        )
+        banked = await lookup_question_bank(llm_service, documents, additional_context)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error processing documents: {str(e)}")
+
+    # The request's DB session is closed before the stream body runs
+    session_factory = sessionmaker(autocommit=False, autoflush=False, bind=db.get_bind())
+
+    async def events():
+        questions = []
+        try:
+            async for question in stream_questions(llm_service, documents, banked):
+                yield format_stream_event("question", {"index": len(questions), **question}, format)
+                questions.append(question)
+        except Exception as e:
+            yield format_stream_event(
+                "error", {"detail": f"Error generating questions: {str(e)}"}, format
+            )
+            return
+        session_id = await asyncio.to_thread(
+            _persist_generation,
+            session_factory, user_id, resume_file.filename, job_desc_file.filename, documents, questions,
+        )
+        yield format_stream_event(
+            "done", {"questions_count": len(questions), "session_id": session_id}, format
+        )
+
+    media_type = "text/event-stream" if format == "sse" else "application/x-ndjson"
+    return StreamingResponse(
+        events(),
+        media_type=media_type,
+        # Stop reverse proxies from buffering the stream
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+async def read_job_description(job_desc_file: UploadFile) -> str:
+    """Validate and extract an uploaded job description"""
+    validate_job_desc_file_type(job_desc_file.filename)
+    with time_stage("read"):
+        document = await spool_upload_file(job_desc_file)
+    try:
+        with time_stage("extract"):
+            text = await extract_upload_text(document, job_desc_file.filename)
+    finally:
+        document.close()
+    if not text or text.strip() == "":
+        raise HTTPException(status_code=400, detail="Could not extract text from job description file")
+    return text
+
+
+def close_batch_documents(documents: List[BatchDocument]) -> None:
+    for document in documents:
+        if document.document is not None:
+            document.document.close()
+
+
+async def spool_batch_resumes(
+    resume_files: List[UploadFile], resume_zip: Optional[UploadFile]
+) -> List[BatchDocument]:
+    """
+    Spool the resumes of a batch: the uploaded files, then the documents in the
+    zip. A file over max_file_size_mb becomes an item with an error instead of
+    failing the batch. The caller must close the documents.
+    """
+    max_file_bytes = settings.max_file_size_mb * 1024 * 1024
+    memory_threshold = settings.upload_spool_threshold_mb * 1024 * 1024
+    if len(resume_files) > settings.batch_max_resumes:
+        raise HTTPException(
+            status_code=400, detail=f"A batch holds at most {settings.batch_max_resumes} resumes"
+        )
+
+    documents: List[BatchDocument] = []
+    try:
+        with time_stage("read"):
+            for upload in resume_files:
+                try:
+                    documents.append(BatchDocument(upload.filename, await spool_upload_file(upload)))
+                except HTTPException as e:
+                    documents.append(BatchDocument(upload.filename, None, e.detail))
+            if resume_zip is not None:
+                archive = await spool_upload(
+                    resume_zip,
+                    max_bytes=settings.batch_max_request_size_mb * 1024 * 1024,
+                    memory_threshold=memory_threshold,
+                )
+                try:
+                    documents += await asyncio.to_thread(
+                        unpack_zip, archive, max_file_bytes, memory_threshold, settings.batch_max_resumes
+                    )
+                finally:
+                    archive.close()
+    except InvalidArchiveError as e:
+        close_batch_documents(documents)
+        raise HTTPException(status_code=400, detail=str(e))
+    except FileTooLargeError as e:
+        close_batch_documents(documents)
+        raise HTTPException(status_code=413, detail=str(e))
+    except BaseException:
+        close_batch_documents(documents)
+        raise
+
+    if not documents:
+        raise HTTPException(status_code=400, detail="No resumes were uploaded")
+    if len(documents) > settings.batch_max_resumes:
+        close_batch_documents(documents)
+        raise HTTPException(
+            status_code=400,
+            detail=f"A batch holds at most {settings.batch_max_resumes} resumes; got {len(documents)}",
+        )
+    return documents
+
+
+class BatchContext(NamedTuple):
+    """What every resume of a batch is generated against"""
+
+    job_description_text: str
+    additional_context: str
+    jd_filename: str
+    # Checked by _check_owner; None stores the sessions under the anonymous user
+    user_id: Optional[int]
+    session_factory: sessionmaker
+    llm_service: LLMService
+    # Bounds the generations in flight; extraction runs ahead of it
+    generation_slots: asyncio.Semaphore
+
+
+async def generate_batch_item(
+    batch: BatchContext, index: int, resume: BatchDocument
+) -> Tuple[str, Dict]:
+    """
+    Extract, generate and store one resume of a batch.
+    Returns a ("result", ...) or ("error", ...) stream event; never raises,
+    so one bad resume does not abort the batch.
+    """
+    item = {"index": index, "filename": resume.filename}
+    try:
+        if resume.document is None:
+            raise HTTPException(status_code=400, detail=resume.error)
+        validate_file_type(resume.filename)
+        try:
+            with time_stage("extract"):
+                resume_text = await extract_upload_text(resume.document, resume.filename)
+        finally:
+            resume.document.close()
+        if not resume_text or resume_text.strip() == "":
+            raise HTTPException(status_code=400, detail="Could not extract text from resume file")
+
+        documents = UploadedDocuments(
+            resume_text,
+            batch.job_description_text,
+            append_additional_context(batch.job_description_text, batch.additional_context),
+        )
+        async with batch.generation_slots:
+            banked = await lookup_question_bank(batch.llm_service, documents, batch.additional_context)
+            questions = await generate_questions(batch.llm_service, documents, banked)
+
+        session_id = await asyncio.to_thread(
+            _persist_generation,
+            batch.session_factory, batch.user_id, resume.filename, batch.jd_filename, documents, questions,
+        )
+    except HTTPException as e:
+        return "error", {**item, "detail": e.detail}
+    except Exception as e:
+        logger.exception("Error generating questions for batch item %d", index)
+        return "error", {**item, "detail": f"Error generating questions: {str(e)}"}
+    return "result", {
+        **item,
+        "session_id": session_id,
+        "questions_count": len(questions),
+        "questions": questions,
+    }
+
+
+@router.post("/upload/batch")
+async def upload_batch(
+    job_desc_file: UploadFile = File(...),
+    resume_files: List[UploadFile] = File([]),
+    resume_zip: Optional[UploadFile] = File(None),
+    additional_context: str = Form(""),
+    format: Literal["ndjson", "sse"] = Query("ndjson"),
+    user_id: Optional[int] = Form(None),
+    db: Session = Depends(get_db),
+    llm_service: LLMService = Depends(get_llm_service),
+):
+    """
+    Generate questions for many resumes against one job description.
+    The job description is extracted once; the resumes are extracted in
+    parallel and generated with at most batch_max_concurrency in flight.
+    Each result is streamed as soon as it is ready, so results arrive in
+    completion order, not upload order: match them up by `index`.
+
+    Args:
+        resume_files: Resume files (PDF, DOC, DOCX)
+        resume_zip: A zip of resume files, in addition to or instead of resume_files
+        format: "ndjson" (one JSON object per line) or "sse" (text/event-stream)
+
+    Events:
+        result - {"index", "filename", "session_id", "questions_count", "questions"}
+        error  - {"index", "filename", "detail"}; that resume failed, the batch goes on
+        done   - {"total", "succeeded", "failed"}
+    """
+    # Problems with the batch as a whole are returned as normal HTTP errors
+    try:
+        if settings.persist_uploads:
+            await asyncio.to_thread(_check_owner, db, user_id)
+        job_description_text = await read_job_description(job_desc_file)
+        resumes = await spool_batch_resumes(resume_files, resume_zip)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error processing documents: {str(e)}")
+
+    batch = BatchContext(
+        job_description_text=job_description_text,
+        additional_context=additional_context,
+        jd_filename=job_desc_file.filename,
+        user_id=user_id,
+        # The request's DB session is closed before the stream body runs
+        session_factory=sessionmaker(autocommit=False, autoflush=False, bind=db.get_bind()),
+        llm_service=llm_service,
+        generation_slots=asyncio.Semaphore(settings.batch_max_concurrency),
+    )
+
+    async def events():
+        tasks = [
+            asyncio.create_task(generate_batch_item(batch, index, resume))
+            for index, resume in enumerate(resumes)
+        ]
+        failed = 0
+        try:
+            for completed in asyncio.as_completed(tasks):
+                event, data = await completed
+                failed += event == "error"
+                yield format_stream_event(event, data, format)
+            yield format_stream_event(
+                "done", {"total": len(tasks), "succeeded": len(tasks) - failed, "failed": failed}, format
+            )
+        finally:
+            # Reached early when the client disconnects: stop the remaining generations
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            close_batch_documents(resumes)
+
+    media_type = "text/event-stream" if format == "sse" else "application/x-ndjson"
+    return StreamingResponse(
+        events(),
+        media_type=media_type,
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        # Removes spooled resumes if the stream never starts
+        background=BackgroundTask(close_batch_documents, resumes),
+    )
+
+
+def _create_job_session(
+    db: Session, user_id: Optional[int], resume_filename: str, jd_filename: str
+) -> InterviewSession:
+    return create_pending_session(db, _resolve_user_id(db, user_id), resume_filename, jd_filename)
+
+
+@router.post("/upload/jobs", status_code=202, response_model=GenerationJobResponse)
+async def create_generation_job(
+    resume_file: UploadFile = File(...),
+    job_desc_file: UploadFile = File(...),
+    additional_context: str = Form(""),
+    user_id: Optional[int] = Form(None),
+    db: Session = Depends(get_db),
+    llm_service: LLMService = Depends(get_llm_service),
+):
+    """
+    Job-based variant of /upload for slow generations.
+    Returns a session id immediately with status "created"; a background worker
+    extracts the documents, generates questions, stores them and moves the
+    session to "in_progress" (or "failed"). Poll GET /sessions/{id}/status.
+
+    Args:
+        user_id: Optional owner of the session; anonymous uploads get a shared user
+    """
+    validate_file_type(resume_file.filename)
+    validate_job_desc_file_type(job_desc_file.filename)
+
+    queue = get_job_queue()
+    if not queue.running:
+        raise HTTPException(status_code=503, detail="Background generation is not available")
+
+    # The job owns the spooled documents from here on and closes them when it finishes
+    resume_document, job_desc_document = await spool_upload_files(resume_file, job_desc_file)
+    try:
+        session = await asyncio.to_thread(
+            _create_job_session, db, user_id, resume_file.filename, job_desc_file.filename
+        )
+
+        job = GenerationJob(
+            session_id=session.id,
+            resume_document=resume_document,
+            resume_filename=resume_file.filename,
+            jd_document=job_desc_document,
+            jd_filename=job_desc_file.filename,
+            additional_context=additional_context,
+            session_factory=sessionmaker(autocommit=False, autoflush=False, bind=db.get_bind()),
+            llm_service=llm_service,
+        )
+        queue.submit(job)
+    except QueueFullError as e:
+        resume_document.close()
+        job_desc_document.close()
+        raise HTTPException(status_code=503, detail=str(e))
+    except BaseException:
+        resume_document.close()
+        job_desc_document.close()
+        raise
+
+    return GenerationJobResponse(
+        session_id=session.id,
+        status=session.status,
+        status_url=f"/api/v1/sessions/{session.id}/status",
+    )
+
+
+async def _load_session_status(db: AsyncSession, session_id: int) -> Optional[SessionStatusResponse]:
+    row = (
+        await db.execute(
+            select(
+                InterviewSession.id,
+                InterviewSession.status,
+                InterviewSession.total_questions,
+                InterviewSession.error_message,
+                InterviewSession.updated_at,
+            ).where(InterviewSession.id == session_id)
+        )
+    ).first()
+    if row is None:
+        return None
+    return SessionStatusResponse(
+        session_id=row.id,
+        status=row.status,
+        total_questions=row.total_questions,
+        error_message=row.error_message,
+        updated_at=row.updated_at,
+    )
+
+
+async def paginate(fetch: Awaitable[Page], response: Response) -> Page:
+    """
+    Await one page (akeyset_page or asearch_page), answering a malformed
+    cursor with a 400, and expose the next-page cursor in the X-Next-Cursor header
+    """
+    try:
+        page = await fetch
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if page.next_cursor:
+        response.headers["X-Next-Cursor"] = page.next_cursor
+    return page
+
+
+# Columns of SessionSummaryResponse
+SESSION_SUMMARY_COLUMNS = (
+    InterviewSession.id,
+    InterviewSession.user_id,
+    InterviewSession.title,
+    InterviewSession.status,
+    InterviewSession.resume_filename,
+    InterviewSession.jd_filename,
+    InterviewSession.total_questions,
+    InterviewSession.answered_questions,
+    InterviewSession.average_score,
+    InterviewSession.created_at,
+    InterviewSession.updated_at,
+)
+
+
+@router.get("/sessions", response_model=List[SessionSummaryResponse])
+async def list_sessions(
+    response: Response,
+    user_id: Optional[int] = None,
+    status: Optional[SessionStatus] = None,
+    limit: int = Query(settings.default_page_size, ge=1, le=settings.max_page_size),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor value from the previous page"),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    List sessions newest first, optionally filtered by user and status.
+    Paginated by cursor: pass the X-Next-Cursor response header as ?cursor=
+    to get the next page; the header is absent on the last page.
+    """
+    # Never load the extracted resume/JD text just to list sessions
+    stmt = select(InterviewSession).options(load_only(*SESSION_SUMMARY_COLUMNS))
+    if user_id is not None:
+        stmt = stmt.where(InterviewSession.user_id == user_id)
+    if status is not None:
+        stmt = stmt.where(InterviewSession.status == status)
+    return (await paginate(akeyset_page(db, stmt, InterviewSession, limit, cursor), response)).items
+
+
+@router.get("/sessions/{session_id}/status", response_model=SessionStatusResponse)
+async def get_session_status(
+    session_id: int,
+    wait: float = Query(0, ge=0, description="Long-poll: seconds to wait while the session is still 'created'"),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Get the generation status of a session.
+    With ?wait=N the request is held until the status changes or N seconds pass.
+    """
+    deadline = time.monotonic() + min(wait, settings.job_status_max_wait_seconds)
+    queue = get_job_queue()
+
+    while True:
+        status = await _load_session_status(db, session_id)
+        if status is None:
+            raise HTTPException(status_code=404, detail="Session not found")
+        remaining = deadline - time.monotonic()
+        if status.status != SessionStatus.CREATED or remaining <= 0:
+            return status
+        # End the read transaction so the next check sees the worker's commit
+        await db.rollback()
+        # Woken immediately if this worker runs the job; the short timeout
+        # re-checks the database in case another worker process runs it
+        await queue.wait_for_update(session_id, timeout=min(remaining, 1.0))
+
+
+@router.get("/sessions/{session_id}/questions", response_model=List[SessionQuestionResponse])
+async def get_session_questions(session_id: int, db: AsyncSession = Depends(get_async_db)):
+    """
+    Get the generated questions of a session, in order
+    """
+    exists = (
+        await db.execute(select(InterviewSession.id).where(InterviewSession.id == session_id))
+    ).first()
+    if not exists:
+        raise HTTPException(status_code=404, detail="Session not found")
+
+    return (
+        await db.scalars(
+            select(InterviewQuestion)
+            .where(InterviewQuestion.session_id == session_id)
+            .order_by(InterviewQuestion.question_number)
+        )
+    ).all()
+
+
+@router.get("/search/questions", response_model=List[QuestionSearchResult])
+async def search_questions(
+    response: Response,
+    q: str = Query(..., min_length=1, max_length=200),
+    user_id: Optional[int] = None,
+    limit: int = Query(settings.default_page_size, ge=1, le=settings.max_page_size),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor value from the previous page"),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Full-text search over generated questions, best matches first, optionally
+    limited to one user's sessions. Paginated by cursor like /sessions.
+    """
+    stmt = select(
+        InterviewQuestion.id,
+        InterviewQuestion.session_id,
+        InterviewQuestion.question_number,
+        InterviewQuestion.question_text,
+        InterviewQuestion.question_type,
+    )
+    if user_id is not None:
+        stmt = stmt.join(InterviewSession, InterviewSession.id == InterviewQuestion.session_id).where(
+            InterviewSession.user_id == user_id
+        )
+    return (await paginate(asearch_page(db, stmt, QUESTIONS, q, limit, cursor), response)).items
+
+
+@router.get("/search/sessions", response_model=List[SessionSearchResult])
+async def search_sessions(
+    response: Response,
+    q: str = Query(..., min_length=1, max_length=200),
+    user_id: Optional[int] = None,
+    limit: int = Query(settings.default_page_size, ge=1, le=settings.max_page_size),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor value from the previous page"),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Full-text search over session titles and job descriptions, best matches
+    first (title matches weigh more). Paginated by cursor like /sessions.
+    """
+    stmt = select(*SESSION_SUMMARY_COLUMNS)
+    if user_id is not None:
+        stmt = stmt.where(InterviewSession.user_id == user_id)
+    return (await paginate(asearch_page(db, stmt, SESSIONS, q, limit, cursor), response)).items
+
+
+@router.get("/cache/stats")
+def get_cache_stats():
+    """
+    Hit/miss counters for the in-process caches and question bank of this worker,
+    plus the current state of the outbound LLM limiter, request coalescing and
+    prompt compaction
+    """
+    llm_cache = get_llm_cache()
+    bank = _question_bank()
+    return {
+        "extraction": get_extraction_cache().stats(),
+        "llm": llm_cache.stats() if llm_cache is not None else None,
+        "llm_limiter": get_llm_rate_limiter().stats(),
+        "llm_inflight": get_llm_service().inflight.stats(),
+        "prompt_compaction": get_llm_service().compaction.stats(),
+        "question_bank": bank.stats() if bank is not None else None,
+    }
+
+
+@router.get("/extraction/stats")
+def get_extraction_stats():
+    """
+    Per-extractor counters and timings for this worker: how often each
+    extractor's output was accepted, rejected by the quality check, or errored
+    """
+    return {"extractors": extractor_registry.stats()}
+
+
+@router.get("/profiles")
+def list_profiles():
+    """
+    Request profiles kept by this worker, newest first (see PROFILING_ENABLED).
+    Profiled responses carry their id in the X-Profile-Id header.
+    """
+    return {"profiles": [profile.summary() for profile in get_profile_store().list()]}
+
+
+def _get_profile(profile_id: str) -> RequestProfile:
+    profile = get_profile_store().get(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return profile
+
+
+@router.get("/profiles/{profile_id}")
+def get_profile(profile_id: str, limit: int = Query(25, ge=1, le=500)):
+    """
+    A request profile: the functions with the most samples, counting both
+    samples in the function itself and in everything it called
+    """
+    profile = _get_profile(profile_id)
+    return {**profile.summary(), "functions": profile.top_functions(limit)}
+
+
+@router.get("/profiles/{profile_id}/folded", response_class=PlainTextResponse)
+def get_profile_folded(profile_id: str):
+    """The profile's sampled stacks in collapsed format, for flamegraph.pl or speedscope"""
+    return _get_profile(profile_id).folded()
+
+
+def _interview_response_select():
+    # The resume and job description text are not part of InterviewResponse
+    return select(Interview).options(
+        load_only(
+            Interview.id,
+            Interview.resume_filename,
+            Interview.job_description_filename,
+            Interview.questions_answers,
+            Interview.created_at,
+            Interview.updated_at,
+        )
+    )
+
+
+async def _interview_etag(db: AsyncSession, representation: str, interview_id: int) -> str:
+    """ETag of an interview from a version-only query; 404 if it does not exist"""
+    version = (
+        await db.execute(
+            select(Interview.created_at, Interview.updated_at).where(Interview.id == interview_id)
+        )
+    ).first()
+    if version is None:
+        raise HTTPException(status_code=404, detail="Interview not found")
+    return make_etag(representation, interview_id, version.updated_at or version.created_at)
+
+
 @router.get("/interviews", response_model=List[InterviewResponse])
-def get_all_interviews(db: Session = Depends(get_db)):
+async def get_all_interviews(
+    response: Response,
+    limit: int = Query(settings.default_page_size, ge=1, le=settings.max_page_size),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor value from the previous page"),
+    db: AsyncSession = Depends(get_async_db),
+):
     """
-    Get all interviews from the database
+    Get interviews from the database, newest first.
+    Paginated by cursor: pass the X-Next-Cursor response header as ?cursor=
+    to get the next page; the header is absent on the last page.
     """
-    interviews = db.query(Interview).all()
-    return interviews
+    return (await paginate(akeyset_page(db, _interview_response_select(), Interview, limit, cursor), response)).items
 
 
 @router.get("/interviews/{interview_id}", response_model=InterviewResponse)
-def get_interview(interview_id: int, db: Session = Depends(get_db)):
+async def get_interview(
+    interview_id: int,
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db),
+):
     """
-    Get a specific interview by ID
+    Get a specific interview by ID.
+    Supports conditional requests: send the ETag back in If-None-Match to get
+    304 Not Modified (answered from a version-only query) while it is unchanged.
     """
-    interview = db.query(Interview).filter(Interview.id == interview_id).first()
+    etag = await _interview_etag(db, "interview", interview_id)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+
+    interview = await db.scalar(_interview_response_select().where(Interview.id == interview_id))
     if not interview:
         raise HTTPException(status_code=404, detail="Interview not found")
+    # Tag what was actually read, in case the row changed since the version query
+    response.headers.update(
+        cache_headers(make_etag("interview", interview.id, interview.updated_at or interview.created_at))
+    )
     return interview
 
 
 @router.get("/interviews/{interview_id}/questions", response_model=InterviewQuestionsResponse)
-def get_interview_questions(interview_id: int, db: Session = Depends(get_db)):
+async def get_interview_questions(
+    interview_id: int,
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db),
+):
     """
-    Get only the questions and answers for a specific interview
+    Get only the questions and answers for a specific interview.
+    Supports If-None-Match conditional requests like GET /interviews/{id}.
     """
-    interview = db.query(Interview).filter(Interview.id == interview_id).first()
+    etag = await _interview_etag(db, "questions", interview_id)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+
+    interview = await db.scalar(
+        select(Interview)
+        .options(load_only(Interview.id, Interview.questions_answers, Interview.created_at, Interview.updated_at))
+        .where(Interview.id == interview_id)
+    )
     if not interview:
         raise HTTPException(status_code=404, detail="Interview not found")
+    response.headers.update(
+        cache_headers(make_etag("questions", interview.id, interview.updated_at or interview.created_at))
+    )
 
     return InterviewQuestionsResponse(
         id=interview.id, questions_answers=interview.questions_answers or []
@@ -0,0 +1,177 @@
+import random
+import time
+from typing import Dict, Optional
+
+from fastapi import HTTPException
+from starlette.datastructures import MutableHeaders
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.metrics import server_timing_header, start_request_timings
+from app.services.profiling import RequestProfile, get_profile_store, get_stack_sampler
+
+
+class RequestTooLargeError(HTTPException):
+    """
+    Raised from the wrapped `receive` once the body crosses the limit.
+    An HTTPException, so FastAPI passes it through body parsing unchanged
+    and it is answered with 413 like any other HTTP error.
+    """
+
+    def __init__(self, max_bytes: int):
+        super().__init__(
+            status_code=413,
+            detail=f"Request body exceeds the maximum size of {max_bytes // (1024 * 1024)} MB",
+        )
+
+
+class RequestSizeLimitMiddleware:
+    """
+    Reject request bodies larger than `max_bytes` without reading them.
+
+    Starlette parses multipart forms (spooling every file) before the endpoint
+    runs, so the limit has to be enforced here, while the body is received:
+    a too-large Content-Length is rejected before any of the body is read, and
+    chunked or mis-declared bodies are cut off as soon as they cross the limit.
+    `path_limits` overrides the limit for individual paths.
+    """
+
+    def __init__(self, app: ASGIApp, max_bytes: int, path_limits: Optional[Dict[str, int]] = None):
+        self.app = app
+        self.max_bytes = max_bytes
+        self.path_limits = path_limits or {}
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        max_bytes = self.path_limits.get(scope.get("path", ""), self.max_bytes)
+        if scope["type"] != "http" or max_bytes <= 0:
+            await self.app(scope, receive, send)
+            return
+
+        for name, value in scope["headers"]:
+            if name == b"content-length":
+                try:
+                    declared = int(value)
+                except ValueError:
+                    break
+                if declared > max_bytes:
+                    await self._reject(max_bytes, scope, receive, send)
+                    return
+                break
+
+        received = 0
+        response_started = False
+
+        async def limited_receive() -> Message:
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > max_bytes:
+                    raise RequestTooLargeError(max_bytes)
+            return message
+
+        async def tracking_send(message: Message) -> None:
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, tracking_send)
+        except RequestTooLargeError:
+            # Only reached if the body was read outside FastAPI's exception handling
+            if response_started:
+                raise
+            await self._reject(max_bytes, scope, receive, send)
+
+    async def _reject(self, max_bytes: int, scope: Scope, receive: Receive, send: Send) -> None:
+        error = RequestTooLargeError(max_bytes)
+        response = JSONResponse(
+            {"detail": error.detail},
+            status_code=error.status_code,
+            # The rest of the body is not read, so the connection cannot be reused
+            headers={"Connection": "close"},
+        )
+        await response(scope, receive, send)
+
+
+class ServerTimingMiddleware:
+    """
+    Add a Server-Timing header with the request's pipeline stage durations
+    (see app.metrics.time_stage) and its total time, for the browser's
+    devtools and Resource Timing API. Streaming responses only include the
+    stages that finished before the response started.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        timings = start_request_timings()
+
+        async def timing_send(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                headers.append("Server-Timing", server_timing_header(timings, time.perf_counter() - started))
+                # Lets cross-origin frontends read the timings
+                headers.append("Timing-Allow-Origin", "*")
+            await send(message)
+
+        await self.app(scope, receive, timing_send)
+
+
+class ProfilingMiddleware:
+    """
+    Profile selected requests with the stack sampler and keep the result in
+    the profile store; the response carries its id in X-Profile-Id.
+
+    A request is profiled when it sends `X-Profile: <token>` matching
+    `token` (the header trigger is off while no token is set), or at random
+    with probability `sample_rate`. Only installed when profiling is
+    enabled; unselected requests cost one header scan and a random().
+    """
+
+    def __init__(self, app: ASGIApp, sample_rate: float = 0.0, token: str = ""):
+        self.app = app
+        self.sample_rate = sample_rate
+        self.token = token.encode()
+
+    def _trigger(self, scope: Scope) -> Optional[str]:
+        if self.token:
+            for name, value in scope["headers"]:
+                if name == b"x-profile":
+                    if value == self.token:
+                        return "header"
+                    break
+        if self.sample_rate > 0 and random.random() < self.sample_rate:
+            return "sample"
+        return None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        trigger = self._trigger(scope) if scope["type"] == "http" else None
+        if trigger is None:
+            await self.app(scope, receive, send)
+            return
+
+        sampler = get_stack_sampler()
+        profile = RequestProfile(scope["method"], scope["path"], trigger, sampler.interval)
+
+        async def profile_send(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                profile.status_code = message["status"]
+                MutableHeaders(scope=message).append("X-Profile-Id", profile.id)
+            await send(message)
+
+        started = time.perf_counter()
+        sampler.start(profile)
+        try:
+            await self.app(scope, receive, profile_send)
+        finally:
+            sampler.stop(profile)
+            profile.duration = time.perf_counter() - started
+            get_profile_store().add(profile)
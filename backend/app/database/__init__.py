@@ -1,9 +1,17 @@
-from sqlalchemy import create_engine
+import logging
+from functools import lru_cache
+from typing import Dict, List, Set
+from sqlalchemy import Enum, create_engine, inspect, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from app.config import get_settings
+from app.metrics import instrument_pool
 
 settings = get_settings()
+logger = logging.getLogger(__name__)
 
 # Database configuration optimized for Supabase PostgreSQL
 engine_kwargs = {
@@ -22,10 +30,117 @@ if settings.environment == "production":
     }
 
 engine = create_engine(settings.database_url, **engine_kwargs)
+instrument_pool(engine.pool, "sync")
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
 
+# pg_advisory_lock key that serializes schema changes across processes
+SCHEMA_LOCK_KEY = 0x6D6F636B  # "mock"
+
+
+def enum_value_ddl(existing: Dict[str, Set[str]]) -> List[str]:
+    """
+    ALTER TYPE statements for values of the models' native enum types that
+    the database types lack (`existing`: type name -> labels). create_all
+    never alters a type that already exists, so without them a value added
+    later (SessionStatus.FAILED) is rejected by PostgreSQL.
+    """
+    statements = []
+    for table in Base.metadata.sorted_tables:
+        for column in table.columns:
+            column_type = column.type
+            if not isinstance(column_type, Enum) or not column_type.native_enum:
+                continue
+            labels = existing.get(column_type.name)
+            if labels is None:
+                # Not created yet; create_all creates it with every value
+                continue
+            for value in column_type.enums:
+                ddl = f"ALTER TYPE {column_type.name} ADD VALUE IF NOT EXISTS '{value}'"
+                if value not in labels and ddl not in statements:
+                    statements.append(ddl)
+    return statements
+
+
+def _add_enum_values(bind: Engine) -> List[str]:
+    """Add missing enum values on PostgreSQL, in autocommit: ADD VALUE cannot run in a transaction block"""
+    applied = []
+    with bind.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        # Session-level lock, as there is no transaction to hold a transaction-level one
+        conn.execute(text("SELECT pg_advisory_lock(:key)"), {"key": SCHEMA_LOCK_KEY})
+        try:
+            existing: Dict[str, Set[str]] = {}
+            for name, label in conn.execute(
+                text("SELECT t.typname, e.enumlabel FROM pg_type t JOIN pg_enum e ON e.enumtypid = t.oid")
+            ):
+                existing.setdefault(name, set()).add(label)
+            for ddl in enum_value_ddl(existing):
+                conn.execute(text(ddl))
+                applied.append(ddl)
+        finally:
+            conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": SCHEMA_LOCK_KEY})
+    return applied
+
+
+def ensure_schema(bind: Engine) -> List[str]:
+    """
+    Bring the database up to the models: add values missing from enum types,
+    create missing tables, then add columns and indexes that were introduced
+    after a table was created (create_all never alters existing tables).
+    Only additive changes are made. Returns the DDL that was applied.
+    The full-text search indexes are a separate step (ensure_search_schema).
+    """
+    # Register every model on Base.metadata
+    import app.models  # noqa: F401
+
+    postgresql = bind.dialect.name == "postgresql"
+    applied = []
+    if postgresql:
+        applied += _add_enum_values(bind)
+    with bind.begin() as conn:
+        if postgresql:
+            # Processes running this at the same time take turns; the later
+            # ones find the schema up to date instead of failing on duplicates
+            conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": SCHEMA_LOCK_KEY})
+        Base.metadata.create_all(bind=conn)
+        inspector = inspect(conn)
+        for table in Base.metadata.sorted_tables:
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                if not column.nullable and column.server_default is None:
+                    logger.warning(
+                        "Cannot add NOT NULL column %s.%s without a default; migrate it manually",
+                        table.name, column.name,
+                    )
+                    continue
+                # SQLite has no ADD COLUMN IF NOT EXISTS
+                ddl = (
+                    f"ALTER TABLE {table.name} ADD COLUMN {'IF NOT EXISTS ' if postgresql else ''}"
+                    f"{column.name} {column.type.compile(dialect=conn.dialect)}"
+                )
+                conn.execute(text(ddl))
+                applied.append(ddl)
+                if column.unique:
+                    # ADD COLUMN cannot carry a UNIQUE constraint on SQLite; a unique index is equivalent
+                    ddl = (
+                        f"CREATE UNIQUE INDEX IF NOT EXISTS uq_{table.name}_{column.name} "
+                        f"ON {table.name} ({column.name})"
+                    )
+                    conn.execute(text(ddl))
+                    applied.append(ddl)
+
+            indexes = {index["name"] for index in inspector.get_indexes(table.name)}
+            for index in table.indexes:
+                if index.name not in indexes:
+                    index.create(conn, checkfirst=True)
+                    applied.append(f"CREATE INDEX {index.name}")
+    for ddl in applied:
+        logger.info("Schema updated: %s", ddl)
+    return applied
+
 
 def get_db():
     """Dependency for getting database sessions"""
@@ -34,3 +149,74 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+# Async drivers for each sync URL scheme
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "postgres": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+    "sqlite+pysqlite": "sqlite+aiosqlite",
+}
+
+
+def to_async_url(url: str) -> str:
+    """
+    Async-driver URL for the same database: asyncpg for PostgreSQL, aiosqlite for SQLite.
+    asyncpg does not understand libpq's sslmode parameter, so it is dropped here
+    and applied through connect_args instead.
+    """
+    parsed = make_url(url)
+    driver = ASYNC_DRIVERS.get(parsed.drivername, parsed.drivername)
+    parsed = parsed.set(drivername=driver)
+    if driver == "postgresql+asyncpg":
+        parsed = parsed.difference_update_query(["sslmode"])
+    return parsed.render_as_string(hide_password=False)
+
+
+def asyncpg_connect_args(url: str) -> Dict:
+    """
+    asyncpg connect_args for a sync PostgreSQL URL: its libpq sslmode, which
+    to_async_url drops, becomes asyncpg's ssl argument (same mode names), so
+    both engines use TLS the same way whatever the environment.
+    """
+    connect_args = {}
+    sslmode = make_url(url).query.get("sslmode")
+    if sslmode:
+        connect_args["ssl"] = sslmode
+    if settings.environment == "production":
+        connect_args.setdefault("ssl", "require")
+        connect_args["timeout"] = 10
+    return connect_args
+
+
+@lru_cache()
+def get_async_engine() -> AsyncEngine:
+    """
+    Async engine for the read endpoints, on the same database as `engine`.
+    Created lazily so the async drivers are only needed once it is used.
+    """
+    url = settings.async_database_url or to_async_url(settings.database_url)
+    kwargs = dict(engine_kwargs)
+    if url.startswith("sqlite"):
+        # aiosqlite opens a connection per checkout (NullPool); there is no pool to size
+        kwargs.pop("pool_size")
+        kwargs.pop("max_overflow")
+    elif url.startswith("postgresql+asyncpg"):
+        kwargs["connect_args"] = asyncpg_connect_args(settings.async_database_url or settings.database_url)
+    async_engine = create_async_engine(url, **kwargs)
+    instrument_pool(async_engine.sync_engine.pool, "async")
+    return async_engine
+
+
+@lru_cache()
+def get_async_sessionmaker() -> async_sessionmaker:
+    # expire_on_commit=False: attribute access after commit would need implicit async I/O
+    return async_sessionmaker(get_async_engine(), expire_on_commit=False, autoflush=False)
+
+
+async def get_async_db():
+    """Dependency for getting async database sessions"""
+    async with get_async_sessionmaker()() as db:
+        yield db
@@ -1,18 +1,65 @@
+import asyncio
+import logging
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from app.api.endpoints import router
-from app.database import engine, Base
+from app.api.middleware import ProfilingMiddleware, RequestSizeLimitMiddleware, ServerTimingMiddleware
+from app.database import engine, ensure_schema
 from app.config import get_settings
+from app.metrics import CONTENT_TYPE, registry as metrics_registry
+from app.services import get_llm_service
+from app.services.extraction import load_parsers, shutdown_extraction_executor
+from app.services.jobs import get_job_queue
 
 settings = get_settings()
+logger = logging.getLogger(__name__)
+
+
+def prewarm() -> None:
+    """Import the lazily loaded parsers and build the Gemini client ahead of the first request"""
+    try:
+        load_parsers()
+        get_llm_service()
+    except Exception:
+        # The first request loads them instead
+        logger.exception("Pre-warm failed")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Schema management runs here rather than at import, so importing the app
+    # (tests, scripts, benchmarks) never touches the database
+    if settings.create_schema_on_startup:
+        await asyncio.to_thread(ensure_schema, engine)
+    job_queue = get_job_queue()
+    job_queue.start()
+    prewarm_task = None
+    if settings.prewarm_on_startup:
+        # In the background: the worker answers /health while this runs
+        prewarm_task = asyncio.create_task(asyncio.to_thread(prewarm))
+    yield
+    if prewarm_task is not None:
+        await prewarm_task
+    await job_queue.stop()
+    # Release extraction worker threads/processes
+    shutdown_extraction_executor()
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
 
 app = FastAPI(
     title=settings.app_name,
     description="API for Mock Interview Application",
     version="1.0.0",
+    lifespan=lifespan,
+)
+
+# Reject oversized uploads while the body is received, before multipart parsing spools them.
+# Added before CORS so 413 responses still carry CORS headers.
+app.add_middleware(
+    RequestSizeLimitMiddleware,
+    max_bytes=settings.max_request_size_mb * 1024 * 1024,
+    path_limits={"/api/v1/upload/batch": settings.batch_max_request_size_mb * 1024 * 1024},
 )
 
 # Configure CORS - Temporarily allow all origins for debugging
@@ -22,8 +69,22 @@ app.add_middleware(
     allow_credentials=False,  # Must be False when using wildcard
     allow_methods=["*"],
     allow_headers=["*"],
+    # Let browser clients read the pagination cursor, ETags and stage timings
+    expose_headers=["X-Next-Cursor", "ETag", "Server-Timing", "X-Profile-Id"],
 )
 
+# Not installed at all unless enabled, so it costs nothing by default
+if settings.profiling_enabled:
+    app.add_middleware(
+        ProfilingMiddleware,
+        sample_rate=settings.profiling_sample_rate,
+        token=settings.profiling_token,
+    )
+
+# Outermost, so the total in Server-Timing covers the other middleware too
+if settings.server_timing_enabled:
+    app.add_middleware(ServerTimingMiddleware)
+
 # Include routers
 app.include_router(router, prefix="/api/v1", tags=["interviews"])
 
@@ -36,3 +97,10 @@ def read_root():
 @app.get("/health")
 def health_check():
     return {"status": "healthy"}
+
+
+if settings.metrics_enabled:
+    @app.get("/metrics", include_in_schema=False)
+    def metrics():
+        """Per-worker metrics in the Prometheus text format"""
+        return PlainTextResponse(metrics_registry.render(), media_type=CONTENT_TYPE)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, JSON, Boolean, ForeignKey, Float, Enum
+from sqlalchemy import Column, Integer, String, Text, DateTime, JSON, Boolean, ForeignKey, Float, Enum, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import enum
@@ -11,6 +11,7 @@ class SessionStatus(str, enum.Enum):
     IN_PROGRESS = "in_progress"
     COMPLETED = "completed"
     ARCHIVED = "archived"
+    FAILED = "failed"
 
 
 class QuestionType(str, enum.Enum):
@@ -42,6 +43,12 @@ class User(Base):
 class InterviewSession(Base):
     """Interview session model - represents a single mock interview attempt"""
     __tablename__ = "interview_sessions"
+    __table_args__ = (
+        # Keyset pagination on (created_at, id), unfiltered and filtered by user/status
+        Index("ix_interview_sessions_created_at_id", "created_at", "id"),
+        Index("ix_interview_sessions_user_created_at_id", "user_id", "created_at", "id"),
+        Index("ix_interview_sessions_user_status_created_at_id", "user_id", "status", "created_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
@@ -65,6 +72,12 @@ class InterviewSession(Base):
     answered_questions = Column(Integer, default=0, nullable=False)
     average_score = Column(Float, nullable=True)
 
+    # Set when background question generation fails
+    error_message = Column(Text, nullable=True)
+
+    # Legacy Interview row this session was migrated from (backfill_sessions.py)
+    legacy_interview_id = Column(Integer, nullable=True, unique=True)
+
     # Timestamps
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
@@ -110,6 +123,9 @@ class Interview(Base):
     Kept for backward compatibility with existing data.
     """
     __tablename__ = "interviews"
+    __table_args__ = (
+        Index("ix_interviews_created_at_id", "created_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     resume_filename = Column(String, nullable=False)
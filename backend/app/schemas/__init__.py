@@ -1,6 +1,7 @@
 from pydantic import BaseModel
 from typing import List, Dict, Optional
 from datetime import datetime
+from app.models import QuestionType, SessionStatus
 
 
 class QuestionAnswer(BaseModel):
@@ -30,3 +31,63 @@ class InterviewResponse(BaseModel):
 class InterviewQuestionsResponse(BaseModel):
     id: int
     questions_answers: List[Dict[str, str]]
+
+
+class SessionSummaryResponse(BaseModel):
+    """Session metadata for listings - excludes the extracted document text"""
+    id: int
+    user_id: int
+    title: Optional[str] = None
+    status: SessionStatus
+    resume_filename: str
+    jd_filename: str
+    total_questions: int
+    answered_questions: int
+    average_score: Optional[float] = None
+    created_at: datetime
+    updated_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
+class GenerationJobResponse(BaseModel):
+    session_id: int
+    status: SessionStatus
+    status_url: str
+
+
+class SessionStatusResponse(BaseModel):
+    session_id: int
+    status: SessionStatus
+    total_questions: int
+    error_message: Optional[str] = None
+    updated_at: Optional[datetime] = None
+
+
+class SessionQuestionResponse(BaseModel):
+    id: int
+    question_number: int
+    question_text: str
+    question_type: Optional[QuestionType] = None
+    expected_answer: Optional[str] = None
+
+    class Config:
+        from_attributes = True
+
+
+class SessionSearchResult(SessionSummaryResponse):
+    # Relevance; higher is better, comparable only within one result list
+    score: float
+
+
+class QuestionSearchResult(BaseModel):
+    id: int
+    session_id: int
+    question_number: int
+    question_text: str
+    question_type: Optional[QuestionType] = None
+    score: float
+
+    class Config:
+        from_attributes = True
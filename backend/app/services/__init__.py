@@ -1,26 +1,128 @@
-import google.generativeai as genai
 from app.config import get_settings
-from typing import List, Dict
+from app.metrics import LLM_OUTPUT_TOKENS, LLM_PARSE_FAILURES, LLM_PROMPT_TOKENS, record_stage, time_stage
+from app.models import QuestionType
+from app.services.cache import LRUCache, RedisCache, SQLiteCache
+from app.services.compaction import CompactionStats, compact_job_description, compact_text
+from app.services.parsing import QUESTIONS_RESPONSE_SCHEMA, QuestionStreamParser, parse_questions
+from app.services.providers import LLMProvider, LLMResponse, LLMUsage, create_provider, load_genai
+from app.services.ratelimit import LLMRateLimiter
+from app.services.singleflight import SingleFlight
+from functools import lru_cache
+from typing import AsyncIterator, Callable, List, Dict, NamedTuple, Optional, Tuple
+import asyncio
+import hashlib
 import json
+import logging
+import re
+import time
 
 settings = get_settings()
+logger = logging.getLogger(__name__)
+
+def __getattr__(name: str):
+    # Keeps `app.services.genai` available (and patchable) without importing it up front
+    if name == "genai":
+        return load_genai()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+# Bump whenever the prompt or parsing changes so cached results are not reused
+PROMPT_VERSION = "1"
+
+# Question types requested in fan-out mode, in the order results are merged
+QUESTION_CATEGORIES = {
+    QuestionType.TECHNICAL: "technical questions on the skills mentioned in the resume",
+    QuestionType.EXPERIENCE: "questions on the candidate's experience related to the job requirements",
+    QuestionType.BEHAVIORAL: "behavioral questions relevant to the role",
+    QuestionType.SITUATIONAL: "scenario-based questions matching the job description",
+}
+
+_llm_cache = None
+
+
+def get_llm_cache():
+    """Get the process-wide LLM result cache (None when disabled)"""
+    global _llm_cache
+    if _llm_cache is None and settings.llm_cache_backend != "none":
+        ttl = settings.llm_cache_ttl_seconds
+        if settings.llm_cache_backend == "sqlite":
+            _llm_cache = SQLiteCache(
+                settings.llm_cache_path,
+                table="llm_results",
+                ttl_seconds=ttl,
+                max_entries=settings.llm_cache_max_entries,
+            )
+        elif settings.llm_cache_backend == "redis":
+            _llm_cache = RedisCache(
+                settings.llm_cache_redis_url, prefix="llm_results:", ttl_seconds=ttl
+            )
+        else:
+            _llm_cache = LRUCache(max_bytes=settings.llm_cache_max_mb * 1024 * 1024, ttl_seconds=ttl)
+    return _llm_cache
+
+
+@lru_cache()
+def get_llm_rate_limiter() -> LLMRateLimiter:
+    """Get the process-wide limiter shared by every outbound Gemini call"""
+    return LLMRateLimiter(
+        max_concurrency=settings.llm_max_concurrency,
+        requests_per_minute=settings.llm_requests_per_minute,
+        tokens_per_minute=settings.llm_tokens_per_minute,
+    )
+
+
+def normalize_text(text: str) -> str:
+    """Normalize line endings and surrounding whitespace so equivalent inputs compare equal"""
+    text = text.replace("\r\n", "\n").replace("\r", "\n").replace("\f", "\n")
+    text = "\n".join(line.rstrip() for line in text.split("\n"))
+    return re.sub(r"\n{3,}", "\n\n", text).strip()
+
+
+def _question_identity(question: Dict[str, str]) -> str:
+    return re.sub(r"\W+", " ", question.get("question", "").lower()).strip()
+
+
+def merge_questions(results: List[List[Dict[str, str]]]) -> List[Dict[str, str]]:
+    """Concatenate per-category results in order, dropping repeated questions"""
+    seen = set()
+    merged = []
+    for questions in results:
+        for question in questions:
+            identity = _question_identity(question)
+            if identity and identity not in seen:
+                seen.add(identity)
+                merged.append(question)
+    return merged
+
+
+class Generation(NamedTuple):
+    questions: List[Dict[str, str]]
+    # False when part of the result failed (a fan-out question type); only complete results are cached
+    complete: bool
+
+
+# Called with a generation's questions when the result is complete
+OnComplete = Callable[[List[Dict[str, str]]], None]
 
 
 class LLMService:
-    """Google Gemini LLM Service for generating interview questions"""
+    """
+    LLM Service for generating interview questions.
+    The model is called through an LLMProvider: Gemini by default, see LLM_PROVIDER.
+    """
 
-    def __init__(self):
-        # Configure Gemini API
-        genai.configure(api_key=settings.gemini_api_key)
-        self.model = genai.GenerativeModel(settings.gemini_model)
+    def __init__(self, provider: Optional[LLMProvider] = None):
+        self.provider = provider or create_provider()
+        self.model_name = self.provider.model_name
+        self.cache = get_llm_cache()
+        self.limiter = get_llm_rate_limiter()
+        # Coalesces identical concurrent generations into one Gemini call
+        self.inflight = SingleFlight()
+        self.compaction = CompactionStats()
 
-    def generate_interview_questions(
-        self, resume_content: str, job_description: str
-    ) -> List[Dict[str, str]]:
-        """
-        Generate 10-15 interview questions based on resume and job description
-        """
-        prompt = f"""You are an expert technical interviewer. Based on the following resume and job description,
+    def _build_prompt(self, resume_content: str, job_description: str) -> str:
+        """Build the question-generation prompt from resume and job description"""
+        return f"""You are an expert technical interviewer. Based on the following resume and job description,
 generate 10-15 relevant interview questions along with reference answers.
 
 Resume:
@@ -46,52 +148,404 @@ Example format:
 ]
 """
 
+    def _build_category_prompt(
+        self, resume_content: str, job_description: str, question_type: QuestionType
+    ) -> str:
+        """Build a fan-out prompt asking for questions of a single type"""
+        count = settings.fanout_questions_per_type
+        return f"""You are an expert technical interviewer. Based on the following resume and job description,
+generate {count} {QUESTION_CATEGORIES[question_type]}, along with reference answers.
+
+Resume:
+{resume_content}
+
+Job Description:
+{job_description}
+
+Format your response ONLY as a valid JSON array of {count} objects with 'question' and 'answer' keys, nothing else.
+Do not include any markdown code blocks or explanations.
+"""
+
+    def _generation_params(self) -> Dict:
+        """Generation parameters shared by the sync and async code paths"""
+        params = {
+            "temperature": 0.7,
+            "top_p": 0.95,
+            "top_k": 40,
+            "max_output_tokens": 8192,
+        }
+        if settings.gemini_structured_output:
+            # Constrain decoding to the question schema instead of relying on the prompt
+            params["response_mime_type"] = "application/json"
+            params["response_schema"] = QUESTIONS_RESPONSE_SCHEMA
+        return params
+
+    def cache_key(self, resume_content: str, job_description: str, mode: str = "single") -> str:
+        """
+        Canonical hash of everything that determines the generated questions:
+        normalized inputs (job_description already carries any additional context),
+        model name, generation config, generation mode and prompt version.
+        """
+        payload = json.dumps(
+            {
+                "prompt_version": PROMPT_VERSION,
+                "mode": mode,
+                "questions_per_type": settings.fanout_questions_per_type if mode == "fanout" else None,
+                "model": self.model_name,
+                "generation_config": self._generation_params(),
+                "resume": resume_content,
+                "job_description": job_description,
+            },
+            sort_keys=True,
+            separators=(",", ":"),
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _cache_get(self, key: str) -> Optional[List[Dict[str, str]]]:
+        if self.cache is None:
+            return None
         try:
-            # Generate content with Gemini
-            response = self.model.generate_content(
-                prompt,
-                generation_config=genai.types.GenerationConfig(
-                    temperature=0.7,
-                    top_p=0.95,
-                    top_k=40,
-                    max_output_tokens=8192,
-                )
+            cached = self.cache.get(key)
+        except Exception as e:
+            # A cache outage should degrade to a cache miss, not a failed request
+            logger.warning("Error reading LLM result cache: %s", e)
+            return None
+        return json.loads(cached) if cached is not None else None
+
+    def _cache_set(self, key: str, questions: List[Dict[str, str]]) -> None:
+        # Empty results mean generation or parsing failed - never cache those
+        if self.cache is None or not questions:
+            return
+        try:
+            self.cache.set(key, json.dumps(questions))
+        except Exception as e:
+            logger.warning("Error writing LLM result cache: %s", e)
+
+    @staticmethod
+    def estimate_tokens(text: str) -> int:
+        """Rough prompt token count (~4 characters per token) used to pace the TPM bucket"""
+        return len(text) // 4 + 1
+
+    def count_tokens(self, text: str) -> int:
+        """Prompt token count with the configured counter, falling back to the estimate"""
+        if settings.prompt_token_counter == "model":
+            try:
+                return self.provider.count_tokens(text)
+            except Exception as e:
+                logger.warning("Error counting tokens with the model, using estimate: %s", e)
+        return self.estimate_tokens(text)
+
+    @time_stage("prompt")
+    def prepare_inputs(self, resume_content: str, job_description: str) -> Tuple[str, str]:
+        """
+        Compact (when enabled) and normalize the documents before prompting.
+        Runs before the cache key is computed, so it must be deterministic.
+        """
+        if settings.prompt_compaction:
+            resume = compact_text(
+                resume_content, settings.prompt_resume_max_tokens, self.count_tokens
+            )
+            job = compact_job_description(
+                job_description, settings.prompt_jd_max_tokens, self.count_tokens
             )
+            self.compaction.record([resume, job])
+            logger.info(
+                "Prompt compaction: resume %d -> %d tokens%s, job description %d -> %d tokens%s",
+                resume.tokens_before, resume.tokens_after, " (truncated)" if resume.truncated else "",
+                job.tokens_before, job.tokens_after, " (truncated)" if job.truncated else "",
+            )
+            resume_content, job_description = resume.text, job.text
+        return normalize_text(resume_content), normalize_text(job_description)
 
-            # Extract text from response
-            response_text = response.text.strip()
-
-            # Remove markdown code blocks if present
-            if response_text.startswith("```json"):
-                response_text = response_text.replace("```json", "").replace("```", "").strip()
-            elif response_text.startswith("```"):
-                response_text = response_text.replace("```", "").strip()
-
-            # Parse JSON
-            result = json.loads(response_text)
-
-            # Handle different response formats
-            if isinstance(result, dict):
-                if "questions" in result:
-                    return result["questions"]
-                elif "questions_answers" in result:
-                    return result["questions_answers"]
-                else:
-                    return list(result.values())[0] if result else []
-            elif isinstance(result, list):
-                return result
+    @staticmethod
+    def _usage_tokens(usage: Optional[LLMUsage]) -> int:
+        """Total tokens billed for a response, as reported by the provider"""
+        return (usage.total_tokens or 0) if usage is not None else 0
 
-            return []
+    @staticmethod
+    def _observe_usage(usage: Optional[LLMUsage]) -> None:
+        """Record the prompt and output token counts of a response"""
+        if usage is None:
+            return
+        for metric, count in ((LLM_PROMPT_TOKENS, usage.prompt_tokens), (LLM_OUTPUT_TOKENS, usage.output_tokens)):
+            if count is not None:
+                metric.observe(count)
 
-        except json.JSONDecodeError as e:
-            print(f"Error parsing JSON from Gemini response: {str(e)}")
-            print(f"Response was: {response_text[:200]}...")
-            return []
+    @staticmethod
+    def _retry_delay(attempt: int) -> float:
+        return min(2 ** attempt, 30)
+
+    @time_stage("llm")
+    def _call_model(self, prompt: str) -> LLMResponse:
+        """Call the model through the shared limiter, retrying quota (429) errors with backoff"""
+        estimated = self.estimate_tokens(prompt)
+        for attempt in range(settings.llm_max_retries + 1):
+            try:
+                with self.limiter.limit_sync(estimated):
+                    response = self.provider.generate(prompt, self._generation_params())
+                self.limiter.record_usage(estimated, self._usage_tokens(response.usage))
+                self._observe_usage(response.usage)
+                return response
+            except self.provider.quota_errors:
+                if attempt == settings.llm_max_retries:
+                    raise
+                logger.warning("Gemini quota exhausted, retrying (attempt %d)", attempt + 1)
+                time.sleep(self._retry_delay(attempt))
+
+    async def _acall_model(self, prompt: str) -> LLMResponse:
+        """Async variant of _call_model"""
+        estimated = self.estimate_tokens(prompt)
+        with time_stage("llm"):
+            for attempt in range(settings.llm_max_retries + 1):
+                try:
+                    async with self.limiter.limit(estimated):
+                        response = await self.provider.agenerate(prompt, self._generation_params())
+                    self.limiter.record_usage(estimated, self._usage_tokens(response.usage))
+                    self._observe_usage(response.usage)
+                    return response
+                except self.provider.quota_errors:
+                    if attempt == settings.llm_max_retries:
+                        raise
+                    logger.warning("Gemini quota exhausted, retrying (attempt %d)", attempt + 1)
+                    await asyncio.sleep(self._retry_delay(attempt))
+
+    @time_stage("parse")
+    def _parse_response(self, response_text: str) -> List[Dict[str, str]]:
+        """Parse the model output into a list of question/answer dicts"""
+        result = parse_questions(response_text)
+        if not result.questions:
+            LLM_PARSE_FAILURES.inc(outcome="empty")
+        elif result.recovered:
+            LLM_PARSE_FAILURES.inc(outcome="recovered")
+        if result.recovered:
+            # Usually output cut off at max_output_tokens; keep what was complete
+            logger.warning(
+                "Gemini response was not valid JSON; recovered %d complete questions from %d chars",
+                len(result.questions),
+                len(response_text),
+            )
+        return result.questions
+
+    def generate_interview_questions(
+        self, resume_content: str, job_description: str
+    ) -> List[Dict[str, str]]:
+        """
+        Generate 10-15 interview questions based on resume and job description
+        """
+        resume_content, job_description = self.prepare_inputs(resume_content, job_description)
+        key = self.cache_key(resume_content, job_description)
+        cached = self._cache_get(key)
+        if cached is not None:
+            return cached
+
+        prompt = self._build_prompt(resume_content, job_description)
+
+        try:
+            # Generate content with Gemini
+            response = self._call_model(prompt)
+            questions = self._parse_response(response.text)
         except Exception as e:
-            print(f"Error generating questions with Gemini: {str(e)}")
+            logger.error("Error generating questions with Gemini: %s", e)
             return []
 
+        self._cache_set(key, questions)
+        return questions
+
+    async def agenerate_interview_questions(
+        self,
+        resume_content: str,
+        job_description: str,
+        on_complete: Optional[OnComplete] = None,
+        prepared: bool = False,
+    ) -> List[Dict[str, str]]:
+        """
+        Async variant of generate_interview_questions.
+        Uses Gemini's async client so a slow generation does not block the event loop.
+        In "fanout" mode the question types are generated by concurrent calls.
+        `on_complete` is called with the result when it is complete, i.e. when
+        it is (or was) cached: not for failures or partial fan-out results.
+        prepared=True means the documents already went through prepare_inputs.
+        """
+        if not prepared:
+            # Compaction is CPU work, and may call the token-counting API
+            resume_content, job_description = await asyncio.to_thread(
+                self.prepare_inputs, resume_content, job_description
+            )
+        mode = settings.question_generation_mode
+        key = self.cache_key(resume_content, job_description, mode)
+        # SQLite and Redis lookups are blocking I/O
+        cached = await asyncio.to_thread(self._cache_get, key)
+        if cached is not None:
+            if on_complete is not None:
+                on_complete(cached)
+            return cached
+
+        if mode == "fanout":
+            generate = lambda: self._agenerate_fanout(key, resume_content, job_description)
+        else:
+            prompt = self._build_prompt(resume_content, job_description)
+            generate = lambda: self._agenerate_uncached(key, prompt)
+        generation = await self.inflight.do(key, generate)
+        if generation.complete and on_complete is not None:
+            on_complete(generation.questions)
+        # Each caller gets its own list so one caller's edits don't leak to the others
+        return [dict(question) for question in generation.questions]
+
+    async def _agenerate_uncached(self, key: str, prompt: str) -> Generation:
+        try:
+            response = await self._acall_model(prompt)
+            questions = self._parse_response(response.text)
+        except Exception as e:
+            logger.error("Error generating questions with Gemini: %s", e)
+            return Generation([], False)
+
+        await asyncio.to_thread(self._cache_set, key, questions)
+        return Generation(questions, True)
+
+    async def _agenerate_category(
+        self, resume_content: str, job_description: str, question_type: QuestionType
+    ) -> List[Dict[str, str]]:
+        """Generate the questions of one type, tagged with that type"""
+        prompt = self._build_category_prompt(resume_content, job_description, question_type)
+        response = await self._acall_model(prompt)
+        return [
+            {**question, "type": question_type.value}
+            for question in self._parse_response(response.text)
+        ]
+
+    async def _agenerate_fanout(
+        self, key: str, resume_content: str, job_description: str
+    ) -> Generation:
+        """
+        One concurrent call per question type, merged in QUESTION_CATEGORIES order.
+        A failed type is left out; partial results are returned but not cached.
+        """
+        categories = list(QUESTION_CATEGORIES)
+        results = await asyncio.gather(
+            *(self._agenerate_category(resume_content, job_description, t) for t in categories),
+            return_exceptions=True,
+        )
+        succeeded = []
+        for question_type, result in zip(categories, results):
+            if isinstance(result, BaseException):
+                logger.error("Error generating %s questions with Gemini: %s", question_type.value, result)
+                succeeded.append([])
+            else:
+                succeeded.append(result)
+
+        questions = merge_questions(succeeded)
+        complete = not any(isinstance(result, BaseException) for result in results)
+        if complete:
+            await asyncio.to_thread(self._cache_set, key, questions)
+        return Generation(questions, complete)
+
+    async def astream_interview_questions(
+        self,
+        resume_content: str,
+        job_description: str,
+        on_complete: Optional[OnComplete] = None,
+        prepared: bool = False,
+    ) -> AsyncIterator[Dict[str, str]]:
+        """
+        Stream interview questions one at a time as Gemini produces them.
+        Unlike the non-streaming variants, errors are raised so the caller can
+        report them after questions have already been sent.
+        In "fanout" mode each question type is sent as soon as its call completes.
+        `on_complete` and `prepared` are as in agenerate_interview_questions;
+        on_complete is called after the last question.
+        """
+        if not prepared:
+            resume_content, job_description = await asyncio.to_thread(
+                self.prepare_inputs, resume_content, job_description
+            )
+        mode = settings.question_generation_mode
+        key = self.cache_key(resume_content, job_description, mode)
+        cached = await asyncio.to_thread(self._cache_get, key)
+        if cached is not None:
+            for question in cached:
+                yield question
+            if on_complete is not None:
+                on_complete(cached)
+            return
+
+        if mode == "fanout":
+            async for question in self._astream_fanout(key, resume_content, job_description, on_complete):
+                yield question
+            return
+
+        prompt = self._build_prompt(resume_content, job_description)
+        parser = QuestionStreamParser()
+        questions = []
+
+        estimated = self.estimate_tokens(prompt)
+
+        # The concurrency slot is held for the whole stream
+        started = time.perf_counter()
+        async with self.limiter.limit(estimated):
+            stream = await self.provider.astream(prompt, self._generation_params())
+            async for chunk in stream:
+                for question in parser.feed(chunk):
+                    questions.append(question)
+                    yield question
+        # Includes time the client took to consume the stream
+        record_stage("llm", time.perf_counter() - started)
+        self.limiter.record_usage(estimated, self._usage_tokens(stream.usage))
+        self._observe_usage(stream.usage)
+
+        await asyncio.to_thread(self._cache_set, key, questions)
+        if on_complete is not None:
+            on_complete(questions)
+
+    async def _astream_fanout(
+        self, key: str, resume_content: str, job_description: str, on_complete: Optional[OnComplete] = None
+    ) -> AsyncIterator[Dict[str, str]]:
+        """Yield each question type's results in completion order; raises only if every type fails"""
+        tasks = {
+            asyncio.ensure_future(
+                self._agenerate_category(resume_content, job_description, question_type)
+            ): question_type
+            for question_type in QUESTION_CATEGORIES
+        }
+        results = {}
+        seen = set()
+        last_error: Optional[Exception] = None
+        pending = set(tasks)
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    question_type = tasks[task]
+                    try:
+                        questions = task.result()
+                    except Exception as e:
+                        logger.error("Error generating %s questions with Gemini: %s", question_type.value, e)
+                        last_error = e
+                        continue
+                    results[question_type] = questions
+                    for question in questions:
+                        identity = _question_identity(question)
+                        if identity and identity not in seen:
+                            seen.add(identity)
+                            yield question
+        finally:
+            # The client went away mid-stream
+            for task in pending:
+                task.cancel()
+
+        if not results:
+            raise last_error
+        if last_error is None:
+            # Cache in the same stable order as the non-streaming fan-out
+            questions = merge_questions([results[t] for t in QUESTION_CATEGORIES])
+            await asyncio.to_thread(self._cache_set, key, questions)
+            if on_complete is not None:
+                on_complete(questions)
+
 
+@lru_cache()
 def get_llm_service():
-    """Get the LLM service instance"""
+    """
+    Get the process-wide LLM service instance.
+    Reusing it avoids re-running genai.configure and rebuilding the model per request.
+    """
     return LLMService()
@@ -0,0 +1,126 @@
+import logging
+from datetime import datetime, timezone
+from typing import Callable, Iterator, List, NamedTuple, Optional
+
+from sqlalchemy import func, insert, select
+from sqlalchemy.engine import Engine, Row
+from sqlalchemy.orm import Session
+
+from app.models import Interview, InterviewQuestion, InterviewSession, SessionStatus
+from app.services.sessions import get_or_create_anonymous_user, question_rows, session_title
+
+logger = logging.getLogger(__name__)
+
+
+class BackfillResult(NamedTuple):
+    batches: int
+    sessions: int
+    questions: int
+    # Highest legacy interview id migrated so far; the next run starts after it
+    last_interview_id: Optional[int]
+
+
+def _legacy_questions(interview) -> list:
+    """Question/answer dicts from a legacy questions_answers blob, skipping malformed entries"""
+    value = interview.questions_answers or []
+    if isinstance(value, dict):
+        value = value.get("questions") or value.get("questions_answers") or []
+    return [q for q in value if isinstance(q, dict) and q.get("question")]
+
+
+_LEGACY_COLUMNS = (
+    Interview.id,
+    Interview.resume_filename,
+    Interview.resume_content,
+    Interview.job_description_filename,
+    Interview.job_description_content,
+    Interview.questions_answers,
+    Interview.created_at,
+)
+
+
+def _legacy_batches(engine: Engine, after_id: int, batch_size: int) -> Iterator[List[Row]]:
+    """Legacy rows with id > after_id, in id order, batch_size at a time"""
+    query = select(*_LEGACY_COLUMNS).order_by(Interview.id)
+    if engine.dialect.name == "sqlite":
+        # No server-side cursors, and an open read statement would block the batch commits
+        while True:
+            with engine.connect() as reader:
+                batch = reader.execute(query.where(Interview.id > after_id).limit(batch_size)).all()
+            if not batch:
+                return
+            yield batch
+            after_id = batch[-1].id
+    else:
+        with engine.connect() as reader:
+            result = reader.execution_options(stream_results=True, yield_per=batch_size).execute(
+                query.where(Interview.id > after_id)
+            )
+            yield from result.partitions()
+
+
+def backfill_legacy_interviews(
+    engine: Engine,
+    session_factory: Callable[[], Session],
+    batch_size: int = 500,
+    max_batches: Optional[int] = None,
+) -> BackfillResult:
+    """
+    Copy legacy `interviews` rows into interview_sessions + interview_questions.
+
+    Rows are read in id order through a server-side cursor (stream_results) in
+    fixed-size batches, so the table is never loaded into memory or locked
+    (SQLite, which has no server-side cursors, reads each batch by keyset).
+    Each batch is written on a separate connection as one multi-row INSERT
+    for the sessions and one for their questions, and committed on its own.
+    Migrated sessions record legacy_interview_id, so an interrupted run
+    resumes after the last committed batch and no row is migrated twice.
+    """
+    with session_factory() as db:
+        user_id = get_or_create_anonymous_user(db).id
+        last_id = db.query(func.max(InterviewSession.legacy_interview_id)).scalar()
+
+    batches = sessions = questions = 0
+    for batch in _legacy_batches(engine, last_id or 0, batch_size):
+        with session_factory() as db:
+            inserted = db.execute(
+                insert(InterviewSession).returning(
+                    InterviewSession.legacy_interview_id, InterviewSession.id
+                ),
+                [
+                    {
+                        "user_id": user_id,
+                        "status": SessionStatus.IN_PROGRESS,
+                        "resume_filename": row.resume_filename,
+                        "resume_text": row.resume_content,
+                        "jd_filename": row.job_description_filename,
+                        "jd_text": row.job_description_content,
+                        "title": session_title(row.job_description_content),
+                        "total_questions": len(_legacy_questions(row)),
+                        "legacy_interview_id": row.id,
+                        "created_at": row.created_at or datetime.now(timezone.utc),
+                    }
+                    for row in batch
+                ],
+            ).all()
+            session_ids = dict(inserted)
+
+            rows = []
+            for row in batch:
+                rows.extend(question_rows(session_ids[row.id], _legacy_questions(row)))
+            if rows:
+                db.execute(insert(InterviewQuestion), rows)
+            db.commit()
+
+        batches += 1
+        sessions += len(batch)
+        questions += len(rows)
+        last_id = batch[-1].id
+        logger.info(
+            "Backfill batch %d: %d sessions, %d questions (through interview %d)",
+            batches, len(batch), len(rows), last_id,
+        )
+        if max_batches is not None and batches >= max_batches:
+            break
+
+    return BackfillResult(batches, sessions, questions, last_id)
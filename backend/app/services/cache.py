@@ -0,0 +1,263 @@
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+
+class LRUCache:
+    """
+    In-process LRU cache of string values bounded by total size in bytes,
+    with an optional per-entry TTL.
+    Thread-safe so it can be shared between the event loop and executor threads.
+    """
+
+    name = "memory"
+
+    def __init__(self, max_bytes: int, ttl_seconds: Optional[float] = None):
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        # key -> (value, expires_at); expires_at is None when there is no TTL
+        self._entries: "OrderedDict[str, Tuple[str, Optional[float]]]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def _sizeof(value: str) -> int:
+        return len(value.encode("utf-8"))
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] is not None and entry[1] <= time.monotonic():
+                del self._entries[key]
+                self._size -= self._sizeof(entry[0])
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def set(self, key: str, value: str) -> None:
+        size = self._sizeof(value)
+        if size > self.max_bytes:
+            return
+        expires_at = time.monotonic() + self.ttl_seconds if self.ttl_seconds else None
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._size -= self._sizeof(old[0])
+            self._entries[key] = (value, expires_at)
+            self._size += size
+            while self._size > self.max_bytes:
+                _, (evicted, _) = self._entries.popitem(last=False)
+                self._size -= self._sizeof(evicted)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self._size,
+            }
+
+
+class SQLiteCache:
+    """
+    SQLite-backed cache of string values with an optional TTL and entry cap.
+    The database file can be shared by every uvicorn worker on the host.
+    """
+
+    name = "sqlite"
+
+    # Trim to max_entries every this many writes rather than on each one
+    PRUNE_INTERVAL = 100
+
+    def __init__(
+        self,
+        path: str,
+        table: str = "cache",
+        ttl_seconds: Optional[float] = None,
+        max_entries: Optional[int] = None,
+    ):
+        self.path = path
+        self.table = table
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._writes = 0
+        self.hits = 0
+        self.misses = 0
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        conn = self._connection()
+        conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {self.table} "
+            "(key TEXT PRIMARY KEY, value TEXT NOT NULL, created_at REAL NOT NULL)"
+        )
+        conn.commit()
+
+    def _connection(self) -> sqlite3.Connection:
+        # sqlite3 connections must not be shared across threads
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[str]:
+        row = self._connection().execute(
+            f"SELECT value, created_at FROM {self.table} WHERE key = ?", (key,)
+        ).fetchone()
+        if row is not None and self.ttl_seconds and row[1] + self.ttl_seconds <= time.time():
+            row = None
+        with self._lock:
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return row[0]
+
+    def set(self, key: str, value: str) -> None:
+        conn = self._connection()
+        conn.execute(
+            f"INSERT OR REPLACE INTO {self.table} (key, value, created_at) VALUES (?, ?, ?)",
+            (key, value, time.time()),
+        )
+        conn.commit()
+
+        with self._lock:
+            self._writes += 1
+            prune = self._writes % self.PRUNE_INTERVAL == 1
+        if prune:
+            self.prune()
+
+    def prune(self) -> None:
+        """Drop expired entries, then the oldest ones beyond max_entries"""
+        conn = self._connection()
+        if self.ttl_seconds:
+            conn.execute(
+                f"DELETE FROM {self.table} WHERE created_at <= ?",
+                (time.time() - self.ttl_seconds,),
+            )
+        if self.max_entries:
+            conn.execute(
+                f"DELETE FROM {self.table} WHERE key IN ("
+                f"SELECT key FROM {self.table} ORDER BY created_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+        conn.commit()
+
+    def clear(self) -> None:
+        conn = self._connection()
+        conn.execute(f"DELETE FROM {self.table}")
+        conn.commit()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses}
+
+
+class RedisCache:
+    """
+    Cache backed by any Redis-protocol server (Redis, Valkey, KeyDB, ...).
+    Entries expire via the server-side TTL; overall size is bounded by the
+    server's maxmemory / eviction policy.
+    """
+
+    name = "redis"
+
+    def __init__(self, url: str, prefix: str = "cache:", ttl_seconds: Optional[float] = None):
+        try:
+            import redis
+        except ImportError as e:
+            raise RuntimeError(
+                "The redis cache backend requires the 'redis' package (pip install redis)"
+            ) from e
+
+        self.client = redis.Redis.from_url(url, socket_timeout=2.0)
+        self.prefix = prefix
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[str]:
+        value = self.client.get(self.prefix + key)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return value.decode("utf-8")
+
+    def set(self, key: str, value: str) -> None:
+        ex = int(self.ttl_seconds) if self.ttl_seconds else None
+        self.client.set(self.prefix + key, value.encode("utf-8"), ex=ex)
+
+    def clear(self) -> None:
+        keys = list(self.client.scan_iter(match=self.prefix + "*"))
+        if keys:
+            self.client.delete(*keys)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses}
+
+
+class TieredCache:
+    """
+    Cache that checks its tiers in order (fastest first).
+    A hit in a slower tier is promoted into the faster ones.
+    """
+
+    def __init__(self, tiers: List):
+        self.tiers = tiers
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[str]:
+        for index, tier in enumerate(self.tiers):
+            value = tier.get(key)
+            if value is not None:
+                for faster in self.tiers[:index]:
+                    faster.set(key, value)
+                with self._lock:
+                    self.hits += 1
+                return value
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def set(self, key: str, value: str) -> None:
+        for tier in self.tiers:
+            tier.set(key, value)
+
+    def clear(self) -> None:
+        for tier in self.tiers:
+            tier.clear()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            stats = {"hits": self.hits, "misses": self.misses}
+        stats["tiers"] = {tier.name: tier.stats() for tier in self.tiers}
+        return stats
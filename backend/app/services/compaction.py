@@ -0,0 +1,190 @@
+import re
+import threading
+from collections import Counter
+from typing import Callable, Dict, List, NamedTuple
+
+# Extractors join PDF pages with a form feed so page-level boilerplate can be detected
+PAGE_BREAK = "\f"
+
+# Appended by the upload endpoints after the job description text; everything
+# after it is user-supplied and never trimmed
+ADDITIONAL_CONTEXT_HEADER = "\n\nADDITIONAL CONTEXT:\n"
+
+_PAGE_NUMBER_RE = re.compile(
+    r"^[\s\-–—]*(page\s*)?\d{1,3}(\s*(of|/)\s*\d{1,3})?[\s\-–—]*$", re.IGNORECASE
+)
+_DIGITS_RE = re.compile(r"\d+")
+_HYPHEN_BREAK_RE = re.compile(r"(\w)-\n[ \t]*([a-z])")
+_SPACES_RE = re.compile(r"[ \t\u00a0]+")
+_BLANK_LINES_RE = re.compile(r"\n{3,}")
+
+# Phrases that mark equal-opportunity / legal boilerplate paragraphs in job descriptions
+_BOILERPLATE_RE = re.compile(
+    r"equal (employment )?opportunity|without regard to (race|sex|age)|"
+    r"reasonable accommodation|e-verify|affirmative action employer",
+    re.IGNORECASE,
+)
+_MAX_BOILERPLATE_CHARS = 1500
+
+# Running headers and footers are looked for among this many lines at the top
+# and bottom of each page
+HEADER_FOOTER_LINES = 3
+
+
+class CompactionResult(NamedTuple):
+    text: str
+    tokens_before: int
+    tokens_after: int
+    truncated: bool
+
+
+def append_additional_context(job_description: str, additional_context: str) -> str:
+    """Combine job description text with optional user-supplied context"""
+    if additional_context and additional_context.strip():
+        return f"{job_description}{ADDITIONAL_CONTEXT_HEADER}{additional_context.strip()}"
+    return job_description
+
+
+def _line_signature(line: str) -> str:
+    # Page-specific numbers ("Page 3", dates) shouldn't hide a repeated header
+    return _DIGITS_RE.sub("#", line.strip().lower())
+
+
+def remove_repeated_lines(
+    text: str, min_share: float = 0.5, min_pages: int = 3, edge_lines: int = HEADER_FOOTER_LINES
+) -> str:
+    """
+    Drop running headers and footers: lines among the first or last
+    `edge_lines` non-blank lines of a page that recur there on at least
+    `min_share` of the pages (and on two or more), ignoring digits. Needs page
+    breaks, and at least `min_pages` pages: on a shorter document a line on
+    every page is as likely to be content (an employer or skill named twice).
+    """
+    pages = [page.split("\n") for page in text.split(PAGE_BREAK)]
+    if len(pages) < min_pages:
+        return text
+    edges = []
+    for lines in pages:
+        content = [i for i, line in enumerate(lines) if line.strip()]
+        edges.append(set(content[:edge_lines] + content[-edge_lines:]))
+    seen = Counter()
+    for lines, edge in zip(pages, edges):
+        seen.update({_line_signature(lines[i]) for i in edge})
+    threshold = max(2, int(len(pages) * min_share + 0.5))
+    repeated = {signature for signature, count in seen.items() if count >= threshold}
+    return PAGE_BREAK.join(
+        "\n".join(
+            line for i, line in enumerate(lines)
+            if i not in edge or _line_signature(line) not in repeated
+        )
+        for lines, edge in zip(pages, edges)
+    )
+
+
+def remove_boilerplate(text: str) -> str:
+    """Drop equal-opportunity and similar legal paragraphs"""
+    paragraphs = re.split(r"\n\s*\n", text)
+    kept = [
+        p for p in paragraphs
+        if not (_BOILERPLATE_RE.search(p) and len(p) <= _MAX_BOILERPLATE_CHARS)
+    ]
+    return "\n\n".join(kept)
+
+
+def clean_text(text: str) -> str:
+    """
+    Token-saving cleanup that keeps the content: drop running page headers and
+    footers and page numbers, join words hyphenated across line breaks, and
+    collapse whitespace.
+    """
+    text = text.replace("\r\n", "\n").replace("\r", "\n")
+    # Join hyphenated words first so the second halves aren't mistaken for repeated lines
+    text = _HYPHEN_BREAK_RE.sub(r"\1\2", text)
+    text = remove_repeated_lines(text)
+    text = text.replace(PAGE_BREAK, "\n")
+    lines = [_SPACES_RE.sub(" ", line).strip() for line in text.split("\n")]
+    text = "\n".join(line for line in lines if not _PAGE_NUMBER_RE.match(line))
+    return _BLANK_LINES_RE.sub("\n\n", text).strip()
+
+
+def clean_job_description(text: str) -> str:
+    """clean_text, then drop EEO boilerplate - which only job descriptions carry"""
+    return remove_boilerplate(clean_text(text)).strip()
+
+
+def trim_to_budget(text: str, max_tokens: int, count_tokens: Callable[[str], int], tokens: int) -> str:
+    """
+    Cut `text` at a line boundary so that it fits in `max_tokens`.
+    The cut point is estimated from the measured characters per token and
+    re-checked with `count_tokens`, so a remote counter is called only a few times.
+    """
+    for _ in range(5):
+        if tokens <= max_tokens:
+            break
+        # Aim slightly under the budget so one recount usually suffices
+        keep = int(len(text) * max_tokens / tokens * 0.95)
+        cut = text.rfind("\n", 0, keep)
+        text = text[:cut if cut > 0 else keep].rstrip()
+        tokens = count_tokens(text)
+    return text
+
+
+def compact_text(
+    text: str, max_tokens: int, count_tokens: Callable[[str], int], clean: Callable[[str], str] = clean_text
+) -> CompactionResult:
+    """Clean a document with `clean` and trim it to `max_tokens` (0 = no limit)"""
+    tokens_before = count_tokens(text)
+    cleaned = clean(text)
+    tokens = count_tokens(cleaned)
+    truncated = False
+    if max_tokens > 0 and tokens > max_tokens:
+        cleaned = trim_to_budget(cleaned, max_tokens, count_tokens, tokens)
+        tokens = count_tokens(cleaned)
+        truncated = True
+    return CompactionResult(cleaned, tokens_before, tokens, truncated)
+
+
+def compact_job_description(
+    text: str, max_tokens: int, count_tokens: Callable[[str], int]
+) -> CompactionResult:
+    """Compact a job description, keeping any appended additional context intact"""
+    job_description, header, additional = text.partition(ADDITIONAL_CONTEXT_HEADER)
+    result = compact_text(job_description, max_tokens, count_tokens, clean=clean_job_description)
+    if not header:
+        return result
+    additional_tokens = count_tokens(additional)
+    return result._replace(
+        text=append_additional_context(result.text, additional),
+        tokens_before=result.tokens_before + additional_tokens,
+        tokens_after=result.tokens_after + additional_tokens,
+    )
+
+
+class CompactionStats:
+    """Running totals of prompt tokens saved by compaction"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.documents = 0
+        self.truncated = 0
+        self.tokens_before = 0
+        self.tokens_after = 0
+
+    def record(self, results: List[CompactionResult]) -> None:
+        with self._lock:
+            for result in results:
+                self.documents += 1
+                self.truncated += result.truncated
+                self.tokens_before += result.tokens_before
+                self.tokens_after += result.tokens_after
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            return {
+                "documents": self.documents,
+                "truncated": self.truncated,
+                "tokens_before": self.tokens_before,
+                "tokens_after": self.tokens_after,
+                "saved_ratio": round(1 - self.tokens_after / self.tokens_before, 4)
+                if self.tokens_before else 0.0,
+            }
@@ -0,0 +1,413 @@
+import asyncio
+import hashlib
+import io
+import logging
+import multiprocessing
+import threading
+import time
+import unicodedata
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import BinaryIO, Callable, Dict, List, NamedTuple, Optional, Tuple, Union
+
+from app.config import get_settings
+from app.metrics import EXTRACTION_BYTES, EXTRACTION_PAGES
+from app.services.cache import LRUCache, SQLiteCache, TieredCache
+from app.services.compaction import PAGE_BREAK
+from app.services.uploads import SpooledDocument
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# Bump whenever extraction output changes so stale cache entries are never served
+EXTRACTOR_VERSION = "3"
+
+_executor: Optional[Executor] = None
+_pdf_page_pool: Optional[ProcessPoolExecutor] = None
+_cache: Optional[TieredCache] = None
+
+
+# Extractors accept raw bytes or a spooled upload; the latter is read through a
+# file object so large uploads are never copied into one bytes object
+DocumentSource = Union[bytes, SpooledDocument]
+
+
+def load_parsers() -> None:
+    """
+    Import the parser libraries. They are imported on first use so they stay out
+    of worker start-up time; call this to pay that cost ahead of the first upload.
+    """
+    import docx  # noqa: F401
+    import pdfplumber  # noqa: F401
+    import PyPDF2  # noqa: F401
+
+
+class UnsupportedFileTypeError(ValueError):
+    """Raised when a document has an extension we cannot extract text from"""
+
+
+def open_source(source: DocumentSource) -> BinaryIO:
+    """Open a document source as a seekable binary file object"""
+    if isinstance(source, SpooledDocument):
+        return source.open()
+    return io.BytesIO(source)
+
+
+def read_source(source: DocumentSource) -> bytes:
+    if isinstance(source, SpooledDocument):
+        return source.read_bytes()
+    return source
+
+
+def _extract_pdf_pages(source: DocumentSource, start: int, stop: int) -> List[str]:
+    """Extract the text of pages [start, stop); runs in a page-pool worker process"""
+    import pdfplumber
+
+    with open_source(source) as f, pdfplumber.open(f) as pdf:
+        return [page.extract_text() or "" for page in pdf.pages[start:stop]]
+
+
+def split_page_ranges(page_count: int, chunks: int) -> List[Tuple[int, int]]:
+    """Split pages into at most `chunks` contiguous, near-equal [start, stop) ranges"""
+    chunks = max(1, min(chunks, page_count))
+    size, extra = divmod(page_count, chunks)
+    ranges = []
+    start = 0
+    for i in range(chunks):
+        stop = start + size + (1 if i < extra else 0)
+        ranges.append((start, stop))
+        start = stop
+    return ranges
+
+
+def get_pdf_page_pool() -> ProcessPoolExecutor:
+    """
+    Get the process pool used for page-parallel PDF extraction.
+    Uses forkserver so workers are not forked from a process running the
+    event loop and gRPC threads.
+    """
+    global _pdf_page_pool
+    if _pdf_page_pool is None:
+        _pdf_page_pool = ProcessPoolExecutor(
+            max_workers=settings.pdf_parallel_workers,
+            mp_context=multiprocessing.get_context("forkserver"),
+        )
+    return _pdf_page_pool
+
+
+def extract_pdf_text(source: DocumentSource, parallel: Optional[bool] = None) -> str:
+    """
+    Extract text from a PDF, page by page.
+    Documents with at least `pdf_parallel_min_pages` pages are split into page
+    ranges that are extracted concurrently in a process pool and joined in order.
+    Spooled uploads are sent to the pool as a temp-file path, not their bytes.
+    """
+    import pdfplumber
+
+    with open_source(source) as f, pdfplumber.open(f) as pdf:
+        page_count = len(pdf.pages)
+        if parallel is None:
+            parallel = (
+                settings.pdf_parallel_min_pages > 0
+                and page_count >= settings.pdf_parallel_min_pages
+                # Never nest pools inside an extraction worker process
+                and multiprocessing.parent_process() is None
+            )
+        if not parallel:
+            return PAGE_BREAK.join([page.extract_text() or "" for page in pdf.pages])
+
+    pool = get_pdf_page_pool()
+    futures = [
+        pool.submit(_extract_pdf_pages, source, start, stop)
+        for start, stop in split_page_ranges(page_count, settings.pdf_parallel_workers)
+    ]
+    return PAGE_BREAK.join(text for future in futures for text in future.result())
+
+
+def extract_pdf_text_fast(source: DocumentSource) -> str:
+    """Plain text-layer extraction with PyPDF2 - much faster than pdfplumber's layout analysis"""
+    from PyPDF2 import PdfReader
+
+    with open_source(source) as f:
+        reader = PdfReader(f)
+        return PAGE_BREAK.join([page.extract_text() or "" for page in reader.pages])
+
+
+def extract_docx_text(source: DocumentSource) -> str:
+    from docx import Document
+
+    with open_source(source) as f:
+        doc = Document(f)
+    return "\n".join([para.text for para in doc.paragraphs])
+
+
+def extract_txt_utf8(source: DocumentSource) -> str:
+    return read_source(source).decode("utf-8")
+
+
+def extract_txt_latin1(source: DocumentSource) -> str:
+    # Every byte sequence decodes as latin-1, so this never fails
+    return read_source(source).decode("latin-1")
+
+
+def garbage_ratio(text: str) -> float:
+    """
+    Fraction of non-whitespace characters that are replacement characters,
+    control/private-use/unassigned code points - typical of a broken text layer.
+    """
+    visible = [c for c in text if not c.isspace()]
+    if not visible:
+        return 1.0
+    bad = sum(
+        1 for c in visible
+        if c == "\ufffd" or unicodedata.category(c) in ("Cc", "Co", "Cn", "Cs")
+    )
+    return bad / len(visible)
+
+
+def text_quality_ok(text: str) -> bool:
+    """Whether a fast extractor's output is good enough to skip the fallbacks"""
+    stripped = text.strip()
+    if len(stripped) < settings.extraction_min_chars:
+        return False
+    if garbage_ratio(stripped) > settings.extraction_max_garbage_ratio:
+        return False
+    # Text layers without proper spacing come out as one long run of glued words
+    words = stripped.split()
+    return bool(words) and len(stripped) / len(words) < 30
+
+
+class ExtractionAttempt(NamedTuple):
+    extractor: str
+    seconds: float
+    outcome: str  # "accepted", "rejected" (failed the quality check) or "error"
+
+
+class ExtractionResult(NamedTuple):
+    text: str
+    # Name of the extractor whose output was used ("cache" for cache hits)
+    extractor: str
+    attempts: List[ExtractionAttempt]
+
+
+class Extractor(NamedTuple):
+    name: str
+    extract: Callable[[DocumentSource], str]
+    # Extractors with a fallback after them are only accepted if their output passes the check
+    check_quality: bool
+
+
+class ExtractorRegistry:
+    """
+    Ordered extractor chains per file extension. Each extractor is tried in
+    turn and the first acceptable output wins; the last one in a chain is
+    always accepted unless it raises.
+    """
+
+    def __init__(self):
+        self._chains: Dict[str, List[Extractor]] = {}
+        self._stats: Dict[str, Dict[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def register(
+        self, extensions: List[str], name: str, extract: Callable[[DocumentSource], str], check_quality: bool = True
+    ) -> None:
+        """Append an extractor to the chain of each extension"""
+        for ext in extensions:
+            self._chains.setdefault(ext, []).append(Extractor(name, extract, check_quality))
+
+    def extensions(self) -> List[str]:
+        return list(self._chains)
+
+    def extract(self, source: DocumentSource, filename: str) -> ExtractionResult:
+        file_ext = filename.lower().rsplit(".", 1)[-1]
+        chain = self._chains.get(file_ext)
+        if not chain:
+            raise UnsupportedFileTypeError(f"Unsupported file format: .{file_ext}")
+
+        attempts = []
+        last_error: Optional[Exception] = None
+        for index, extractor in enumerate(chain):
+            is_last = index == len(chain) - 1
+            started = time.perf_counter()
+            try:
+                text = extractor.extract(source)
+            except Exception as e:
+                attempts.append(ExtractionAttempt(extractor.name, time.perf_counter() - started, "error"))
+                last_error = e
+                continue
+            seconds = time.perf_counter() - started
+            if is_last or not extractor.check_quality or text_quality_ok(text):
+                attempts.append(ExtractionAttempt(extractor.name, seconds, "accepted"))
+                return ExtractionResult(text, extractor.name, attempts)
+            attempts.append(ExtractionAttempt(extractor.name, seconds, "rejected"))
+
+        raise last_error
+
+    def record(self, result: ExtractionResult) -> None:
+        """
+        Add a result's timings to the counters. Kept separate from extract() so
+        results from an extraction worker process are counted in this process.
+        """
+        with self._lock:
+            for attempt in result.attempts:
+                stats = self._stats.setdefault(
+                    attempt.extractor,
+                    {"accepted": 0, "rejected": 0, "error": 0, "total_seconds": 0.0},
+                )
+                stats[attempt.outcome] += 1
+                stats["total_seconds"] += attempt.seconds
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            return {
+                name: {
+                    **stats,
+                    "total_seconds": round(stats["total_seconds"], 6),
+                    "avg_ms": round(
+                        1000 * stats["total_seconds"]
+                        / max(1, stats["accepted"] + stats["rejected"] + stats["error"]),
+                        3,
+                    ),
+                }
+                for name, stats in self._stats.items()
+            }
+
+
+registry = ExtractorRegistry()
+registry.register(["pdf"], "pypdf2", extract_pdf_text_fast)
+registry.register(["pdf"], "pdfplumber", extract_pdf_text)
+registry.register(["doc", "docx"], "python-docx", extract_docx_text)
+# Only a decode error (not short output) should fall through to latin-1
+registry.register(["txt"], "utf-8", extract_txt_utf8, check_quality=False)
+registry.register(["txt"], "latin-1", extract_txt_latin1)
+
+
+def extract_document(source: DocumentSource, filename: str) -> ExtractionResult:
+    """Extract text through the registry, returning which extractor was used and timings"""
+    return registry.extract(source, filename)
+
+
+def extract_text_from_file(source: DocumentSource, filename: str) -> str:
+    """Extract text from PDF, DOC, DOCX, or TXT file"""
+    result = extract_document(source, filename)
+    registry.record(result)
+    return result.text
+
+
+def get_extraction_executor() -> Executor:
+    """
+    Get the process-wide executor used for document extraction.
+    Created lazily so importing this module does not spawn workers; a process
+    pool uses forkserver, like the PDF page pool.
+    """
+    global _executor
+    if _executor is None:
+        if settings.extraction_executor == "process":
+            _executor = ProcessPoolExecutor(
+                max_workers=settings.extraction_max_workers,
+                mp_context=multiprocessing.get_context("forkserver"),
+            )
+        else:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.extraction_max_workers,
+                thread_name_prefix="extraction",
+            )
+    return _executor
+
+
+def shutdown_extraction_executor() -> None:
+    """Shut down the extraction executors (called on application shutdown)"""
+    global _executor, _pdf_page_pool
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+    if _pdf_page_pool is not None:
+        _pdf_page_pool.shutdown(wait=False, cancel_futures=True)
+        _pdf_page_pool = None
+
+
+def get_extraction_cache() -> TieredCache:
+    """Get the process-wide extracted-text cache"""
+    global _cache
+    if _cache is None:
+        tiers = [LRUCache(max_bytes=settings.extraction_cache_max_mb * 1024 * 1024)]
+        if settings.extraction_cache_path:
+            tiers.append(
+                SQLiteCache(
+                    settings.extraction_cache_path,
+                    table="extracted_text",
+                    max_entries=settings.extraction_cache_max_entries,
+                )
+            )
+        _cache = TieredCache(tiers)
+    return _cache
+
+
+def extraction_cache_key(source: DocumentSource, filename: str) -> str:
+    """
+    Content-addressed cache key: SHA-256 of the file bytes, the extension
+    (the same bytes are parsed differently as .txt and .pdf) and the extractor version.
+    Spooled uploads reuse the digest computed while they were read.
+    """
+    file_ext = filename.lower().rsplit(".", 1)[-1]
+    if isinstance(source, SpooledDocument):
+        digest = source.sha256
+    else:
+        digest = hashlib.sha256(source).hexdigest()
+    return f"v{EXTRACTOR_VERSION}:{file_ext}:{digest}"
+
+
+def _cache_lookup(source: DocumentSource, filename: str):
+    key = extraction_cache_key(source, filename)
+    try:
+        return key, get_extraction_cache().get(key)
+    except Exception as e:
+        # A cache outage (e.g. the shared SQLite file locked by another worker)
+        # should degrade to a cache miss, not fail an upload
+        logger.warning("Error reading extraction cache: %s", e)
+        return key, None
+
+
+def _cache_store(key: str, text: str) -> None:
+    try:
+        get_extraction_cache().set(key, text)
+    except Exception as e:
+        logger.warning("Error writing extraction cache: %s", e)
+
+
+async def extract_document_async(source: DocumentSource, filename: str) -> ExtractionResult:
+    """
+    Extract text off the event loop, serving repeat uploads from the cache.
+    pdfplumber and python-docx are synchronous and CPU-bound, so running them
+    inline would stall every other request on the worker.
+    """
+    file_ext = filename.lower().rsplit(".", 1)[-1]
+    EXTRACTION_BYTES.observe(
+        source.size if isinstance(source, SpooledDocument) else len(source), type=file_ext
+    )
+    # Hashing and the SQLite tier are blocking too, so they run in the default pool
+    key, text = await asyncio.to_thread(_cache_lookup, source, filename)
+    if text is not None:
+        return ExtractionResult(text, "cache", [])
+
+    loop = asyncio.get_running_loop()
+    result = await loop.run_in_executor(
+        get_extraction_executor(), extract_document, source, filename
+    )
+    registry.record(result)
+    if file_ext == "pdf":
+        # PDF extractors separate pages with PAGE_BREAK
+        EXTRACTION_PAGES.observe(result.text.count(PAGE_BREAK) + 1, type=file_ext)
+    logger.info(
+        "Extracted %s with %s (%s)",
+        filename,
+        result.extractor,
+        ", ".join(f"{a.extractor}={a.outcome} {a.seconds * 1000:.1f}ms" for a in result.attempts),
+    )
+    await asyncio.to_thread(_cache_store, key, result.text)
+    return result
+
+
+async def extract_text_async(source: DocumentSource, filename: str) -> str:
+    """Text-only variant of extract_document_async"""
+    return (await extract_document_async(source, filename)).text
@@ -0,0 +1,185 @@
+import asyncio
+import logging
+import time
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+from sqlalchemy.orm import Session
+
+from app.config import get_settings
+from app.services.compaction import append_additional_context
+from app.services.extraction import extract_text_async
+from app.services.sessions import complete_session, fail_session
+from app.services.uploads import SpooledDocument
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+
+class GenerationJob(NamedTuple):
+    """An accepted upload waiting for extraction and question generation"""
+
+    session_id: int
+    # Spooled uploads, closed (temp files removed) once the job has been processed
+    resume_document: SpooledDocument
+    resume_filename: str
+    jd_document: SpooledDocument
+    jd_filename: str
+    additional_context: str
+    # Builds a DB session bound to the same database as the request that queued the job
+    session_factory: Callable[[], Session]
+    llm_service: object
+
+
+class QueueFullError(Exception):
+    """Raised when the job queue is at capacity"""
+
+
+class GenerationJobQueue:
+    """
+    In-process queue of question-generation jobs drained by a fixed pool of
+    asyncio worker tasks. Jobs are not durable: anything still queued when the
+    worker process exits stays in the CREATED state.
+    """
+
+    def __init__(self, workers: int, max_size: int):
+        self.workers = workers
+        self.max_size = max_size
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        # session_id -> event set when that session leaves the CREATED state
+        self._events: Dict[int, asyncio.Event] = {}
+        self.processed = 0
+        self.failed = 0
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks)
+
+    def start(self) -> None:
+        """Start the worker tasks on the running event loop"""
+        if self.running:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_size)
+        self._tasks = [
+            asyncio.create_task(self._worker(), name=f"generation-worker-{i}")
+            for i in range(self.workers)
+        ]
+
+    async def stop(self) -> None:
+        """Cancel the worker tasks and drop queued jobs, removing their spooled uploads"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        while self._queue is not None and not self._queue.empty():
+            job = self._queue.get_nowait()
+            job.resume_document.close()
+            job.jd_document.close()
+        self._queue = None
+
+    def submit(self, job: GenerationJob) -> None:
+        """Queue a job without waiting; raises QueueFullError when at capacity"""
+        if self._queue is None:
+            raise RuntimeError("Generation job queue is not running")
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            raise QueueFullError("Too many pending generation jobs")
+
+    def _event(self, session_id: int) -> asyncio.Event:
+        event = self._events.get(session_id)
+        if event is None:
+            event = self._events[session_id] = asyncio.Event()
+        return event
+
+    async def wait_for_update(self, session_id: int, timeout: float) -> bool:
+        """Wait until this worker finishes the session's job; False on timeout"""
+        event = self._event(session_id)
+        try:
+            await asyncio.wait_for(event.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            # Don't keep events for sessions that another worker process is handling
+            if self._events.get(session_id) is event:
+                del self._events[session_id]
+            return False
+
+    def _notify(self, session_id: int) -> None:
+        event = self._events.pop(session_id, None)
+        if event is not None:
+            event.set()
+
+    async def _worker(self) -> None:
+        while True:
+            job = await self._queue.get()
+            try:
+                await self.process(job)
+            except Exception:
+                logger.exception("Unexpected error in generation worker")
+            finally:
+                self._queue.task_done()
+
+    async def process(self, job: GenerationJob) -> None:
+        """Extract, generate and persist one job, recording failure on the session"""
+        started = time.perf_counter()
+        try:
+            resume_text, jd_text = await asyncio.gather(
+                extract_text_async(job.resume_document, job.resume_filename),
+                extract_text_async(job.jd_document, job.jd_filename),
+            )
+            if not resume_text.strip():
+                raise ValueError("Could not extract text from resume file")
+            if not jd_text.strip():
+                raise ValueError("Could not extract text from job description file")
+
+            full_context = append_additional_context(jd_text, job.additional_context)
+
+            questions = await job.llm_service.agenerate_interview_questions(resume_text, full_context)
+            if not questions:
+                raise ValueError("No questions were generated")
+
+            await asyncio.to_thread(
+                self._run_db, job, complete_session, job.session_id, resume_text, jd_text, questions
+            )
+            self.processed += 1
+            logger.info(
+                "Session %d: %d questions in %.2fs",
+                job.session_id, len(questions), time.perf_counter() - started,
+            )
+        except Exception as e:
+            self.failed += 1
+            logger.warning("Session %d failed: %s", job.session_id, e)
+            await asyncio.to_thread(self._run_db, job, fail_session, job.session_id, str(e))
+        finally:
+            job.resume_document.close()
+            job.jd_document.close()
+            self._notify(job.session_id)
+
+    @staticmethod
+    def _run_db(job: GenerationJob, fn, *args) -> None:
+        db = job.session_factory()
+        try:
+            fn(db, *args)
+        finally:
+            db.close()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "workers": len(self._tasks),
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "processed": self.processed,
+            "failed": self.failed,
+        }
+
+
+_job_queue: Optional[GenerationJobQueue] = None
+
+
+def get_job_queue() -> GenerationJobQueue:
+    """Get the process-wide generation job queue"""
+    global _job_queue
+    if _job_queue is None:
+        _job_queue = GenerationJobQueue(
+            workers=settings.job_workers, max_size=settings.job_queue_max_size
+        )
+    return _job_queue
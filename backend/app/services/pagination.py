@@ -0,0 +1,114 @@
+import base64
+import json
+from datetime import datetime
+from typing import List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import Select, String, literal, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+
+class InvalidCursorError(ValueError):
+    """Raised when a pagination cursor cannot be decoded"""
+
+
+class Page(NamedTuple):
+    items: List
+    # Opaque cursor for the next page; None on the last page
+    next_cursor: Optional[str]
+
+
+def _encode(payload: dict) -> str:
+    text = json.dumps(payload, separators=(",", ":"))
+    return base64.urlsafe_b64encode(text.encode()).decode().rstrip("=")
+
+
+def _decode(cursor: str) -> dict:
+    padded = cursor + "=" * (-len(cursor) % 4)
+    return json.loads(base64.urlsafe_b64decode(padded.encode()))
+
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    return _encode({"c": created_at.isoformat(), "i": row_id})
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        payload = _decode(cursor)
+        return datetime.fromisoformat(payload["c"]), int(payload["i"])
+    except (ValueError, KeyError, TypeError) as e:
+        raise InvalidCursorError("Invalid pagination cursor") from e
+
+
+def encode_score_cursor(score: float, row_id: int) -> str:
+    """Cursor for results ordered by (score, id); JSON keeps the float exact"""
+    return _encode({"s": score, "i": row_id})
+
+
+def decode_score_cursor(cursor: str) -> Tuple[float, int]:
+    try:
+        payload = _decode(cursor)
+        return float(payload["s"]), int(payload["i"])
+    except (ValueError, KeyError, TypeError) as e:
+        raise InvalidCursorError("Invalid pagination cursor") from e
+
+
+def _bind_created_at(dialect_name: str, value: datetime):
+    """
+    SQLite stores server-default timestamps as text without microseconds, while
+    SQLAlchemy binds datetimes with them; compare in the stored format so rows
+    with the cursor's own timestamp are not returned again.
+    """
+    if dialect_name == "sqlite":
+        text = value.strftime("%Y-%m-%d %H:%M:%S")
+        if value.microsecond:
+            text += f".{value.microsecond:06d}"
+        return literal(text, String)
+    return value
+
+
+def keyset_select(
+    stmt: Select, model, limit: int, cursor: Optional[str], dialect_name: str
+) -> Select:
+    """
+    Restrict `stmt` to one page, newest first, using keyset pagination on (created_at, id).
+
+    Unlike OFFSET, the cost of a page does not grow with its position: each
+    page is an index range scan starting right after the previous page's last
+    row. `model` must have `created_at` and `id` columns, and the statement's
+    filters should be covered by an index ending in (created_at, id).
+    One extra row is selected to tell whether there is a next page.
+
+    Raises:
+        InvalidCursorError: if `cursor` is malformed
+    """
+    if cursor:
+        created_at, row_id = decode_cursor(cursor)
+        stmt = stmt.where(
+            tuple_(model.created_at, model.id) < tuple_(_bind_created_at(dialect_name, created_at), row_id)
+        )
+    return stmt.order_by(model.created_at.desc(), model.id.desc()).limit(limit + 1)
+
+
+def page_from_rows(rows: List, limit: int) -> Page:
+    """Build a Page from the up to limit + 1 rows of a keyset_select statement"""
+    if len(rows) <= limit:
+        return Page(rows, None)
+    rows = rows[:limit]
+    return Page(rows, encode_cursor(rows[-1].created_at, rows[-1].id))
+
+
+def keyset_page(
+    db: Session, stmt: Select, model, limit: int, cursor: Optional[str] = None
+) -> Page:
+    """Fetch one keyset page of ORM entities (see keyset_select)"""
+    stmt = keyset_select(stmt, model, limit, cursor, db.get_bind().dialect.name)
+    return page_from_rows(db.scalars(stmt).all(), limit)
+
+
+async def akeyset_page(
+    db: AsyncSession, stmt: Select, model, limit: int, cursor: Optional[str] = None
+) -> Page:
+    """Async variant of keyset_page"""
+    stmt = keyset_select(stmt, model, limit, cursor, db.bind.dialect.name)
+    return page_from_rows((await db.scalars(stmt)).all(), limit)
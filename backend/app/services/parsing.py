@@ -0,0 +1,131 @@
+import json
+import re
+from typing import Dict, List, NamedTuple
+
+# JSON schema for Gemini's structured-output mode (response_mime_type="application/json")
+QUESTIONS_RESPONSE_SCHEMA = {
+    "type": "array",
+    "items": {
+        "type": "object",
+        "properties": {
+            "question": {"type": "string"},
+            "answer": {"type": "string"},
+        },
+        "required": ["question", "answer"],
+    },
+}
+
+# Leading markdown fence; the closing fence is optional because output may be truncated
+_FENCE_RE = re.compile(r"^```(?:json)?\s*(.*?)\s*(?:```\s*)?$", re.DOTALL | re.IGNORECASE)
+
+
+class QuestionStreamParser:
+    """
+    Incremental parser for a JSON array of question objects arriving in chunks.
+
+    Feed it text as it streams in; every time a `{...}` object that sits directly
+    inside an array is closed, it is decoded and returned. Anything outside the
+    JSON value (markdown fences, stray prose) is skipped, and both a bare array
+    and an object wrapping the array (`{"questions": [...]}`) are handled.
+    """
+
+    def __init__(self):
+        self._buffer = ""
+        self._pos = 0
+        # Open containers as (char, start offset in buffer)
+        self._stack: List[tuple] = []
+        self._in_string = False
+        self._escape = False
+        self.emitted = 0
+
+    def feed(self, chunk: str) -> List[Dict[str, str]]:
+        """Consume a chunk of model output and return newly completed questions"""
+        self._buffer += chunk
+        completed = []
+        buffer = self._buffer
+
+        for pos in range(self._pos, len(buffer)):
+            char = buffer[pos]
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                continue
+
+            if char == '"':
+                # Strings only count once we are inside a JSON value
+                if self._stack:
+                    self._in_string = True
+            elif char in "[{":
+                self._stack.append((char, pos))
+            elif char in "]}" and self._stack:
+                opener, start = self._stack.pop()
+                if opener == "{" and self._stack and self._stack[-1][0] == "[":
+                    question = self._decode(buffer[start:pos + 1])
+                    if question is not None:
+                        completed.append(question)
+
+        self._pos = len(buffer)
+        self.emitted += len(completed)
+        return completed
+
+    @staticmethod
+    def _decode(text: str):
+        try:
+            value = json.loads(text)
+        except json.JSONDecodeError:
+            return None
+        if isinstance(value, dict) and "question" in value:
+            return value
+        return None
+
+
+class ParseResult(NamedTuple):
+    """Outcome of parsing a complete model response"""
+
+    questions: List[Dict[str, str]]
+    # True when the response was not valid JSON and questions were salvaged
+    recovered: bool
+
+
+def strip_code_fences(text: str) -> str:
+    """Return the content of a markdown code block wrapping the text, or the text unchanged"""
+    text = text.strip()
+    match = _FENCE_RE.match(text)
+    return match.group(1).strip() if match else text
+
+
+def _questions_from_value(value) -> List[Dict[str, str]]:
+    """Pull the question list out of the shapes the model has been seen to return"""
+    if isinstance(value, dict):
+        if "questions" in value:
+            value = value["questions"]
+        elif "questions_answers" in value:
+            value = value["questions_answers"]
+        else:
+            value = list(value.values())[0] if value else []
+    if not isinstance(value, list):
+        return []
+    return [item for item in value if isinstance(item, dict) and "question" in item]
+
+
+def parse_questions(text: str) -> ParseResult:
+    """
+    Parse a complete model response into question/answer dicts.
+
+    Valid JSON (optionally wrapped in a markdown fence) is decoded directly.
+    Otherwise - typically output cut off at max_output_tokens - every question
+    object that was fully written is salvaged instead of discarding the response.
+    """
+    body = strip_code_fences(text)
+    try:
+        return ParseResult(_questions_from_value(json.loads(body)), recovered=False)
+    except json.JSONDecodeError:
+        pass
+
+    parser = QuestionStreamParser()
+    return ParseResult(parser.feed(body), recovered=True)
@@ -0,0 +1,196 @@
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, OrderedDict
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+from app.config import get_settings
+
+settings = get_settings()
+
+# Stacks are kept from the outermost frame in these directories down to the leaf
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROFILED_DIRS = (os.path.join(APP_DIR, "api"), os.path.join(APP_DIR, "services"))
+# Distinct stacks kept per profile; further new stacks are counted as dropped
+MAX_STACKS_PER_PROFILE = 5000
+
+_store: Optional["ProfileStore"] = None
+_sampler: Optional["StackSampler"] = None
+
+
+class RequestProfile:
+    """Sampled call stacks of one request"""
+
+    def __init__(self, method: str, path: str, trigger: str, interval: float):
+        self.id = uuid.uuid4().hex[:16]
+        self.method = method
+        self.path = path
+        self.trigger = trigger
+        self.interval = interval
+        self.started_at = datetime.now(timezone.utc)
+        self.duration: Optional[float] = None
+        self.status_code: Optional[int] = None
+        self.samples = 0
+        self.dropped = 0
+        # "outer;...;leaf" -> sample count
+        self.stacks: Counter = Counter()
+        self._lock = threading.Lock()
+
+    def add(self, stack: str) -> None:
+        with self._lock:
+            if stack in self.stacks or len(self.stacks) < MAX_STACKS_PER_PROFILE:
+                self.stacks[stack] += 1
+                self.samples += 1
+            else:
+                self.dropped += 1
+
+    def folded(self) -> str:
+        """Collapsed-stack text, readable by flamegraph.pl and speedscope"""
+        with self._lock:
+            return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def top_functions(self, limit: int = 25) -> List[Dict]:
+        """Functions by samples spent in them (self) and under them (total)"""
+        own: Counter = Counter()
+        total: Counter = Counter()
+        with self._lock:
+            for stack, count in self.stacks.items():
+                frames = stack.split(";")
+                own[frames[-1]] += count
+                for frame in set(frames):
+                    total[frame] += count
+        return [
+            {
+                "function": frame,
+                "self_samples": own[frame],
+                "total_samples": samples,
+                "total_ms": round(samples * self.interval * 1000, 1),
+            }
+            for frame, samples in total.most_common(limit)
+        ]
+
+    def summary(self) -> Dict:
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "trigger": self.trigger,
+            "started_at": self.started_at.isoformat(),
+            "duration_ms": round(self.duration * 1000, 1) if self.duration is not None else None,
+            "status_code": self.status_code,
+            "samples": self.samples,
+            "dropped_samples": self.dropped,
+            "interval_ms": self.interval * 1000,
+        }
+
+
+class ProfileStore:
+    """Finished profiles by id, evicting the oldest beyond `max_profiles`"""
+
+    def __init__(self, max_profiles: int):
+        self.max_profiles = max_profiles
+        self._profiles: "OrderedDict[str, RequestProfile]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, profile: RequestProfile) -> None:
+        with self._lock:
+            self._profiles[profile.id] = profile
+            while len(self._profiles) > self.max_profiles:
+                self._profiles.popitem(last=False)
+
+    def get(self, profile_id: str) -> Optional[RequestProfile]:
+        with self._lock:
+            return self._profiles.get(profile_id)
+
+    def list(self) -> List[RequestProfile]:
+        """Newest first"""
+        with self._lock:
+            return list(reversed(self._profiles.values()))
+
+
+def _frame_name(code) -> str:
+    filename = code.co_filename
+    if filename.startswith(APP_DIR):
+        filename = "app" + filename[len(APP_DIR):]
+    else:
+        # Parent directory too, so e.g. re/__init__.py is not just __init__.py
+        filename = os.path.join(*filename.split(os.sep)[-2:])
+    return f"{code.co_name} ({filename}:{code.co_firstlineno})"
+
+
+def _app_stack(frame) -> Optional[str]:
+    """Folded stack from the outermost app/api or app/services frame to the leaf, if any"""
+    frames = []
+    outermost_app = None
+    while frame is not None:
+        frames.append(frame.f_code)
+        if frame.f_code.co_filename.startswith(PROFILED_DIRS):
+            outermost_app = len(frames)
+        frame = frame.f_back
+    if outermost_app is None:
+        return None
+    return ";".join(_frame_name(code) for code in reversed(frames[:outermost_app]))
+
+
+class StackSampler:
+    """
+    Statistical profiler: while at least one profile is active, a background
+    thread snapshots every thread's stack each `interval` seconds and adds
+    the stacks that run app code to all active profiles.
+
+    Sampling all threads is what catches extraction and compaction, which
+    run in worker threads rather than in the request's own task; the cost is
+    that requests overlapping a profiled one contribute samples too.
+    Extraction in a process pool (EXTRACTION_EXECUTOR=process) is not visible.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._active: Dict[str, RequestProfile] = {}
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self, profile: RequestProfile) -> None:
+        with self._lock:
+            self._active[profile.id] = profile
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+                self._thread.start()
+
+    def stop(self, profile: RequestProfile) -> None:
+        with self._lock:
+            self._active.pop(profile.id, None)
+
+    def _run(self) -> None:
+        own_id = threading.get_ident()
+        while True:
+            with self._lock:
+                profiles = list(self._active.values())
+                if not profiles:
+                    self._thread = None
+                    return
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = _app_stack(frame)
+                if stack is not None:
+                    for profile in profiles:
+                        profile.add(stack)
+            time.sleep(self.interval)
+
+
+def get_profile_store() -> ProfileStore:
+    global _store
+    if _store is None:
+        _store = ProfileStore(settings.profiling_max_profiles)
+    return _store
+
+
+def get_stack_sampler() -> StackSampler:
+    global _sampler
+    if _sampler is None:
+        _sampler = StackSampler(settings.profiling_interval_ms / 1000)
+    return _sampler
@@ -0,0 +1,355 @@
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from abc import ABC, abstractmethod
+from datetime import datetime, timezone
+from typing import AsyncIterator, Dict, List, NamedTuple, Optional, Tuple, Type
+
+from app.config import get_settings
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+
+def load_genai():
+    """
+    Import google.generativeai on first use: it is by far the slowest import in
+    the app, and most workers do not need it until the first generation request.
+    """
+    module = globals().get("genai")
+    if module is None:
+        import google.generativeai as module
+
+        globals()["genai"] = module
+    return module
+
+
+def _quota_error():
+    """Gemini's quota (429) exception type, imported with the client library"""
+    from google.api_core.exceptions import ResourceExhausted
+
+    return ResourceExhausted
+
+
+def _count(value) -> Optional[int]:
+    return value if isinstance(value, int) else None
+
+
+class LLMUsage(NamedTuple):
+    """Token counts of one response; None where the provider did not report them"""
+
+    prompt_tokens: Optional[int]
+    output_tokens: Optional[int]
+    total_tokens: Optional[int]
+
+    @classmethod
+    def from_gemini(cls, usage_metadata) -> Optional["LLMUsage"]:
+        if usage_metadata is None:
+            return None
+        return cls(
+            _count(getattr(usage_metadata, "prompt_token_count", None)),
+            _count(getattr(usage_metadata, "candidates_token_count", None)),
+            _count(getattr(usage_metadata, "total_token_count", None)),
+        )
+
+
+class LLMResponse(NamedTuple):
+    text: str
+    usage: Optional[LLMUsage]
+
+
+class LLMStream:
+    """
+    Text chunks of a streamed response.
+    `usage` is filled in once the stream has been consumed.
+    """
+
+    def __init__(self, chunks: AsyncIterator[str]):
+        self._chunks = chunks
+        self.usage: Optional[LLMUsage] = None
+
+    async def __aiter__(self):
+        async for chunk in self._chunks:
+            yield chunk
+
+
+class LLMProvider(ABC):
+    """
+    A text-generation backend for LLMService.
+    `params` are the provider-neutral generation parameters from
+    LLMService._generation_params(); the provider maps them to its API.
+    """
+
+    name = "base"
+    model_name = ""
+    # Exception types meaning "over quota, retry later"; LLMService backs off on these
+    quota_errors: Tuple[Type[BaseException], ...] = ()
+
+    @abstractmethod
+    def generate(self, prompt: str, params: Dict) -> LLMResponse:
+        """One complete response to `prompt`"""
+
+    @abstractmethod
+    async def agenerate(self, prompt: str, params: Dict) -> LLMResponse:
+        """Async variant of generate"""
+
+    @abstractmethod
+    async def astream(self, prompt: str, params: Dict) -> LLMStream:
+        """The response to `prompt` as a stream of text chunks"""
+
+    @abstractmethod
+    def count_tokens(self, text: str) -> int:
+        """Tokens `text` takes up in a prompt"""
+
+
+class GeminiStream(LLMStream):
+    def __init__(self, response):
+        super().__init__(response)
+        self._response = response
+
+    async def __aiter__(self):
+        async for chunk in self._response:
+            yield chunk.text
+        self.usage = LLMUsage.from_gemini(getattr(self._response, "usage_metadata", None))
+
+
+class GeminiProvider(LLMProvider):
+    """Google Gemini through google.generativeai"""
+
+    name = "gemini"
+
+    def __init__(self, api_key: str, model_name: str):
+        genai = load_genai()
+        genai.configure(api_key=api_key)
+        self.model_name = model_name
+        self.model = genai.GenerativeModel(model_name)
+
+    @property
+    def quota_errors(self):
+        return (_quota_error(),)
+
+    @staticmethod
+    def _config(params: Dict):
+        return load_genai().types.GenerationConfig(**params)
+
+    @staticmethod
+    def _response(response) -> LLMResponse:
+        return LLMResponse(response.text, LLMUsage.from_gemini(getattr(response, "usage_metadata", None)))
+
+    def generate(self, prompt: str, params: Dict) -> LLMResponse:
+        return self._response(self.model.generate_content(prompt, generation_config=self._config(params)))
+
+    async def agenerate(self, prompt: str, params: Dict) -> LLMResponse:
+        return self._response(
+            await self.model.generate_content_async(prompt, generation_config=self._config(params))
+        )
+
+    async def astream(self, prompt: str, params: Dict) -> LLMStream:
+        response = await self.model.generate_content_async(
+            prompt, generation_config=self._config(params), stream=True
+        )
+        return GeminiStream(response)
+
+    def count_tokens(self, text: str) -> int:
+        return self.model.count_tokens(text).total_tokens
+
+
+class CassetteNotFoundError(LookupError):
+    """Replay mode got a request that was never recorded"""
+
+
+class CassetteStore:
+    """
+    Recorded responses as one JSON file per request, named by a hash of the
+    model, generation parameters and prompt. Prompts themselves are not
+    stored, so cassettes of real documents do not carry their text.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    @staticmethod
+    def key(kind: str, model_name: str, payload: str, params: Optional[Dict] = None) -> str:
+        canonical = json.dumps(
+            {"kind": kind, "model": model_name, "params": params, "payload": payload},
+            sort_keys=True,
+            separators=(",", ":"),
+        )
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}.json")
+
+    def load(self, key: str) -> Optional[Dict]:
+        try:
+            with open(self.path(key), encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def save(self, key: str, record: Dict) -> None:
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write then rename, so concurrent readers never see a partial file
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(record, f, indent=1)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+
+def _usage_record(usage: Optional[LLMUsage]) -> Optional[Dict]:
+    return usage._asdict() if usage is not None else None
+
+
+def _usage_from_record(record: Optional[Dict]) -> Optional[LLMUsage]:
+    return LLMUsage(**record) if record is not None else None
+
+
+class ReplayProvider(LLMProvider):
+    """
+    Serves recorded responses with no network and no delay; a request that
+    was never recorded raises CassetteNotFoundError.
+    A response recorded without streaming replays as a single-chunk stream,
+    and a recorded stream replays its chunks.
+    """
+
+    name = "replay"
+
+    def __init__(self, store: CassetteStore, model_name: str):
+        self.store = store
+        self.model_name = model_name
+
+    def _load(self, kind: str, payload: str, params: Optional[Dict] = None) -> Dict:
+        key = self.store.key(kind, self.model_name, payload, params)
+        record = self.store.load(key)
+        if record is None:
+            raise CassetteNotFoundError(f"No recorded {kind} response for cassette {key}")
+        return record
+
+    def generate(self, prompt: str, params: Dict) -> LLMResponse:
+        record = self._load("generate", prompt, params)
+        return LLMResponse(record["text"], _usage_from_record(record["usage"]))
+
+    async def agenerate(self, prompt: str, params: Dict) -> LLMResponse:
+        return self.generate(prompt, params)
+
+    async def astream(self, prompt: str, params: Dict) -> LLMStream:
+        record = self._load("generate", prompt, params)
+
+        async def chunks():
+            for chunk in record.get("chunks") or [record["text"]]:
+                yield chunk
+
+        stream = LLMStream(chunks())
+        stream.usage = _usage_from_record(record["usage"])
+        return stream
+
+    def count_tokens(self, text: str) -> int:
+        return self._load("count_tokens", text)["tokens"]
+
+
+class RecordingStream(LLMStream):
+    """Passes chunks through and records the stream once it has been fully consumed"""
+
+    def __init__(self, inner: LLMStream, save):
+        super().__init__(inner)
+        self._inner = inner
+        self._save = save
+
+    async def __aiter__(self):
+        chunks: List[str] = []
+        async for chunk in self._inner:
+            chunks.append(chunk)
+            yield chunk
+        self.usage = self._inner.usage
+        self._save(chunks, self.usage)
+
+
+class RecordingProvider(LLMProvider):
+    """
+    Serves recorded responses where they exist, and calls `inner` for (and
+    records) everything else, so re-running a workload fills in only the gaps.
+    Failed calls are not recorded.
+    """
+
+    name = "record"
+
+    def __init__(self, inner: LLMProvider, store: CassetteStore):
+        self.inner = inner
+        self.store = store
+        self.model_name = inner.model_name
+        self.replay = ReplayProvider(store, inner.model_name)
+
+    @property
+    def quota_errors(self):
+        return self.inner.quota_errors
+
+    def _save(self, kind: str, payload: str, params: Optional[Dict], record: Dict) -> None:
+        key = self.store.key(kind, self.model_name, payload, params)
+        record = {
+            "kind": kind,
+            "model": self.model_name,
+            "recorded_at": datetime.now(timezone.utc).isoformat(),
+            **record,
+        }
+        try:
+            self.store.save(key, record)
+        except OSError as e:
+            # The live response is still good; only the recording is lost
+            logger.warning("Error writing cassette %s: %s", key, e)
+
+    def _save_response(self, prompt: str, params: Dict, response: LLMResponse) -> LLMResponse:
+        self._save("generate", prompt, params, {"text": response.text, "usage": _usage_record(response.usage)})
+        return response
+
+    def generate(self, prompt: str, params: Dict) -> LLMResponse:
+        try:
+            return self.replay.generate(prompt, params)
+        except CassetteNotFoundError:
+            return self._save_response(prompt, params, self.inner.generate(prompt, params))
+
+    async def agenerate(self, prompt: str, params: Dict) -> LLMResponse:
+        try:
+            return self.replay.generate(prompt, params)
+        except CassetteNotFoundError:
+            return self._save_response(prompt, params, await self.inner.agenerate(prompt, params))
+
+    async def astream(self, prompt: str, params: Dict) -> LLMStream:
+        try:
+            return await self.replay.astream(prompt, params)
+        except CassetteNotFoundError:
+            pass
+
+        def save(chunks: List[str], usage: Optional[LLMUsage]) -> None:
+            self._save("generate", prompt, params, {
+                "text": "".join(chunks), "chunks": chunks, "usage": _usage_record(usage),
+            })
+
+        return RecordingStream(await self.inner.astream(prompt, params), save)
+
+    def count_tokens(self, text: str) -> int:
+        try:
+            return self.replay.count_tokens(text)
+        except CassetteNotFoundError:
+            tokens = self.inner.count_tokens(text)
+            self._save("count_tokens", text, None, {"tokens": tokens})
+            return tokens
+
+
+def create_provider(name: Optional[str] = None) -> LLMProvider:
+    """The provider selected by LLM_PROVIDER (or `name`)"""
+    name = name or settings.llm_provider
+    if name == "replay":
+        return ReplayProvider(CassetteStore(settings.llm_cassette_dir), settings.gemini_model)
+    gemini = GeminiProvider(settings.gemini_api_key, settings.gemini_model)
+    if name == "record":
+        return RecordingProvider(gemini, CassetteStore(settings.llm_cassette_dir))
+    if name != "gemini":
+        raise ValueError(f"Unknown LLM provider: {name}")
+    return gemini
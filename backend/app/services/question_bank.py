@@ -0,0 +1,174 @@
+import hashlib
+import re
+import threading
+import zlib
+from typing import Dict, List, NamedTuple, Optional
+
+import numpy as np
+
+from app.config import get_settings
+from app.metrics import QUESTION_BANK_LOOKUPS
+
+settings = get_settings()
+
+# Documents are compared as sets of overlapping word 3-grams
+SHINGLE_WORDS = 3
+# MinHash signature length; the Jaccard estimate's standard error is ~1/sqrt(NUM_PERM)
+NUM_PERM = 128
+# Shingles hashed per block when computing a signature; bounds the intermediate
+# num_perm x block array to 4 MB however long the document is
+SIGNATURE_BLOCK = 4096
+
+_bank: Optional["QuestionBank"] = None
+
+
+def shingles(text: str) -> List[str]:
+    words = re.findall(r"\w+", text.lower())
+    if len(words) <= SHINGLE_WORDS:
+        return [" ".join(words)]
+    return list({" ".join(words[i:i + SHINGLE_WORDS]) for i in range(len(words) - SHINGLE_WORDS + 1)})
+
+
+class MinHasher:
+    """
+    MinHash signatures: the fraction of equal positions in two signatures
+    estimates the Jaccard similarity of the documents' shingle sets.
+    Seeded, so signatures are comparable across processes.
+    """
+
+    def __init__(self, num_perm: int = NUM_PERM, seed: int = 1):
+        rng = np.random.default_rng(seed)
+        # Multiply-shift hashing of 32-bit shingle hashes: h(x) = ((a * x + b) mod 2**64) >> 32,
+        # with the mod 2**64 done by uint64 wraparound
+        self.a = rng.integers(0, np.iinfo(np.uint64).max, num_perm, dtype=np.uint64, endpoint=True)
+        self.b = rng.integers(0, np.iinfo(np.uint64).max, num_perm, dtype=np.uint64, endpoint=True)
+
+    def signature(self, text: str) -> np.ndarray:
+        hashes = np.fromiter(
+            (zlib.crc32(shingle.encode("utf-8")) for shingle in shingles(text)), dtype=np.uint64
+        )
+        signature = np.full(len(self.a), np.iinfo(np.uint64).max, dtype=np.uint64)
+        for start in range(0, len(hashes), SIGNATURE_BLOCK):
+            values = (np.outer(self.a, hashes[start:start + SIGNATURE_BLOCK]) + self.b[:, None]) >> np.uint64(32)
+            np.minimum(signature, values.min(axis=1), out=signature)
+        return signature.astype(np.uint32)
+
+
+class BankKey(NamedTuple):
+    resume: np.ndarray
+    job_description: np.ndarray
+    # Additional context must match exactly: it changes what is asked
+    context: int
+
+
+class BankMatch(NamedTuple):
+    questions: List[Dict[str, str]]
+    similarity: float
+
+
+def _context_hash(additional_context: str) -> int:
+    digest = hashlib.sha256(" ".join(additional_context.split()).encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "little")
+
+
+class QuestionBank:
+    """
+    Generated question sets indexed by MinHash signatures of the resume and
+    job description they were generated for, so a near-duplicate upload (the
+    same role reposted with small edits) can reuse them without an LLM call.
+
+    A pair matches when both the resume and the job description similarities
+    reach `threshold`; the best match wins. Signatures live in preallocated
+    NumPy arrays (~1 KB per entry) and lookups compare against every entry at
+    once. At `max_entries` the least recently used entry is replaced, so
+    memory stays bounded. Thread-safe.
+    """
+
+    def __init__(self, max_entries: int, threshold: float, num_perm: int = NUM_PERM):
+        self.max_entries = max_entries
+        self.threshold = threshold
+        self.hasher = MinHasher(num_perm)
+        self._resume = np.zeros((max_entries, num_perm), dtype=np.uint32)
+        self._job = np.zeros((max_entries, num_perm), dtype=np.uint32)
+        self._context = np.zeros(max_entries, dtype=np.uint64)
+        self._last_used = np.zeros(max_entries, dtype=np.int64)
+        self._questions: List[Optional[List[Dict[str, str]]]] = [None] * max_entries
+        self._size = 0
+        self._clock = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def key(self, resume_text: str, job_description_text: str, additional_context: str = "") -> BankKey:
+        """
+        Signatures of an upload, from the documents as prepared for the prompt
+        (LLMService.prepare_inputs), so their size is bounded. CPU-bound, so
+        call it off the event loop.
+        """
+        return BankKey(
+            self.hasher.signature(resume_text),
+            self.hasher.signature(job_description_text),
+            _context_hash(additional_context),
+        )
+
+    def _tick(self) -> int:
+        self._clock += 1
+        return self._clock
+
+    def lookup(self, key: BankKey) -> Optional[BankMatch]:
+        with self._lock:
+            n = self._size
+            if n:
+                similarity = np.minimum(
+                    (self._resume[:n] == key.resume).mean(axis=1),
+                    (self._job[:n] == key.job_description).mean(axis=1),
+                )
+                similarity[self._context[:n] != np.uint64(key.context)] = -1.0
+                best = int(similarity.argmax())
+                if similarity[best] >= self.threshold:
+                    self._last_used[best] = self._tick()
+                    self.hits += 1
+                    QUESTION_BANK_LOOKUPS.inc(outcome="hit")
+                    return BankMatch(
+                        [dict(question) for question in self._questions[best]], float(similarity[best])
+                    )
+            self.misses += 1
+            QUESTION_BANK_LOOKUPS.inc(outcome="miss")
+            return None
+
+    def add(self, key: BankKey, questions: List[Dict[str, str]]) -> None:
+        if not questions:
+            return
+        with self._lock:
+            if self._size < self.max_entries:
+                slot = self._size
+                self._size += 1
+            else:
+                slot = int(self._last_used.argmin())
+                self.evictions += 1
+            self._resume[slot] = key.resume
+            self._job[slot] = key.job_description
+            self._context[slot] = np.uint64(key.context)
+            self._questions[slot] = [dict(question) for question in questions]
+            self._last_used[slot] = self._tick()
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": self._size,
+                "max_entries": self.max_entries,
+                "threshold": self.threshold,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+            }
+
+
+def get_question_bank() -> QuestionBank:
+    global _bank
+    if _bank is None:
+        _bank = QuestionBank(settings.question_bank_max_entries, settings.question_bank_threshold)
+    return _bank
@@ -0,0 +1,140 @@
+import asyncio
+import threading
+import time
+import weakref
+from contextlib import asynccontextmanager, contextmanager
+from typing import Optional
+
+
+class TokenBucket:
+    """
+    Token bucket refilled continuously at `rate_per_minute`.
+
+    Callers reserve tokens up front and are told how long to wait; the balance
+    may go negative, so concurrent callers queue in arrival order instead of
+    being rejected.
+    """
+
+    def __init__(self, rate_per_minute: float, capacity: Optional[float] = None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity or rate_per_minute
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self, amount: float = 1.0) -> float:
+        """Reserve `amount` tokens and return the number of seconds to wait before using them"""
+        amount = min(amount, self.capacity)
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens -= amount
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    def adjust(self, delta: float) -> None:
+        """Charge (positive) or refund (negative) tokens once the real cost is known"""
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens = min(self.capacity, self._tokens - delta)
+
+
+class LLMRateLimiter:
+    """
+    Outbound limiter for LLM calls: a concurrency cap plus optional
+    requests-per-minute and tokens-per-minute buckets. Callers wait their turn.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int,
+        requests_per_minute: int = 0,
+        tokens_per_minute: int = 0,
+    ):
+        self.max_concurrency = max_concurrency
+        self.requests = TokenBucket(requests_per_minute) if requests_per_minute > 0 else None
+        self.tokens = TokenBucket(tokens_per_minute) if tokens_per_minute > 0 else None
+        self._sync_semaphore = threading.BoundedSemaphore(max_concurrency)
+        # asyncio primitives belong to one event loop, so keep one semaphore per loop
+        self._async_semaphores: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.waiting = 0
+
+    def _async_semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            semaphore = self._async_semaphores.get(loop)
+            if semaphore is None:
+                semaphore = asyncio.Semaphore(self.max_concurrency)
+                self._async_semaphores[loop] = semaphore
+            return semaphore
+
+    def _reserve(self, estimated_tokens: int) -> float:
+        delay = 0.0
+        if self.requests is not None:
+            delay = max(delay, self.requests.reserve(1))
+        if self.tokens is not None:
+            delay = max(delay, self.tokens.reserve(estimated_tokens))
+        return delay
+
+    def _track(self, waiting: int = 0, in_flight: int = 0) -> None:
+        with self._lock:
+            self.waiting += waiting
+            self.in_flight += in_flight
+
+    def record_usage(self, estimated_tokens: int, actual_tokens: int) -> None:
+        """Correct the tokens-per-minute bucket with the usage reported by the API"""
+        if self.tokens is not None and actual_tokens:
+            self.tokens.adjust(actual_tokens - estimated_tokens)
+
+    @asynccontextmanager
+    async def limit(self, estimated_tokens: int = 0):
+        """Wait for a rate-limit slot and a concurrency slot, then hold the latter"""
+        self._track(waiting=1)
+        try:
+            delay = self._reserve(estimated_tokens)
+            if delay:
+                await asyncio.sleep(delay)
+            semaphore = self._async_semaphore()
+            await semaphore.acquire()
+        finally:
+            self._track(waiting=-1)
+
+        self._track(in_flight=1)
+        try:
+            yield
+        finally:
+            self._track(in_flight=-1)
+            semaphore.release()
+
+    @contextmanager
+    def limit_sync(self, estimated_tokens: int = 0):
+        """Blocking variant of limit() for callers running in threads"""
+        self._track(waiting=1)
+        try:
+            delay = self._reserve(estimated_tokens)
+            if delay:
+                time.sleep(delay)
+            self._sync_semaphore.acquire()
+        finally:
+            self._track(waiting=-1)
+
+        self._track(in_flight=1)
+        try:
+            yield
+        finally:
+            self._track(in_flight=-1)
+            self._sync_semaphore.release()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "max_concurrency": self.max_concurrency,
+                "in_flight": self.in_flight,
+                "waiting": self.waiting,
+            }
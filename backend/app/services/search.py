@@ -0,0 +1,224 @@
+import logging
+import re
+from typing import Callable, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import Select, and_, column, func, inspect, literal_column, or_, select, table, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import SCHEMA_LOCK_KEY
+from app.models import InterviewQuestion, InterviewSession
+from app.services.pagination import Page, decode_score_cursor, encode_score_cursor
+
+logger = logging.getLogger(__name__)
+
+# Text search configuration (PostgreSQL) / stemming tokenizer (SQLite)
+SEARCH_CONFIG = "english"
+SQLITE_TOKENIZER = "porter unicode61"
+
+
+class SearchTarget(NamedTuple):
+    model: type
+    columns: Tuple[str, ...]
+    # Relative column weights: PostgreSQL weight labels A-D, SQLite bm25 weights
+    pg_weights: Tuple[str, ...]
+    bm25_weights: Tuple[float, ...]
+
+    @property
+    def table(self) -> str:
+        return self.model.__tablename__
+
+    @property
+    def fts_table(self) -> str:
+        return f"{self.table}_fts"
+
+
+QUESTIONS = SearchTarget(InterviewQuestion, ("question_text",), ("A",), (1.0,))
+# A title match ranks well above a match somewhere in the job description
+SESSIONS = SearchTarget(InterviewSession, ("title", "jd_text"), ("A", "B"), (10.0, 1.0))
+SEARCH_TARGETS = (QUESTIONS, SESSIONS)
+
+
+def _pg_vector_expression(target: SearchTarget) -> str:
+    return " || ".join(
+        f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce({name}, '')), '{weight}')"
+        for name, weight in zip(target.columns, target.pg_weights)
+    )
+
+
+def _pg_schema(conn: Connection, target: SearchTarget) -> List[str]:
+    """
+    A stored generated tsvector column, recomputed by PostgreSQL whenever a row
+    is written, and a GIN index on it. The index is built CONCURRENTLY, so
+    writes go on while it builds; a build that was interrupted leaves an
+    invalid index, which is dropped and built again. Adding the column still
+    rewrites the table under an exclusive lock, so on large tables apply it
+    in a maintenance window.
+    """
+    columns = {c["name"] for c in inspect(conn).get_columns(target.table)}
+    index = f"ix_{target.table}_search"
+    valid = conn.execute(
+        text(
+            "SELECT i.indisvalid FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+            "WHERE c.relname = :name"
+        ),
+        {"name": index},
+    ).scalar()
+    statements = []
+    if "search_vector" not in columns:
+        statements.append(
+            f"ALTER TABLE {target.table} ADD COLUMN IF NOT EXISTS search_vector tsvector "
+            f"GENERATED ALWAYS AS ({_pg_vector_expression(target)}) STORED"
+        )
+    if valid is False:
+        statements.append(f"DROP INDEX CONCURRENTLY IF EXISTS {index}")
+    if not valid:
+        statements.append(
+            f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {index} ON {target.table} USING GIN (search_vector)"
+        )
+    return statements
+
+
+def _sqlite_schema(conn: Connection, target: SearchTarget) -> List[str]:
+    """
+    An external-content FTS5 table over the target's columns, kept in sync by
+    insert/update/delete triggers. The index is rebuilt from the content table
+    whenever the triggers are missing: on first setup, and after the content
+    table was dropped and recreated (which drops its triggers).
+    """
+    fts, names = target.fts_table, ", ".join(target.columns)
+    new = ", ".join(f"new.{name}" for name in target.columns)
+    old = ", ".join(f"old.{name}" for name in target.columns)
+    triggers = {
+        f"{fts}_ai": f"AFTER INSERT ON {target.table} BEGIN "
+                     f"INSERT INTO {fts}(rowid, {names}) VALUES (new.id, {new}); END",
+        f"{fts}_ad": f"AFTER DELETE ON {target.table} BEGIN "
+                     f"INSERT INTO {fts}({fts}, rowid, {names}) VALUES ('delete', old.id, {old}); END",
+        f"{fts}_au": f"AFTER UPDATE OF {names} ON {target.table} BEGIN "
+                     f"INSERT INTO {fts}({fts}, rowid, {names}) VALUES ('delete', old.id, {old}); "
+                     f"INSERT INTO {fts}(rowid, {names}) VALUES (new.id, {new}); END",
+    }
+    existing = set(conn.execute(
+        text("SELECT name FROM sqlite_master WHERE type = 'trigger' AND tbl_name = :table"),
+        {"table": target.table},
+    ).scalars())
+    if set(triggers) <= existing:
+        return []
+
+    weights = ", ".join(str(weight) for weight in target.bm25_weights)
+    statements = [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5({names}, "
+        f"content='{target.table}', content_rowid='id', tokenize='{SQLITE_TOKENIZER}')",
+        # Persistent default ranking, so ORDER BY rank uses the column weights
+        f"INSERT INTO {fts}({fts}, rank) VALUES ('rank', 'bm25({weights})')",
+    ]
+    statements += [
+        f"CREATE TRIGGER IF NOT EXISTS {name} {body}" for name, body in triggers.items()
+    ]
+    statements.append(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+    return statements
+
+
+def _apply(conn: Connection, build: Callable[[Connection, SearchTarget], List[str]]) -> List[str]:
+    applied = []
+    for target in SEARCH_TARGETS:
+        for ddl in build(conn, target):
+            conn.execute(text(ddl))
+            applied.append(ddl)
+    return applied
+
+
+def ensure_search_schema(bind: Engine) -> List[str]:
+    """
+    Create the full-text indexes that are missing; returns the DDL that was
+    applied. A migration step, run by create_tables.py after ensure_schema:
+    building an index over existing rows is too slow for application startup.
+    """
+    dialect = bind.dialect.name
+    if dialect == "postgresql":
+        # CREATE INDEX CONCURRENTLY cannot run inside a transaction block
+        with bind.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            conn.execute(text("SELECT pg_advisory_lock(:key)"), {"key": SCHEMA_LOCK_KEY})
+            try:
+                return _apply(conn, _pg_schema)
+            finally:
+                conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": SCHEMA_LOCK_KEY})
+    if dialect == "sqlite":
+        with bind.begin() as conn:
+            return _apply(conn, _sqlite_schema)
+    logger.warning("Full-text search is not supported on %s", dialect)
+    return []
+
+
+def fts5_query(query: str) -> str:
+    """
+    FTS5 query requiring every word of `query`. Words are quoted, so user input
+    can never be parsed as FTS5 syntax (NEAR, column filters, unbalanced quotes).
+    """
+    return " ".join(f'"{word}"' for word in re.findall(r"\w+", query))
+
+
+def ranked_matches(target: SearchTarget, query: str, dialect_name: str) -> Optional[Select]:
+    """
+    (id, score) of every row matching `query`, higher scores ranking first.
+    None when the query has no searchable words.
+    PostgreSQL parses `query` with websearch_to_tsquery: words are ANDed, and
+    "quoted phrases", OR and -exclusions work as on web search engines.
+    """
+    if dialect_name == "postgresql":
+        # Inlined, not bound: asyncpg has no codec for a regconfig parameter
+        config = literal_column(f"'{SEARCH_CONFIG}'::regconfig")
+        tsquery = func.websearch_to_tsquery(config, query)
+        vector = literal_column(f"{target.table}.search_vector")
+        return (
+            select(target.model.id.label("id"), func.ts_rank(vector, tsquery).label("score"))
+            .where(vector.op("@@")(tsquery))
+        )
+
+    match = fts5_query(query)
+    if not match:
+        return None
+    fts = table(target.fts_table, column("rowid"))
+    # bm25 is lower-is-better; negate it so both dialects rank descending
+    score = -literal_column(f"{target.fts_table}.rank")
+    return (
+        select(fts.c.rowid.label("id"), score.label("score"))
+        .where(literal_column(target.fts_table).op("MATCH")(match))
+    )
+
+
+def search_select(stmt: Select, target: SearchTarget, ranked: Select, limit: int, cursor: Optional[str]) -> Select:
+    """
+    Restrict `stmt` (columns of target.model, including its id) to one page of
+    `ranked` matches, best first, adding their `score`. Keyset pagination on
+    (score, id) like keyset_select; one extra row tells whether there is a
+    next page. On SQLite, bm25 scores shift slightly as documents are added,
+    so a page boundary can move while paging through a changing index.
+
+    Raises:
+        InvalidCursorError: if `cursor` is malformed
+    """
+    matches = ranked.subquery("matches")
+    model = target.model
+    stmt = stmt.add_columns(matches.c.score).join(matches, matches.c.id == model.id)
+    if cursor:
+        score, row_id = decode_score_cursor(cursor)
+        stmt = stmt.where(or_(
+            matches.c.score < score,
+            and_(matches.c.score == score, model.id < row_id),
+        ))
+    return stmt.order_by(matches.c.score.desc(), model.id.desc()).limit(limit + 1)
+
+
+async def asearch_page(
+    db: AsyncSession, stmt: Select, target: SearchTarget, query: str, limit: int, cursor: Optional[str] = None
+) -> Page:
+    """One page of rows of `stmt` matching `query`, each with a `score` column"""
+    ranked = ranked_matches(target, query, db.bind.dialect.name)
+    if ranked is None:
+        return Page([], None)
+    rows = (await db.execute(search_select(stmt, target, ranked, limit, cursor))).all()
+    if len(rows) <= limit:
+        return Page(rows, None)
+    rows = rows[:limit]
+    return Page(rows, encode_score_cursor(rows[-1].score, rows[-1].id))
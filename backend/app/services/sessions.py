@@ -0,0 +1,173 @@
+from typing import Dict, List, Optional
+
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import func
+
+from app.models import InterviewQuestion, InterviewSession, QuestionType, SessionStatus, User
+
+ANONYMOUS_EMAIL = "anonymous@mock-interview.local"
+ANONYMOUS_USERNAME = "anonymous"
+TITLE_MAX_LENGTH = InterviewSession.__table__.c.title.type.length
+
+
+def get_or_create_anonymous_user(db: Session) -> User:
+    """
+    Get the shared user that owns sessions created without authentication.
+    InterviewSession.user_id is required, and uploads are not tied to an account yet.
+    """
+    user = db.query(User).filter(User.username == ANONYMOUS_USERNAME).first()
+    if user is None:
+        user = User(
+            email=ANONYMOUS_EMAIL,
+            username=ANONYMOUS_USERNAME,
+            full_name="Anonymous",
+            hashed_password="!",  # Not a valid hash, so nobody can log in as this user
+            is_active=False,
+        )
+        db.add(user)
+        try:
+            db.commit()
+        except IntegrityError:
+            # A concurrent first upload created it between the query and the insert
+            db.rollback()
+            return db.query(User).filter(User.username == ANONYMOUS_USERNAME).one()
+        db.refresh(user)
+    return user
+
+
+def session_title(jd_text: str) -> Optional[str]:
+    """
+    Title for a session: the first non-blank line of its job description,
+    which is normally the role ("Senior Backend Engineer"). Searched with a
+    higher weight than the rest of the text (see app.services.search).
+    """
+    for line in (jd_text or "").splitlines():
+        line = " ".join(line.split())
+        if line:
+            return line[:TITLE_MAX_LENGTH]
+    return None
+
+
+def create_pending_session(
+    db: Session, user_id: int, resume_filename: str, jd_filename: str
+) -> InterviewSession:
+    """Create a session in the CREATED state; text and questions are filled in later"""
+    session = InterviewSession(
+        user_id=user_id,
+        status=SessionStatus.CREATED,
+        resume_filename=resume_filename,
+        resume_text="",
+        jd_filename=jd_filename,
+        jd_text="",
+    )
+    db.add(session)
+    db.commit()
+    db.refresh(session)
+    return session
+
+
+def _question_type(value: Optional[str]) -> Optional[QuestionType]:
+    try:
+        return QuestionType(value) if value else None
+    except ValueError:
+        return None
+
+
+def question_rows(session_id: int, questions: List[Dict[str, str]]) -> List[Dict]:
+    """InterviewQuestion insert rows for generated question/answer dicts, numbered in order"""
+    return [
+        {
+            "session_id": session_id,
+            "question_number": number,
+            "question_text": question.get("question", ""),
+            "question_type": _question_type(question.get("type")),
+            "expected_answer": question.get("answer"),
+        }
+        for number, question in enumerate(questions, start=1)
+    ]
+
+
+def bulk_insert_questions(
+    db: Session, session_id: int, questions: List[Dict[str, str]]
+) -> int:
+    """
+    Insert all questions of a session in one multi-row INSERT
+    instead of one INSERT per ORM object.
+    """
+    rows = question_rows(session_id, questions)
+    if rows:
+        db.execute(insert(InterviewQuestion), rows)
+    return len(rows)
+
+
+def save_generated_session(
+    db: Session,
+    user_id: int,
+    resume_filename: str,
+    jd_filename: str,
+    resume_text: str,
+    jd_text: str,
+    questions: List[Dict[str, str]],
+) -> int:
+    """
+    Store a finished generation as an IN_PROGRESS session with its questions,
+    in one transaction: one INSERT for the session and one for all questions.
+
+    Returns:
+        The new session id
+    """
+    session_id = db.execute(
+        insert(InterviewSession)
+        .values(
+            user_id=user_id,
+            status=SessionStatus.IN_PROGRESS,
+            resume_filename=resume_filename,
+            resume_text=resume_text,
+            jd_filename=jd_filename,
+            jd_text=jd_text,
+            title=session_title(jd_text),
+            total_questions=len(questions),
+        )
+        .returning(InterviewSession.id)
+    ).scalar_one()
+    bulk_insert_questions(db, session_id, questions)
+    db.commit()
+    return session_id
+
+
+def complete_session(
+    db: Session,
+    session_id: int,
+    resume_text: str,
+    jd_text: str,
+    questions: List[Dict[str, str]],
+) -> None:
+    """Store extracted text and generated questions, and move the session to IN_PROGRESS"""
+    count = bulk_insert_questions(db, session_id, questions)
+    db.query(InterviewSession).filter(InterviewSession.id == session_id).update(
+        {
+            InterviewSession.resume_text: resume_text,
+            InterviewSession.jd_text: jd_text,
+            InterviewSession.title: session_title(jd_text),
+            InterviewSession.total_questions: count,
+            InterviewSession.status: SessionStatus.IN_PROGRESS,
+            InterviewSession.updated_at: func.now(),
+        },
+        synchronize_session=False,
+    )
+    db.commit()
+
+
+def fail_session(db: Session, session_id: int, error_message: str) -> None:
+    """Mark a session as FAILED with the reason"""
+    db.query(InterviewSession).filter(InterviewSession.id == session_id).update(
+        {
+            InterviewSession.status: SessionStatus.FAILED,
+            InterviewSession.error_message: error_message,
+            InterviewSession.updated_at: func.now(),
+        },
+        synchronize_session=False,
+    )
+    db.commit()
@@ -0,0 +1,72 @@
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+
+class _Call:
+    """One in-flight execution shared by every caller with the same key"""
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+        self.abandoned = False
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent async calls that share a key into one execution.
+
+    Semantics:
+    - The first caller starts `fn()` as a task; callers arriving while it runs
+      wait on the same task and receive the same result.
+    - If the task raises, every waiter gets that exception. The key is released
+      as soon as the task finishes, so the next caller starts a fresh attempt
+      (errors are never cached).
+    - Cancelling one caller only cancels that caller. The shared task keeps
+      running for the others, and is cancelled only when every waiter is gone.
+    """
+
+    def __init__(self):
+        self._calls: Dict[Tuple[asyncio.AbstractEventLoop, Hashable], _Call] = {}
+        self._lock = threading.Lock()
+        self.executions = 0
+        self.coalesced = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        loop = asyncio.get_running_loop()
+        # Tasks belong to one event loop, so only coalesce within a loop
+        slot = (loop, key)
+
+        with self._lock:
+            call = self._calls.get(slot)
+            if call is None or call.abandoned:
+                call = _Call(loop.create_task(fn()))
+                self._calls[slot] = call
+                call.task.add_done_callback(lambda _, call=call: self._release(slot, call))
+                self.executions += 1
+            else:
+                self.coalesced += 1
+            call.waiters += 1
+
+        try:
+            # shield() keeps a cancelled caller from cancelling the shared task
+            return await asyncio.shield(call.task)
+        finally:
+            with self._lock:
+                call.waiters -= 1
+                if call.waiters == 0 and not call.task.done():
+                    call.abandoned = True
+                    call.task.cancel()
+
+    def _release(self, slot, call: _Call) -> None:
+        with self._lock:
+            if self._calls.get(slot) is call:
+                del self._calls[slot]
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "executions": self.executions,
+                "coalesced": self.coalesced,
+                "in_flight": len(self._calls),
+            }
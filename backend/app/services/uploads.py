@@ -0,0 +1,209 @@
+import hashlib
+import io
+import os
+import posixpath
+import tempfile
+import zipfile
+import zlib
+from typing import BinaryIO, List, NamedTuple, Optional
+
+# Read uploads in chunks of this size so no step holds a whole file in memory
+CHUNK_SIZE = 64 * 1024
+
+
+class FileTooLargeError(ValueError):
+    """Raised while reading an upload as soon as it exceeds the size limit"""
+
+    def __init__(self, filename: str, max_bytes: int):
+        self.filename = filename
+        self.max_bytes = max_bytes
+        super().__init__(
+            f"File {filename} exceeds the maximum size of {max_bytes // (1024 * 1024)} MB"
+        )
+
+
+class SpooledDocument:
+    """
+    An uploaded document held in memory when small, or in a named temporary
+    file once it grows past the spool threshold.
+
+    Extractors open it as a file object instead of receiving a copied bytes
+    object, and it pickles cheaply (a path, or a small buffer), so it can be
+    sent to extraction worker processes. The SHA-256 is computed while reading.
+    """
+
+    def __init__(self, filename: str, size: int, sha256: str, data: Optional[bytes] = None, path: Optional[str] = None):
+        self.filename = filename
+        self.size = size
+        self.sha256 = sha256
+        self._data = data
+        self.path = path
+
+    @property
+    def on_disk(self) -> bool:
+        return self.path is not None
+
+    def open(self) -> BinaryIO:
+        """Open a new independent, seekable binary file object over the content"""
+        if self.path is not None:
+            return open(self.path, "rb")
+        return io.BytesIO(self._data)
+
+    def read_bytes(self) -> bytes:
+        """Read the whole content; only for consumers that cannot take a file object"""
+        if self._data is not None:
+            return self._data
+        with self.open() as f:
+            return f.read()
+
+    def close(self) -> None:
+        """Delete the spool file, if any"""
+        if self.path is not None:
+            try:
+                os.unlink(self.path)
+            except FileNotFoundError:
+                pass
+            self.path = None
+
+    def __enter__(self) -> "SpooledDocument":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+class _Spool:
+    """
+    Incremental writer behind spool_upload and unpack_zip: enforces the size
+    limit, hashes the content, and moves it from memory to a temporary file
+    once it grows past `memory_threshold`.
+    """
+
+    def __init__(self, filename: str, max_bytes: int, memory_threshold: int):
+        self.filename = filename
+        self.max_bytes = max_bytes
+        self.memory_threshold = memory_threshold
+        self.digest = hashlib.sha256()
+        self.buffer = bytearray()
+        self.file = None
+        self.size = 0
+
+    def write(self, chunk: bytes) -> None:
+        self.size += len(chunk)
+        if self.size > self.max_bytes:
+            raise FileTooLargeError(self.filename, self.max_bytes)
+        self.digest.update(chunk)
+
+        if self.file is None and len(self.buffer) + len(chunk) > self.memory_threshold:
+            self.file = tempfile.NamedTemporaryFile(prefix="upload-", delete=False)
+            self.file.write(self.buffer)
+            self.buffer = bytearray()
+        if self.file is not None:
+            self.file.write(chunk)
+        else:
+            self.buffer += chunk
+
+    def finish(self) -> SpooledDocument:
+        if self.file is not None:
+            self.file.close()
+            return SpooledDocument(self.filename, self.size, self.digest.hexdigest(), path=self.file.name)
+        return SpooledDocument(self.filename, self.size, self.digest.hexdigest(), data=bytes(self.buffer))
+
+    def discard(self) -> None:
+        if self.file is not None:
+            self.file.close()
+            os.unlink(self.file.name)
+            self.file = None
+
+
+async def spool_upload(upload, max_bytes: int, memory_threshold: int) -> SpooledDocument:
+    """
+    Read an UploadFile chunk by chunk, enforcing `max_bytes` as it goes and
+    spooling to a temporary file once `memory_threshold` is exceeded.
+
+    Raises:
+        FileTooLargeError: as soon as the running size crosses `max_bytes`
+    """
+    spool = _Spool(upload.filename, max_bytes, memory_threshold)
+    try:
+        while True:
+            chunk = await upload.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            spool.write(chunk)
+    except BaseException:
+        spool.discard()
+        raise
+    return spool.finish()
+
+
+class InvalidArchiveError(ValueError):
+    """Raised when a zip upload cannot be read, or holds too many documents"""
+
+
+class BatchDocument(NamedTuple):
+    """One document of a multi-document upload: an uploaded file or a zip member"""
+
+    filename: str
+    # None when the document could not be read; `error` says why
+    document: Optional[SpooledDocument]
+    error: Optional[str] = None
+
+
+def _skipped_member(info: zipfile.ZipInfo) -> bool:
+    """Directories, and hidden files such as the __MACOSX/ metadata macOS adds to archives"""
+    return info.is_dir() or any(part.startswith((".", "__MACOSX")) for part in info.filename.split("/"))
+
+
+def unpack_zip(
+    archive: SpooledDocument, max_member_bytes: int, memory_threshold: int, max_members: int
+) -> List[BatchDocument]:
+    """
+    Spool every document in a zip upload, in archive order. Sizes are enforced
+    while decompressing, not taken from the archive's headers, so a zip bomb
+    stops at `max_member_bytes`. A member that is too large or unreadable is
+    returned with an error instead of failing the whole archive. Blocking:
+    call it off the event loop. The caller must close() the documents.
+
+    Raises:
+        InvalidArchiveError: if the upload is not a zip, or holds more than `max_members` documents
+    """
+    members: List[BatchDocument] = []
+    try:
+        with archive.open() as f, zipfile.ZipFile(f) as zf:
+            infos = [info for info in zf.infolist() if not _skipped_member(info)]
+            if len(infos) > max_members:
+                raise InvalidArchiveError(
+                    f"Archive {archive.filename} holds {len(infos)} documents; the maximum is {max_members}"
+                )
+            for info in infos:
+                filename = posixpath.basename(info.filename)
+                spool = _Spool(filename, max_member_bytes, memory_threshold)
+                try:
+                    with zf.open(info) as member:
+                        while True:
+                            chunk = member.read(CHUNK_SIZE)
+                            if not chunk:
+                                break
+                            spool.write(chunk)
+                except FileTooLargeError as e:
+                    spool.discard()
+                    members.append(BatchDocument(filename, None, str(e)))
+                    continue
+                # Corrupt data, encryption, or an unsupported compression method
+                except (zipfile.BadZipFile, zlib.error, EOFError, RuntimeError, NotImplementedError):
+                    spool.discard()
+                    members.append(BatchDocument(filename, None, f"Could not unpack {filename} from the archive"))
+                    continue
+                except BaseException:
+                    spool.discard()
+                    raise
+                members.append(BatchDocument(filename, spool.finish()))
+    except BaseException as e:
+        for member in members:
+            if member.document is not None:
+                member.document.close()
+        if isinstance(e, zipfile.BadZipFile):
+            raise InvalidArchiveError(f"{archive.filename} is not a valid zip archive") from e
+        raise
+    return members
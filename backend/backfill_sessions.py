@@ -0,0 +1,36 @@
+"""
+Legacy data backfill script
+Copies rows of the deprecated `interviews` table into interview_sessions and
+interview_questions. Safe to interrupt and re-run: it resumes after the last
+migrated interview.
+
+Usage:
+    python backfill_sessions.py [--batch-size 500] [--max-batches N]
+"""
+import argparse
+import logging
+
+from app.database import engine, SessionLocal, ensure_schema
+from app.services.backfill import backfill_legacy_interviews
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Migrate legacy interviews into interview sessions")
+    parser.add_argument("--batch-size", type=int, default=500, help="Rows per batch and per commit")
+    parser.add_argument("--max-batches", type=int, default=None, help="Stop after this many batches")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+    ensure_schema(engine)
+
+    print("Backfilling legacy interviews...")
+    result = backfill_legacy_interviews(
+        engine, SessionLocal, batch_size=args.batch_size, max_batches=args.max_batches
+    )
+    print(f"✓ Migrated {result.sessions} interviews ({result.questions} questions) in {result.batches} batches")
+    if result.last_interview_id is not None:
+        print(f"  Last migrated interview id: {result.last_interview_id}")
+
+
+if __name__ == "__main__":
+    main()
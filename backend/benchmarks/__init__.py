@@ -0,0 +1,4 @@
+"""
+Benchmarks for the Mock Interview API.
+Run from the backend directory, e.g. python -m benchmarks.bench_pdf_extraction
+"""
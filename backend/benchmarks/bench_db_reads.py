@@ -0,0 +1,154 @@
+"""
+Sync (threadpool) vs async (AsyncSession) database reads under concurrent load.
+
+    python -m benchmarks.bench_db_reads [--requests N] [--concurrency C] [--rows N]
+
+Both routes run the same keyset-paginated session listing against a temporary
+SQLite file. Sync routes and their dependencies run in AnyIO's threadpool
+(40 tokens by default); the "busy threadpool" scenario keeps those tokens
+occupied with blocking work, as slow document parsing or LLM calls would, and
+shows the sync route queueing behind it while the async route does not.
+With an idle threadpool expect the sync route to win on SQLite: aiosqlite
+hands every call to its own worker thread.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+
+import anyio
+import httpx
+from fastapi import Depends, FastAPI
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.database import Base
+from app.models import InterviewSession, SessionStatus
+from app.services.pagination import akeyset_page, keyset_page
+from app.services.sessions import get_or_create_anonymous_user
+
+PAGE_SIZE = 50
+
+
+def build_app(path: str) -> FastAPI:
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+    SessionLocal = sessionmaker(bind=engine, autoflush=False)
+    AsyncSessionLocal = async_sessionmaker(
+        create_async_engine(f"sqlite+aiosqlite:///{path}"), expire_on_commit=False
+    )
+
+    def get_db():
+        db = SessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    async def get_async_db():
+        async with AsyncSessionLocal() as db:
+            yield db
+
+    app = FastAPI()
+
+    @app.get("/sync")
+    def sync_read(db: Session = Depends(get_db)):
+        return len(keyset_page(db, select(InterviewSession), InterviewSession, PAGE_SIZE).items)
+
+    @app.get("/async")
+    async def async_read(db: AsyncSession = Depends(get_async_db)):
+        return len((await akeyset_page(db, select(InterviewSession), InterviewSession, PAGE_SIZE)).items)
+
+    return app
+
+
+def seed(path: str, rows: int) -> None:
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    with Session(engine) as db:
+        user_id = get_or_create_anonymous_user(db).id
+        db.execute(
+            insert(InterviewSession),
+            [
+                {
+                    "user_id": user_id,
+                    "status": SessionStatus.CREATED,
+                    "resume_filename": f"resume-{i}.pdf",
+                    "resume_text": "Python developer. " * 100,
+                    "jd_filename": f"jd-{i}.txt",
+                    "jd_text": "Backend engineer wanted. " * 100,
+                }
+                for i in range(rows)
+            ],
+        )
+        db.commit()
+    engine.dispose()
+
+
+async def occupy_threadpool(stop: asyncio.Event) -> None:
+    """Keep every AnyIO threadpool token busy with half-second blocking calls until stopped"""
+    async def blocker():
+        while not stop.is_set():
+            await anyio.to_thread.run_sync(time.sleep, 0.5)
+
+    tokens = int(anyio.to_thread.current_default_thread_limiter().total_tokens)
+    await asyncio.gather(*(blocker() for _ in range(tokens)))
+
+
+async def drive(app: FastAPI, url: str, requests: int, concurrency: int, busy: bool) -> tuple:
+    """Send `requests` GETs from `concurrency` workers; returns (rps, p50 ms, p95 ms)"""
+    latencies = []
+    remaining = iter(range(requests))
+    stop = asyncio.Event()
+    background = asyncio.create_task(occupy_threadpool(stop)) if busy else None
+    if busy:
+        await asyncio.sleep(0.1)
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        async def worker():
+            for _ in remaining:
+                started = time.perf_counter()
+                response = await client.get(url)
+                response.raise_for_status()
+                latencies.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    if background:
+        stop.set()
+        await background
+
+    cuts = statistics.quantiles(latencies, n=100)
+    return requests / elapsed, cuts[49] * 1000, cuts[94] * 1000
+
+
+async def run(args) -> None:
+    path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    seed(path, args.rows)
+    app = build_app(path)
+    # Warm up both routes so connection and import costs are not measured
+    await drive(app, "/sync", 10, 1, busy=False)
+    await drive(app, "/async", 10, 1, busy=False)
+
+    print(f"rows: {args.rows}, requests: {args.requests}, concurrency: {args.concurrency}")
+    print(f"{'scenario':<16} {'route':<6} {'req/s':>8} {'p50 (ms)':>9} {'p95 (ms)':>9}")
+    for scenario, busy in (("idle threadpool", False), ("busy threadpool", True)):
+        for route in ("sync", "async"):
+            rps, p50, p95 = await drive(app, f"/{route}", args.requests, args.concurrency, busy)
+            print(f"{scenario:<16} {route:<6} {rps:>8.0f} {p50:>9.1f} {p95:>9.1f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--rows", type=int, default=1000)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""
+Serial vs page-parallel PDF extraction on synthetic 1-, 10- and 50-page PDFs.
+
+    python -m benchmarks.bench_pdf_extraction [--repeat N] [--workers N]
+
+The parallel mode only pays off with spare CPU cores; on a single-core host
+expect it to be slower because of the inter-process transfer.
+"""
+import argparse
+import os
+import statistics
+import time
+
+from app.services import extraction
+from app.services.extraction import extract_pdf_text, get_pdf_page_pool
+from benchmarks.corpus import make_pdf
+
+PAGE_COUNTS = (1, 10, 50)
+
+
+def time_call(fn, repeat: int) -> float:
+    """Median wall-clock seconds over `repeat` runs"""
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--workers", type=int, default=extraction.settings.pdf_parallel_workers)
+    args = parser.parse_args()
+
+    extraction.settings.pdf_parallel_workers = args.workers
+    # Start the pool up front so worker start-up is not billed to the first run
+    get_pdf_page_pool().submit(int).result()
+
+    print(f"CPU cores: {os.cpu_count()}, page-pool workers: {args.workers}, repeat: {args.repeat}")
+    print(f"{'pages':>5} {'serial (s)':>11} {'parallel (s)':>13} {'speedup':>8}")
+    for pages in PAGE_COUNTS:
+        pdf = make_pdf(pages)
+        assert extract_pdf_text(pdf, parallel=False) == extract_pdf_text(pdf, parallel=True)
+
+        serial = time_call(lambda: extract_pdf_text(pdf, parallel=False), args.repeat)
+        parallel = time_call(lambda: extract_pdf_text(pdf, parallel=True), args.repeat)
+        print(f"{pages:>5} {serial:>11.3f} {parallel:>13.3f} {serial / parallel:>7.2f}x")
+
+    extraction.shutdown_extraction_executor()
+
+
+if __name__ == "__main__":
+    main()
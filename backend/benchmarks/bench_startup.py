@@ -0,0 +1,90 @@
+"""
+Worker start-up time: app import time and time to the first healthy response.
+
+    python -m benchmarks.bench_startup [--repeat N] [--database-url URL] [--prewarm]
+
+Each run starts a fresh interpreter, as a cold worker boot would. The health
+check timing spawns uvicorn and polls GET /health until it answers 200. By
+default a temporary SQLite database is used, so the numbers exclude network
+round trips; pass --database-url to include the real database's schema check.
+"""
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+HEAVY_MODULES = ("google.generativeai", "pdfplumber", "docx", "PyPDF2")
+
+IMPORT_PROBE = (
+    "import sys, time; started = time.perf_counter(); import app.main; "
+    "print(time.perf_counter() - started, "
+    f"','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+)
+
+
+def measure_import(env: dict) -> tuple:
+    """Seconds to import app.main in a new interpreter, and the heavy modules it loaded"""
+    result = subprocess.run(
+        [sys.executable, "-c", IMPORT_PROBE], env=env, capture_output=True, text=True, check=True
+    )
+    seconds, _, loaded = result.stdout.splitlines()[-1].partition(" ")
+    return float(seconds), loaded
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def measure_first_healthy(env: dict, timeout: float = 60.0) -> float:
+    """Seconds from spawning uvicorn until GET /health returns 200"""
+    port = free_port()
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        env=env,
+    )
+    try:
+        while time.perf_counter() - started < timeout:
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/health", timeout=1) as response:
+                    if response.status == 200:
+                        return time.perf_counter() - started
+            except OSError:
+                if server.poll() is not None:
+                    raise RuntimeError("uvicorn exited before becoming healthy")
+                time.sleep(0.01)
+        raise TimeoutError("no healthy response")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--database-url", default="")
+    parser.add_argument("--prewarm", action="store_true", help="set PREWARM_ON_STARTUP=true")
+    args = parser.parse_args()
+
+    env = dict(os.environ, DEBUG="false", PREWARM_ON_STARTUP=str(args.prewarm).lower())
+    env["DATABASE_URL"] = args.database_url or f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'startup.db')}"
+
+    imports, loaded = zip(*(measure_import(env) for _ in range(args.repeat)))
+    healthy = [measure_first_healthy(env) for _ in range(args.repeat)]
+
+    print(f"repeat: {args.repeat}, prewarm: {args.prewarm}")
+    print(f"{'metric':<22} {'median (s)':>10} {'min (s)':>8} {'max (s)':>8}")
+    for name, samples in (("import app.main", imports), ("first healthy /health", healthy)):
+        print(f"{name:<22} {statistics.median(samples):>10.3f} {min(samples):>8.3f} {max(samples):>8.3f}")
+    print(f"heavy modules loaded at import: {loaded[0] or 'none'}")
+
+
+if __name__ == "__main__":
+    main()
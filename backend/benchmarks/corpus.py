@@ -0,0 +1,127 @@
+"""
+Synthetic document corpus for benchmarks
+"""
+import io
+import random
+from typing import Dict, List, NamedTuple
+
+WORDS = (
+    "python fastapi postgresql docker kubernetes microservices latency throughput "
+    "design review mentoring ownership scalability caching redis testing deployment "
+    "architecture observability incident api async database migration team project"
+).split()
+
+
+def make_lines(count: int, seed: int = 0, words_per_line: int = 12) -> List[str]:
+    """Deterministic pseudo-random lines of resume/JD-like vocabulary"""
+    rng = random.Random(seed)
+    return [" ".join(rng.choice(WORDS) for _ in range(words_per_line)) for _ in range(count)]
+
+
+def _escape_pdf_text(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def make_pdf(pages: int, lines_per_page: int = 50, seed: int = 0) -> bytes:
+    """
+    Build a text-layer PDF with the given number of pages.
+    Written by hand so benchmarks need no PDF-authoring dependency.
+    """
+    objects: List[bytes] = []
+
+    def add(body: bytes) -> int:
+        objects.append(body)
+        return len(objects)
+
+    catalog = add(b"")  # filled in once the page tree exists
+    page_tree = add(b"")
+    font = add(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+
+    page_ids = []
+    for page_number in range(pages):
+        lines = make_lines(lines_per_page, seed=seed * 100003 + page_number)
+        commands = [b"BT /F1 10 Tf 12 TL 40 800 Td"]
+        commands += [f"({_escape_pdf_text(line)}) '".encode("latin-1") for line in lines]
+        commands.append(f"(Page {page_number + 1} of {pages}) '".encode("latin-1"))
+        commands.append(b"ET")
+        stream = b"\n".join(commands)
+        content = add(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        page_ids.append(add(
+            b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 612 842] "
+            b"/Resources << /Font << /F1 %d 0 R >> >> /Contents %d 0 R >>"
+            % (page_tree, font, content)
+        ))
+
+    objects[catalog - 1] = b"<< /Type /Catalog /Pages %d 0 R >>" % page_tree
+    kids = b" ".join(b"%d 0 R" % page_id for page_id in page_ids)
+    objects[page_tree - 1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, pages)
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (
+        len(objects) + 1, catalog, xref,
+    )
+    return bytes(out)
+
+
+def make_docx(paragraphs: int, seed: int = 0) -> bytes:
+    """Build a Word document with the given number of paragraphs"""
+    from docx import Document
+
+    document = Document()
+    document.add_heading("Senior Backend Engineer", level=1)
+    for line in make_lines(paragraphs, seed=seed, words_per_line=30):
+        document.add_paragraph(line)
+    out = io.BytesIO()
+    document.save(out)
+    return out.getvalue()
+
+
+def make_txt(lines: int, seed: int = 0) -> bytes:
+    return "\n".join(make_lines(lines, seed=seed)).encode()
+
+
+DOCX_TYPE = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+
+
+class CorpusDocument(NamedTuple):
+    name: str
+    filename: str
+    content_type: str
+    data: bytes
+
+
+# name -> (filename, content type, builder taking a seed)
+CORPUS_SPECS = {
+    "pdf-1p": ("resume.pdf", "application/pdf", lambda seed: make_pdf(1, seed=seed)),
+    "pdf-5p": ("resume.pdf", "application/pdf", lambda seed: make_pdf(5, seed=seed)),
+    "pdf-30p": ("resume.pdf", "application/pdf", lambda seed: make_pdf(30, seed=seed)),
+    "docx-small": ("resume.docx", DOCX_TYPE, lambda seed: make_docx(20, seed=seed)),
+    "docx-large": ("resume.docx", DOCX_TYPE, lambda seed: make_docx(400, seed=seed)),
+}
+JD_SPEC = ("job.txt", "text/plain", lambda seed: make_txt(40, seed=seed))
+
+
+def build_corpus(names: List[str], variants: int = 1) -> Dict[str, List[CorpusDocument]]:
+    """
+    `variants` distinct documents per corpus entry. Distinct bytes defeat the
+    extraction cache, so every upload of a variant is really extracted.
+    """
+    corpus = {}
+    for name in names:
+        filename, content_type, build = CORPUS_SPECS[name]
+        corpus[name] = [
+            CorpusDocument(name, filename, content_type, build(seed)) for seed in range(variants)
+        ]
+    return corpus
+
+
+def build_job_descriptions(variants: int = 1) -> List[CorpusDocument]:
+    filename, content_type, build = JD_SPEC
+    return [CorpusDocument("jd", filename, content_type, build(seed)) for seed in range(variants)]
@@ -0,0 +1,139 @@
+"""
+Local stand-in for the Gemini provider, for load tests that must not spend quota.
+
+FakeProvider is plugged into a real LLMService, so everything around the model call
+(compaction, result cache, request coalescing, the rate limiter, retries and
+response parsing) runs exactly as in production.
+"""
+import asyncio
+import hashlib
+import json
+import math
+import random
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+from app.services import LLMService
+from app.services.providers import LLMProvider, LLMResponse, LLMStream, LLMUsage
+
+
+@dataclass
+class LatencyModel:
+    """
+    Response latency in seconds.
+    "fixed" always returns `median`; "uniform" spreads evenly over
+    [median - spread, median + spread]; "lognormal" has the given median and
+    shape `sigma` (sigma=0.5 puts p95 at ~2.3x the median), which is the
+    long-tailed shape real LLM latencies have.
+    """
+
+    kind: str = "lognormal"
+    median: float = 2.0
+    spread: float = 0.5
+    sigma: float = 0.5
+
+    def sample(self, rng: random.Random) -> float:
+        if self.kind == "fixed":
+            return self.median
+        if self.kind == "uniform":
+            return max(0.0, rng.uniform(self.median - self.spread, self.median + self.spread))
+        if self.kind == "lognormal":
+            return rng.lognormvariate(math.log(self.median), self.sigma)
+        raise ValueError(f"Unknown latency model: {self.kind}")
+
+
+@dataclass
+class FakeLLMOptions:
+    latency: LatencyModel
+    questions: int = 12
+    # Streaming: the response is split into this many chunks, spread over the latency
+    stream_chunks: int = 12
+    # Fraction of calls failing with a quota (429) error, which LLMService retries
+    quota_error_rate: float = 0.0
+    # Fraction of calls failing with a non-retryable error
+    error_rate: float = 0.0
+    seed: Optional[int] = None
+
+
+class FakeQuotaError(Exception):
+    """Stands in for Gemini's 429; LLMService retries it with backoff"""
+
+
+def _usage(prompt: str, text: str) -> LLMUsage:
+    prompt_tokens, output_tokens = len(prompt) // 4 + 1, len(text) // 4 + 1
+    return LLMUsage(prompt_tokens, output_tokens, prompt_tokens + output_tokens)
+
+
+class FakeProvider(LLMProvider):
+    """Answers every prompt with generated questions after a sampled latency"""
+
+    name = "fake"
+    model_name = "fake-model"
+    quota_errors = (FakeQuotaError,)
+
+    def __init__(self, options: FakeLLMOptions):
+        self.options = options
+        self.rng = random.Random(options.seed)
+        self.calls = 0
+
+    def _questions_json(self, prompt: str) -> str:
+        # Derived from the prompt, so different documents get different questions
+        tag = hashlib.sha256(prompt.encode()).hexdigest()[:8]
+        return json.dumps([
+            {
+                "question": f"Question {i + 1} about case {tag}: describe a system you designed?",
+                "answer": "A strong answer covers requirements, trade-offs and what was measured. " * 3,
+            }
+            for i in range(self.options.questions)
+        ])
+
+    def _maybe_fail(self) -> None:
+        roll = self.rng.random()
+        if roll < self.options.quota_error_rate:
+            raise FakeQuotaError("fake quota exceeded")
+        if roll < self.options.quota_error_rate + self.options.error_rate:
+            raise RuntimeError("fake model error")
+
+    def generate(self, prompt: str, params: Dict) -> LLMResponse:
+        self.calls += 1
+        time.sleep(self.options.latency.sample(self.rng))
+        self._maybe_fail()
+        text = self._questions_json(prompt)
+        return LLMResponse(text, _usage(prompt, text))
+
+    async def agenerate(self, prompt: str, params: Dict) -> LLMResponse:
+        self.calls += 1
+        await asyncio.sleep(self.options.latency.sample(self.rng))
+        self._maybe_fail()
+        text = self._questions_json(prompt)
+        return LLMResponse(text, _usage(prompt, text))
+
+    async def astream(self, prompt: str, params: Dict) -> LLMStream:
+        self.calls += 1
+        latency = self.options.latency.sample(self.rng)
+        self._maybe_fail()
+        text = self._questions_json(prompt)
+        count = max(1, self.options.stream_chunks)
+        size = math.ceil(len(text) / count)
+        pieces = [text[i:i + size] for i in range(0, len(text), size)]
+        # The first chunk arrives after a fifth of the latency, the rest evenly after it
+        first = latency / 5
+        rest = (latency - first) / max(1, len(pieces) - 1)
+
+        async def chunks():
+            for i, piece in enumerate(pieces):
+                await asyncio.sleep(first if i == 0 else rest)
+                yield piece
+            stream.usage = _usage(prompt, text)
+
+        stream = LLMStream(chunks())
+        return stream
+
+    def count_tokens(self, text: str) -> int:
+        return len(text) // 4 + 1
+
+
+def fake_llm_service(options: FakeLLMOptions) -> LLMService:
+    """A real LLMService on the fake provider; building it makes no network calls"""
+    return LLMService(provider=FakeProvider(options))
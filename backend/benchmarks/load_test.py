@@ -0,0 +1,248 @@
+"""
+Load test /upload, /upload/stream and the read endpoints against a fake Gemini model.
+
+    python -m benchmarks.load_test [--scenarios upload,stream,reads] [--requests N]
+        [--concurrency C] [--corpus pdf-1p,pdf-5p,docx-small] [--variants N]
+        [--latency lognormal] [--median 2.0] [--sigma 0.5] [--error-rate 0.0]
+        [--quota-error-rate 0.0] [--url http://127.0.0.1:8001]
+
+    python -m benchmarks.load_test --serve --port 8001 [fake-model options]
+
+By default the app runs in this process behind httpx's ASGI transport, on a
+temporary SQLite database (never DATABASE_URL's). --serve instead starts a
+uvicorn server with the fake model, and --url drives such a server from a
+separate process, so the load driver does not compete with the app for the
+GIL. Through the in-process transport a streamed body arrives all at once, so
+"first event" timings are only meaningful with --url.
+
+Every upload sends a unique additional context, so the LLM result cache never
+hits; documents cycle through `--variants` distinct files per corpus entry, so
+the extraction cache only hits once each variant has been seen.
+"""
+import argparse
+import asyncio
+import itertools
+import os
+import statistics
+import tempfile
+import time
+from collections import Counter
+from typing import List, NamedTuple, Optional
+
+import httpx
+
+from benchmarks.corpus import CORPUS_SPECS, build_corpus, build_job_descriptions
+
+SCENARIOS = ("upload", "stream", "reads")
+
+
+class ScenarioResult(NamedTuple):
+    name: str
+    latencies: List[float]
+    errors: Counter
+    elapsed: float
+    # Streaming only: time to the first event line
+    first_event: List[float]
+
+
+def percentile(samples: List[float], pct: int) -> float:
+    if not samples:
+        return float("nan")
+    if len(samples) == 1:
+        return samples[0]
+    return statistics.quantiles(samples, n=100, method="inclusive")[pct - 1]
+
+
+class LoadDriver:
+    def __init__(self, client: httpx.AsyncClient, args):
+        self.client = client
+        self.args = args
+        corpus = build_corpus(args.corpus, args.variants)
+        # Round-robin over corpus entries and their variants
+        self.resumes = itertools.cycle(
+            [doc for variants in zip(*corpus.values()) for doc in variants]
+        )
+        self.job_descriptions = itertools.cycle(build_job_descriptions(args.variants))
+        self.counter = itertools.count()
+        self.session_ids: List[int] = []
+
+    def _upload_form(self):
+        resume, jd = next(self.resumes), next(self.job_descriptions)
+        files = {
+            "resume_file": (resume.filename, resume.data, resume.content_type),
+            "job_desc_file": (jd.filename, jd.data, jd.content_type),
+        }
+        # Unique context: every request reaches the (fake) model
+        return files, {"additional_context": f"load test request {next(self.counter)}"}
+
+    async def upload(self) -> Optional[float]:
+        files, data = self._upload_form()
+        response = await self.client.post("/api/v1/upload", files=files, data=data)
+        response.raise_for_status()
+        body = response.json()
+        # A failed generation is still a 200, with no questions
+        if not body["questions"]:
+            raise RuntimeError("no questions generated")
+        session_id = body.get("session_id")
+        if session_id is not None:
+            self.session_ids.append(session_id)
+        return None
+
+    async def stream(self) -> Optional[float]:
+        files, data = self._upload_form()
+        started = time.perf_counter()
+        first = None
+        async with self.client.stream("POST", "/api/v1/upload/stream", files=files, data=data) as response:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                if first is None and line:
+                    first = time.perf_counter() - started
+                if '"type": "error"' in line:
+                    raise RuntimeError(line)
+        return first
+
+    async def reads(self) -> Optional[float]:
+        n = next(self.counter)
+        if n % 3 == 0:
+            response = await self.client.get("/api/v1/interviews", params={"limit": 20})
+        elif n % 3 == 1 or not self.session_ids:
+            response = await self.client.get("/api/v1/sessions", params={"limit": 20})
+        else:
+            session_id = self.session_ids[n % len(self.session_ids)]
+            response = await self.client.get(f"/api/v1/sessions/{session_id}/questions")
+        response.raise_for_status()
+        return None
+
+    async def run(self, name: str) -> ScenarioResult:
+        operation = getattr(self, name)
+        remaining = iter(range(self.args.requests))
+        latencies, first_events = [], []
+        errors: Counter = Counter()
+
+        async def worker():
+            for _ in remaining:
+                started = time.perf_counter()
+                try:
+                    first = await operation()
+                except httpx.HTTPStatusError as exc:
+                    errors[f"{exc.response.status_code}: {exc.response.text[:200]}"] += 1
+                    continue
+                except Exception as exc:
+                    errors[f"{type(exc).__name__}: {str(exc)[:200]}"] += 1
+                    continue
+                latencies.append(time.perf_counter() - started)
+                if first is not None:
+                    first_events.append(first)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(self.args.concurrency)))
+        return ScenarioResult(name, latencies, errors, time.perf_counter() - started, first_events)
+
+
+def report(results: List[ScenarioResult]) -> None:
+    print(f"{'scenario':<8} {'ok':>6} {'errors':>6} {'req/s':>8} {'p50 (ms)':>9} {'p95 (ms)':>9} {'p99 (ms)':>9}")
+    for result in results:
+        ms = [latency * 1000 for latency in result.latencies]
+        print(
+            f"{result.name:<8} {len(ms):>6} {sum(result.errors.values()):>6} {len(ms) / result.elapsed:>8.1f} "
+            f"{percentile(ms, 50):>9.1f} {percentile(ms, 95):>9.1f} {percentile(ms, 99):>9.1f}"
+        )
+        if result.first_event:
+            first = [latency * 1000 for latency in result.first_event]
+            print(
+                f"{'  first event':<29} {percentile(first, 50):>9.1f} "
+                f"{percentile(first, 95):>9.1f} {percentile(first, 99):>9.1f}"
+            )
+        for message, count in result.errors.most_common(3):
+            print(f"  {count} x {message}")
+
+
+def use_scratch_database() -> None:
+    """Point the app at a throwaway SQLite file; must run before app modules are imported"""
+    path = os.path.join(tempfile.mkdtemp(), "load-test.db")
+    os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+    os.environ.pop("ASYNC_DATABASE_URL", None)
+    os.environ.setdefault("DEBUG", "false")
+
+
+def build_app(args):
+    """The API app with the fake model installed and its schema created"""
+    from app.database import engine, ensure_schema
+    from app.main import app
+    from app.services import get_llm_service
+    from benchmarks.fake_llm import FakeLLMOptions, LatencyModel, fake_llm_service
+
+    ensure_schema(engine)
+    options = FakeLLMOptions(
+        latency=LatencyModel(args.latency, args.median, args.spread, args.sigma),
+        stream_chunks=args.stream_chunks,
+        quota_error_rate=args.quota_error_rate,
+        error_rate=args.error_rate,
+        seed=args.seed,
+    )
+    service = fake_llm_service(options)
+    app.dependency_overrides[get_llm_service] = lambda: service
+    return app
+
+
+async def drive(args) -> None:
+    if args.url:
+        client = httpx.AsyncClient(base_url=args.url, timeout=300)
+        target = args.url
+    else:
+        transport = httpx.ASGITransport(app=build_app(args))
+        client = httpx.AsyncClient(transport=transport, base_url="http://load-test", timeout=300)
+        target = "in-process"
+
+    print(
+        f"target: {target}, requests: {args.requests}, concurrency: {args.concurrency}, "
+        f"corpus: {','.join(args.corpus)} x{args.variants}"
+    )
+    if not args.url:
+        print(
+            f"fake model: {args.latency} median {args.median}s, "
+            f"error rate {args.error_rate}, quota error rate {args.quota_error_rate}"
+        )
+    async with client:
+        driver = LoadDriver(client, args)
+        results = [await driver.run(name) for name in args.scenarios]
+    report(results)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--scenarios", default="upload,stream,reads", type=lambda v: v.split(","))
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--corpus", default="pdf-1p,pdf-5p,docx-small", type=lambda v: v.split(","))
+    parser.add_argument("--variants", type=int, default=10, help="distinct documents per corpus entry")
+    parser.add_argument("--url", default="", help="drive a running server instead of an in-process app")
+    parser.add_argument("--serve", action="store_true", help="run a server with the fake model")
+    parser.add_argument("--port", type=int, default=8001)
+    # Fake model
+    parser.add_argument("--latency", default="lognormal", choices=["fixed", "uniform", "lognormal"])
+    parser.add_argument("--median", type=float, default=2.0, help="median model latency (s)")
+    parser.add_argument("--spread", type=float, default=0.5, help="uniform: +/- seconds")
+    parser.add_argument("--sigma", type=float, default=0.5, help="lognormal shape")
+    parser.add_argument("--stream-chunks", type=int, default=12)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--quota-error-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    unknown = set(args.scenarios) - set(SCENARIOS) or set(args.corpus) - set(CORPUS_SPECS)
+    if unknown:
+        parser.error(f"unknown scenario or corpus entry: {', '.join(sorted(unknown))}")
+
+    if not args.url:
+        use_scratch_database()
+    if args.serve:
+        import uvicorn
+
+        uvicorn.run(build_app(args), host="127.0.0.1", port=args.port, log_level="warning")
+        return
+    asyncio.run(drive(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,23 @@
 """
 Database initialization script
-Creates all tables defined in the models
+Creates all tables defined in the models, and adds enum values, columns and
+indexes that are missing from existing ones, then the full-text search
+indexes (PostgreSQL builds them CONCURRENTLY). Deployments run it as the
+release/pre-deploy step (see Procfile and railway.json); workers leave the
+schema alone unless CREATE_SCHEMA_ON_STARTUP=true.
 """
-from app.database import engine, Base
-from app.models import User, InterviewSession, InterviewQuestion, Interview
+from app.database import engine, ensure_schema
+from app.services.search import ensure_search_schema
 
 
 def create_tables():
     """Create all database tables"""
     print("Creating database tables...")
-    Base.metadata.create_all(bind=engine)
+    applied = ensure_schema(engine)
+    applied += ensure_search_schema(engine)
     print("✓ All tables created successfully!")
+    for ddl in applied:
+        print(f"  applied: {ddl}")
     print("\nCreated tables:")
     print("  - users")
     print("  - interview_sessions")
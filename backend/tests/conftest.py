@@ -1,26 +1,40 @@
 """
 Test configuration and fixtures
 """
+import asyncio
+import io
+import os
+import tempfile
+
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import StaticPool
+from sqlalchemy.pool import NullPool
 
 from app.main import app
-from app.database import Base, get_db
+from app.database import Base, get_async_db, get_db
 from app.models import User, InterviewSession, InterviewQuestion
+from app.services import get_llm_service
+from tests.mock_data import MOCK_INTERVIEW_QUESTIONS, MOCK_JOB_DESCRIPTION_BACKEND, MOCK_PDF_CONTENT
 
-# Create in-memory SQLite database for testing
-SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"
+# Temporary file-based SQLite database, so the sync and async engines see the same data
+TEST_DB_PATH = os.path.join(tempfile.mkdtemp(), "test.db")
+SQLALCHEMY_DATABASE_URL = f"sqlite:///{TEST_DB_PATH}"
 
 engine = create_engine(
     SQLALCHEMY_DATABASE_URL,
     connect_args={"check_same_thread": False},
-    poolclass=StaticPool,
 )
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# NullPool: each TestClient runs its own event loop, so connections are not reused across tests
+async_engine = create_async_engine(f"sqlite+aiosqlite:///{TEST_DB_PATH}", poolclass=NullPool)
+TestingAsyncSessionLocal = async_sessionmaker(
+    async_engine, class_=AsyncSession, expire_on_commit=False, autoflush=False
+)
+
 
 def override_get_db():
     """Override database dependency for testing"""
@@ -31,6 +45,12 @@ def override_get_db():
         db.close()
 
 
+async def override_get_async_db():
+    """Override async database dependency for testing"""
+    async with TestingAsyncSessionLocal() as db:
+        yield db
+
+
 @pytest.fixture(scope="function")
 def db_session():
     """Create a fresh database session for each test"""
@@ -47,6 +67,7 @@ def db_session():
 def client(db_session):
     """Create a test client with database override"""
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_async_db] = override_get_async_db
     Base.metadata.create_all(bind=engine)
 
     with TestClient(app) as test_client:
@@ -130,3 +151,64 @@ def sample_questions(db_session, sample_session):
         db_session.refresh(question)
 
     return questions
+
+
+class SlowLLMService:
+    """
+    Stand-in for LLMService whose generation takes `delay` seconds, and which
+    records how many generations ran in total and at most at once, and how
+    many times documents were prepared (by prepare_inputs, or by a generation
+    not given prepared=True).
+    Results count as complete (passed to on_complete) unless `complete` is False.
+    """
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.complete = True
+        self.calls = 0
+        self.prepared = 0
+        self.running = 0
+        self.max_running = 0
+
+    def prepare_inputs(self, resume_content, job_description):
+        self.prepared += 1
+        return resume_content, job_description
+
+    async def agenerate_interview_questions(self, resume_content, job_description, on_complete=None, prepared=False):
+        self.calls += 1
+        self.prepared += not prepared
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.running -= 1
+        if self.complete and on_complete is not None:
+            on_complete(MOCK_INTERVIEW_QUESTIONS)
+        return MOCK_INTERVIEW_QUESTIONS
+
+    async def astream_interview_questions(self, resume_content, job_description, on_complete=None, prepared=False):
+        self.calls += 1
+        self.prepared += not prepared
+        for question in MOCK_INTERVIEW_QUESTIONS:
+            await asyncio.sleep(self.delay)
+            yield question
+        if self.complete and on_complete is not None:
+            on_complete(MOCK_INTERVIEW_QUESTIONS)
+
+
+def upload_files():
+    """Form files of an /upload request: a PDF resume and a text job description"""
+    return {
+        "resume_file": ("resume.pdf", io.BytesIO(MOCK_PDF_CONTENT), "application/pdf"),
+        "job_desc_file": ("jd.txt", io.BytesIO(MOCK_JOB_DESCRIPTION_BACKEND.encode()), "text/plain"),
+    }
+
+
+@pytest.fixture
+def llm_service():
+    """Serve requests with a SlowLLMService instead of calling Gemini"""
+    service = SlowLLMService()
+    app.dependency_overrides[get_llm_service] = lambda: service
+    yield service
+    app.dependency_overrides.pop(get_llm_service, None)
@@ -0,0 +1,62 @@
+"""
+Legacy interview backfill tests
+"""
+import pytest
+
+from app.models import Interview, InterviewQuestion, InterviewSession
+from app.services.backfill import backfill_legacy_interviews
+from tests.conftest import TestingSessionLocal, engine
+
+
+@pytest.fixture
+def legacy_interviews(db_session):
+    rows = [
+        Interview(
+            resume_filename=f"resume{i}.pdf",
+            resume_content=f"resume {i}",
+            job_description_filename="jd.txt",
+            job_description_content="jd",
+            questions_answers=[
+                {"question": f"Question {i}.{n}", "answer": "answer"} for n in range(i % 3)
+            ],
+        )
+        for i in range(7)
+    ]
+    db_session.add_all(rows)
+    db_session.commit()
+    return rows
+
+
+class TestLegacyBackfill:
+    """Test migrating legacy interviews into sessions"""
+
+    def test_migrates_rows_and_questions(self, db_session, legacy_interviews):
+        """Test that every interview becomes a session with its numbered questions"""
+        result = backfill_legacy_interviews(engine, TestingSessionLocal, batch_size=3)
+
+        assert (result.batches, result.sessions) == (3, 7)
+        assert result.questions == sum(i % 3 for i in range(7))
+
+        session = (
+            db_session.query(InterviewSession)
+            .filter(InterviewSession.legacy_interview_id == legacy_interviews[5].id)
+            .one()
+        )
+        assert session.resume_text == "resume 5"
+        assert session.total_questions == 2
+        assert [q.question_text for q in sorted(session.questions, key=lambda q: q.question_number)] == [
+            "Question 5.0", "Question 5.1",
+        ]
+
+    def test_resumes_after_interruption(self, db_session, legacy_interviews):
+        """Test that a re-run continues after the last committed batch without duplicates"""
+        first = backfill_legacy_interviews(engine, TestingSessionLocal, batch_size=2, max_batches=2)
+        assert first.sessions == 4
+
+        second = backfill_legacy_interviews(engine, TestingSessionLocal, batch_size=2)
+        assert second.sessions == 3
+        assert second.last_interview_id == legacy_interviews[-1].id
+
+        assert backfill_legacy_interviews(engine, TestingSessionLocal).sessions == 0
+        assert db_session.query(InterviewSession).count() == 7
+        assert db_session.query(InterviewQuestion).count() == sum(i % 3 for i in range(7))
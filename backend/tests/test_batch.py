@@ -0,0 +1,163 @@
+"""
+Batch upload tests
+"""
+import asyncio
+import io
+import json
+import re
+import zipfile
+
+from docx import Document
+
+from app.models import InterviewSession
+from app.services.uploads import SpooledDocument, unpack_zip
+from tests.mock_data import MOCK_INTERVIEW_QUESTIONS, MOCK_JOB_DESCRIPTION_BACKEND, MOCK_PDF_CONTENT
+
+
+def by_candidate(llm_service, delay: float = 0.0):
+    """
+    Make each generation take as long as the candidate number in the resume
+    ("candidate 3" takes 3 * delay), and fail for resumes mentioning "fail"
+    """
+    generate = llm_service.agenerate_interview_questions
+
+    async def agenerate(resume_content, job_description, on_complete=None):
+        number = re.search(r"candidate (\d+)", resume_content)
+        await asyncio.sleep(int(number.group(1)) * delay if number else 0)
+        if "fail" in resume_content:
+            raise RuntimeError("quota exceeded")
+        return await generate(resume_content, job_description, on_complete=on_complete)
+
+    llm_service.agenerate_interview_questions = agenerate
+
+
+def resume_docx(text: str) -> bytes:
+    document = Document()
+    document.add_paragraph(text)
+    buffer = io.BytesIO()
+    document.save(buffer)
+    return buffer.getvalue()
+
+
+def resume_files(*numbers):
+    return [
+        ("resume_files", (f"candidate{n}.docx", io.BytesIO(resume_docx(f"Resume of candidate {n}")), "application/octet-stream"))
+        for n in numbers
+    ]
+
+
+def job_desc_file():
+    return [("job_desc_file", ("jd.txt", io.BytesIO(MOCK_JOB_DESCRIPTION_BACKEND.encode()), "text/plain"))]
+
+
+def zip_bytes(members) -> bytes:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as zf:
+        for name, data in members.items():
+            zf.writestr(name, data)
+    return buffer.getvalue()
+
+
+def post_batch(client, files):
+    response = client.post("/api/v1/upload/batch", files=job_desc_file() + files)
+    assert response.status_code == 200, response.text
+    return [json.loads(line) for line in response.text.splitlines()]
+
+
+class TestBatchUpload:
+    """Test generating questions for many resumes against one job description"""
+
+    def test_every_resume_gets_a_result(self, client, llm_service):
+        """Test one result per resume, each stored as its own session, then a summary"""
+        events = post_batch(client, resume_files(1, 2, 3))
+
+        results = [e for e in events if e["type"] == "result"]
+        assert sorted(r["index"] for r in results) == [0, 1, 2]
+        assert all(r["questions"] == MOCK_INTERVIEW_QUESTIONS for r in results)
+        assert len({r["session_id"] for r in results}) == 3
+        assert events[-1] == {"type": "done", "total": 3, "succeeded": 3, "failed": 0}
+        assert llm_service.calls == 3
+
+    def test_results_stream_in_completion_order(self, client, llm_service):
+        """Test that a fast resume is not held back behind a slow one uploaded before it"""
+        by_candidate(llm_service, delay=0.05)
+
+        events = post_batch(client, resume_files(4, 1))
+
+        assert [e["filename"] for e in events[:-1]] == ["candidate1.docx", "candidate4.docx"]
+        assert [e["index"] for e in events[:-1]] == [1, 0]
+
+    def test_failures_do_not_abort_the_batch(self, client, llm_service):
+        """Test that a bad file type and a failed generation become error events"""
+        by_candidate(llm_service)
+        files = resume_files(1) + [
+            ("resume_files", ("notes.txt", io.BytesIO(b"candidate 2"), "text/plain")),
+            ("resume_files", ("c3.docx", io.BytesIO(resume_docx("candidate 3 fail")), "application/octet-stream")),
+        ]
+
+        events = post_batch(client, files)
+
+        errors = {e["filename"]: e["detail"] for e in events if e["type"] == "error"}
+        assert "Invalid file type" in errors["notes.txt"]
+        assert "quota exceeded" in errors["c3.docx"]
+        assert events[-1] == {"type": "done", "total": 3, "succeeded": 1, "failed": 2}
+
+    def test_generation_concurrency_is_bounded(self, client, llm_service, monkeypatch):
+        """Test that no more than batch_max_concurrency generations run at once"""
+        monkeypatch.setattr("app.api.endpoints.settings.batch_max_concurrency", 2)
+        llm_service.delay = 0.01
+
+        events = post_batch(client, resume_files(1, 2, 3, 4, 5, 6))
+
+        assert events[-1]["succeeded"] == 6
+        assert llm_service.max_running == 2
+
+    def test_zip_of_resumes(self, client, llm_service, db_session):
+        """Test that zip members are resumes, with archive metadata and folders skipped"""
+        archive = zip_bytes({
+            "resumes/candidate1.docx": resume_docx("Resume of candidate 1"),
+            "resumes/candidate2.pdf": MOCK_PDF_CONTENT,
+            "__MACOSX/resumes/._candidate1.docx": b"metadata",
+            "resumes/.DS_Store": b"metadata",
+        })
+        files = [("resume_zip", ("resumes.zip", io.BytesIO(archive), "application/zip"))]
+
+        events = post_batch(client, files + resume_files(3))
+
+        assert sorted(e["filename"] for e in events[:-1]) == ["candidate1.docx", "candidate2.pdf", "candidate3.docx"]
+        assert events[-1] == {"type": "done", "total": 3, "succeeded": 3, "failed": 0}
+        assert db_session.query(InterviewSession).count() == 3
+
+    def test_invalid_batches_rejected(self, client, llm_service, monkeypatch):
+        """Test that a batch-level problem is an HTTP error before anything is generated"""
+        monkeypatch.setattr("app.api.endpoints.settings.batch_max_resumes", 2)
+        not_a_zip = [("resume_zip", ("resumes.zip", io.BytesIO(b"not a zip"), "application/zip"))]
+
+        assert client.post("/api/v1/upload/batch", files=job_desc_file()).status_code == 400
+        assert client.post("/api/v1/upload/batch", files=job_desc_file() + not_a_zip).status_code == 400
+        assert client.post("/api/v1/upload/batch", files=job_desc_file() + resume_files(1, 2, 3)).status_code == 400
+        assert llm_service.calls == 0
+
+
+class TestUnpackZip:
+    """Test reading documents out of a zip upload"""
+
+    def test_oversized_member_is_an_error_item(self):
+        """Test that the size limit is enforced per member, without failing the archive"""
+        archive = SpooledDocument("resumes.zip", 0, "", data=zip_bytes({"big.pdf": b"x" * 5000, "small.pdf": b"x"}))
+
+        members = unpack_zip(archive, max_member_bytes=1000, memory_threshold=100, max_members=10)
+
+        assert [m.filename for m in members] == ["big.pdf", "small.pdf"]
+        assert members[0].document is None and "exceeds" in members[0].error
+        assert members[1].document.read_bytes() == b"x"
+
+    def test_large_member_spooled_to_disk(self):
+        """Test that members past the spool threshold are written to a temp file"""
+        archive = SpooledDocument("resumes.zip", 0, "", data=zip_bytes({"resume.pdf": b"x" * 500}))
+
+        [member] = unpack_zip(archive, max_member_bytes=1000, memory_threshold=100, max_members=10)
+
+        assert member.document.on_disk
+        assert member.document.read_bytes() == b"x" * 500
+        member.document.close()
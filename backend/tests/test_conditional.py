@@ -0,0 +1,71 @@
+"""
+Conditional GET (ETag / If-None-Match) tests
+"""
+from datetime import datetime
+
+import pytest
+
+from app.api.conditional import etag_matches
+from app.models import Interview
+
+
+@pytest.fixture
+def interview(db_session):
+    row = Interview(
+        resume_filename="resume.pdf",
+        resume_content="resume",
+        job_description_filename="jd.txt",
+        job_description_content="jd",
+        questions_answers=[{"question": "q", "answer": "a"}],
+    )
+    db_session.add(row)
+    db_session.commit()
+    db_session.refresh(row)
+    return row
+
+
+class TestConditionalReads:
+    """Test ETag revalidation of the interview read endpoints"""
+
+    @pytest.mark.parametrize("suffix", ["", "/questions"])
+    def test_revalidation_returns_304_until_changed(self, client, db_session, interview, suffix):
+        """Test that a matching If-None-Match is a 304 and an update changes the tag"""
+        url = f"/api/v1/interviews/{interview.id}{suffix}"
+        first = client.get(url)
+        etag = first.headers["ETag"]
+
+        assert first.status_code == 200
+        assert "must-revalidate" in first.headers["Cache-Control"]
+
+        cached = client.get(url, headers={"If-None-Match": etag})
+        assert cached.status_code == 304
+        assert cached.headers["ETag"] == etag
+        assert cached.content == b""
+
+        interview.questions_answers = [{"question": "new", "answer": "a"}]
+        interview.updated_at = datetime(2030, 1, 1)
+        db_session.commit()
+
+        changed = client.get(url, headers={"If-None-Match": etag})
+        assert changed.status_code == 200
+        assert changed.headers["ETag"] != etag
+
+    def test_representations_have_distinct_tags(self, client, interview):
+        """Test that the interview and its questions never share an ETag"""
+        assert (
+            client.get(f"/api/v1/interviews/{interview.id}").headers["ETag"]
+            != client.get(f"/api/v1/interviews/{interview.id}/questions").headers["ETag"]
+        )
+
+    def test_missing_interview_is_404_even_with_tag(self, client):
+        """Test that revalidating a deleted interview is a 404, not a 304"""
+        response = client.get("/api/v1/interviews/999", headers={"If-None-Match": "*"})
+
+        assert response.status_code == 404
+
+    def test_etag_matching(self):
+        """Test If-None-Match lists, weak tags and the wildcard"""
+        assert etag_matches('"a", W/"b"', '"b"')
+        assert etag_matches("*", '"b"')
+        assert not etag_matches('"a"', '"b"')
+        assert not etag_matches(None, '"b"')
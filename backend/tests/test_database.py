@@ -0,0 +1,117 @@
+"""
+Database engine configuration tests
+"""
+import pytest
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from app.database import asyncpg_connect_args, ensure_schema, enum_value_ddl, get_async_db, to_async_url
+from app.models import InterviewSession, SessionStatus, User
+from app.services.sessions import create_pending_session, fail_session
+
+
+class TestAsyncEngine:
+    """Test the async engine used by the read endpoints"""
+
+    @pytest.mark.parametrize(
+        "url, expected",
+        [
+            ("postgresql://u:p@db:5432/app", "postgresql+asyncpg://u:p@db:5432/app"),
+            ("postgres://u:p@db/app", "postgresql+asyncpg://u:p@db/app"),
+            ("postgresql+psycopg2://u:p@db/app", "postgresql+asyncpg://u:p@db/app"),
+            ("sqlite:///./interview.db", "sqlite+aiosqlite:///./interview.db"),
+            ("sqlite+aiosqlite:///x.db", "sqlite+aiosqlite:///x.db"),
+        ],
+    )
+    def test_to_async_url(self, url, expected):
+        """Test that sync URLs map to the async driver of the same database"""
+        assert to_async_url(url) == expected
+
+    def test_to_async_url_drops_sslmode(self):
+        """Test that libpq's sslmode, which asyncpg rejects, is removed"""
+        url = to_async_url("postgresql://u:p@db/app?sslmode=require&application_name=api")
+
+        assert "sslmode" not in url
+        assert "application_name=api" in url
+
+    def test_sslmode_carried_to_asyncpg(self, monkeypatch):
+        """Test that a URL's sslmode becomes asyncpg's ssl argument outside production too"""
+        monkeypatch.setattr("app.database.settings.environment", "development")
+
+        assert asyncpg_connect_args("postgresql://u:p@db/app?sslmode=require") == {"ssl": "require"}
+        assert asyncpg_connect_args("postgresql://u:p@db/app?sslmode=verify-full") == {"ssl": "verify-full"}
+        assert asyncpg_connect_args("postgresql://u:p@db/app") == {}
+
+    def test_production_requires_ssl(self, monkeypatch):
+        """Test that production defaults to TLS unless the URL asks for a stricter mode"""
+        monkeypatch.setattr("app.database.settings.environment", "production")
+
+        assert asyncpg_connect_args("postgresql://u:p@db/app") == {"ssl": "require", "timeout": 10}
+        assert asyncpg_connect_args("postgresql://u:p@db/app?sslmode=verify-ca")["ssl"] == "verify-ca"
+
+    @pytest.mark.asyncio
+    async def test_dependency_yields_async_session(self):
+        """Test that get_async_db yields an AsyncSession without connecting up front"""
+        dependency = get_async_db()
+        db = await dependency.__anext__()
+
+        assert isinstance(db, AsyncSession)
+        await dependency.aclose()
+
+
+class TestEnsureSchema:
+    """Test additive schema upgrades"""
+
+    def test_creates_missing_tables(self, tmp_path):
+        """Test that an empty database gets every table"""
+        engine = create_engine(f"sqlite:///{tmp_path / 'db.sqlite'}")
+        ensure_schema(engine)
+
+        assert {"users", "interview_sessions", "interview_questions", "interviews"} <= set(
+            inspect(engine).get_table_names()
+        )
+
+    def test_adds_columns_and_indexes_to_existing_tables(self, tmp_path):
+        """Test that a table created before newer columns/indexes is brought up to date"""
+        engine = create_engine(f"sqlite:///{tmp_path / 'db.sqlite'}")
+        with engine.begin() as conn:
+            conn.execute(text(
+                "CREATE TABLE interviews (id INTEGER PRIMARY KEY, resume_filename VARCHAR NOT NULL, "
+                "resume_content TEXT NOT NULL, job_description_filename VARCHAR NOT NULL, "
+                "job_description_content TEXT NOT NULL, created_at DATETIME)"
+            ))
+
+        applied = ensure_schema(engine)
+
+        inspector = inspect(engine)
+        columns = {column["name"] for column in inspector.get_columns("interviews")}
+        indexes = {index["name"] for index in inspector.get_indexes("interviews")}
+        assert {"questions_answers", "updated_at"} <= columns
+        assert "ix_interviews_created_at_id" in indexes
+        assert applied
+        assert ensure_schema(engine) == []
+
+    def test_missing_enum_values_added(self):
+        """Test that a type created before SessionStatus.FAILED existed gets the value"""
+        existing = {"sessionstatus": {"CREATED", "IN_PROGRESS", "COMPLETED", "ARCHIVED"}}
+
+        assert enum_value_ddl(existing) == ["ALTER TYPE sessionstatus ADD VALUE IF NOT EXISTS 'FAILED'"]
+        # Types not created yet are left to create_all
+        assert enum_value_ddl({}) == []
+
+    def test_failed_status_round_trips(self, tmp_path):
+        """Test that a failed job's session can be stored and read back as failed"""
+        engine = create_engine(f"sqlite:///{tmp_path / 'db.sqlite'}")
+        ensure_schema(engine)
+        db = sessionmaker(bind=engine)()
+        user = User(email="u@example.com", username="u", hashed_password="x")
+        db.add(user)
+        db.commit()
+        session = create_pending_session(db, user.id, "resume.pdf", "jd.txt")
+
+        fail_session(db, session.id, "No questions were generated")
+
+        db.expire_all()
+        assert db.get(InterviewSession, session.id).status == SessionStatus.FAILED
+        db.close()
@@ -0,0 +1,120 @@
+"""
+Listing endpoint tests
+"""
+import pytest
+from sqlalchemy import inspect, select
+from sqlalchemy.orm import load_only
+
+from app.models import Interview, InterviewSession, SessionStatus, User
+from app.services.pagination import InvalidCursorError, decode_cursor, keyset_page
+
+
+@pytest.fixture
+def sessions(db_session):
+    """Seven sessions across two users, created within the same second"""
+    users = [
+        User(email=f"user{i}@example.com", username=f"user{i}", hashed_password="!")
+        for i in range(2)
+    ]
+    db_session.add_all(users)
+    db_session.commit()
+    rows = [
+        InterviewSession(
+            user_id=users[i % 2].id,
+            status=SessionStatus.FAILED if i == 4 else SessionStatus.IN_PROGRESS,
+            resume_filename=f"resume{i}.pdf",
+            resume_text="resume text",
+            jd_filename=f"jd{i}.txt",
+            jd_text="jd text",
+        )
+        for i in range(7)
+    ]
+    db_session.add_all(rows)
+    db_session.commit()
+    return users, rows
+
+
+def fetch_all(client, url):
+    """Follow X-Next-Cursor until the last page, returning every item and the page sizes"""
+    items, sizes, cursor = [], [], None
+    while True:
+        params = {"limit": 3}
+        if cursor:
+            params["cursor"] = cursor
+        response = client.get(url, params=params)
+        assert response.status_code == 200
+        items.extend(response.json())
+        sizes.append(len(response.json()))
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            return items, sizes
+
+
+class TestSessionListing:
+    """Test keyset pagination of GET /sessions"""
+
+    def test_pages_cover_every_row_once(self, client, sessions):
+        """Test that pages are newest first, without gaps or repeats, despite equal timestamps"""
+        _, rows = sessions
+
+        items, sizes = fetch_all(client, "/api/v1/sessions")
+
+        assert [item["id"] for item in items] == sorted((row.id for row in rows), reverse=True)
+        assert sizes == [3, 3, 1]
+        assert "resume_text" not in items[0]
+
+    def test_filters(self, client, sessions):
+        """Test filtering by user and status"""
+        users, rows = sessions
+
+        items, _ = fetch_all(client, f"/api/v1/sessions?user_id={users[0].id}")
+        assert {item["id"] for item in items} == {row.id for row in rows if row.user_id == users[0].id}
+
+        failed = client.get("/api/v1/sessions", params={"status": "failed"}).json()
+        assert [item["resume_filename"] for item in failed] == ["resume4.pdf"]
+
+    def test_invalid_cursor_and_limit(self, client, sessions):
+        """Test that a malformed cursor is a 400 and an oversized page a 422"""
+        assert client.get("/api/v1/sessions", params={"cursor": "not-a-cursor"}).status_code == 400
+        assert client.get("/api/v1/sessions", params={"limit": 100000}).status_code == 422
+
+    def test_only_listed_columns_loaded(self, db_session, sessions):
+        """Test that the projection leaves the document text unloaded"""
+        stmt = select(InterviewSession).options(
+            load_only(InterviewSession.id, InterviewSession.created_at)
+        )
+        page = keyset_page(db_session, stmt, InterviewSession, limit=2)
+
+        assert len(page.items) == 2
+        assert "resume_text" in inspect(page.items[0]).unloaded
+        created_at, row_id = decode_cursor(page.next_cursor)
+        assert row_id == page.items[-1].id
+
+    def test_decode_cursor_rejects_garbage(self):
+        """Test that tampered cursors raise InvalidCursorError"""
+        with pytest.raises(InvalidCursorError):
+            decode_cursor("eyJjIjoieCJ9")
+
+
+class TestInterviewListing:
+    """Test keyset pagination of GET /interviews"""
+
+    def test_pages_exclude_document_text(self, client, db_session):
+        """Test that legacy interviews are paginated and returned without their text"""
+        db_session.add_all([
+            Interview(
+                resume_filename=f"resume{i}.pdf",
+                resume_content="resume",
+                job_description_filename="jd.txt",
+                job_description_content="jd",
+                questions_answers=[{"question": "q", "answer": "a"}],
+            )
+            for i in range(5)
+        ])
+        db_session.commit()
+
+        items, sizes = fetch_all(client, "/api/v1/interviews")
+
+        assert sizes == [3, 2]
+        assert [item["resume_filename"] for item in items] == [f"resume{i}.pdf" for i in reversed(range(5))]
+        assert "resume_content" not in items[0]
@@ -0,0 +1,116 @@
+"""
+Metrics and Server-Timing tests
+"""
+import json
+from unittest.mock import Mock, patch
+
+import pytest
+from sqlalchemy import create_engine
+
+from app import metrics
+from app.metrics import (
+    DB_POOL_CHECKOUT_SECONDS,
+    LLM_OUTPUT_TOKENS,
+    LLM_PARSE_FAILURES,
+    LLM_PROMPT_TOKENS,
+    UPLOAD_STAGE_SECONDS,
+    MetricsRegistry,
+    instrument_pool,
+    server_timing_header,
+)
+from app.services import LLMService
+from app.services.cache import LRUCache
+from tests.mock_data import MOCK_INTERVIEW_QUESTIONS, MOCK_JOB_DESCRIPTION_BACKEND, MOCK_RESUME_CONTENT
+from tests.conftest import upload_files
+
+
+class TestMetricsRegistry:
+    """Test the Prometheus text exposition"""
+
+    def test_histogram_buckets_are_cumulative(self):
+        """Test bucket, sum and count lines of a labelled histogram"""
+        registry = MetricsRegistry()
+        histogram = registry.histogram("stage_seconds", "Stage time", ["stage"], buckets=(0.1, 1))
+        histogram.observe(0.05, stage="read")
+        histogram.observe(0.5, stage="read")
+        histogram.observe(5, stage="read")
+
+        lines = registry.render().splitlines()
+
+        assert "# TYPE stage_seconds histogram" in lines
+        assert 'stage_seconds_bucket{stage="read",le="0.1"} 1' in lines
+        assert 'stage_seconds_bucket{stage="read",le="1"} 2' in lines
+        assert 'stage_seconds_bucket{stage="read",le="+Inf"} 3' in lines
+        assert 'stage_seconds_sum{stage="read"} 5.55' in lines
+        assert 'stage_seconds_count{stage="read"} 3' in lines
+
+    def test_counter_escapes_label_values(self):
+        """Test that quotes and backslashes in label values are escaped"""
+        registry = MetricsRegistry()
+        registry.counter("errors_total", "Errors", ["kind"]).inc(kind='say "hi"\\')
+
+        assert 'errors_total{kind="say \\"hi\\"\\\\"} 1' in registry.render()
+
+    def test_metric_without_samples_rejected(self):
+        """Test that a metric type missing _samples fails when it is created, not when rendered"""
+        class Gauge(metrics._Metric):
+            kind = "gauge"
+
+        with pytest.raises(TypeError):
+            Gauge("queue_depth", "Queued jobs")
+
+    def test_server_timing_header(self):
+        """Test the Server-Timing value format (milliseconds)"""
+        assert server_timing_header({"read": 0.0123, "llm": 1.5}, total=2) == (
+            "read;dur=12.3, llm;dur=1500.0, total;dur=2000.0"
+        )
+
+
+class TestPipelineMetrics:
+    """Test that the upload pipeline records its stages"""
+
+    def test_upload_reports_stages(self, client, llm_service):
+        """Test the Server-Timing header of /upload and the /metrics histograms"""
+        before = UPLOAD_STAGE_SECONDS.count(stage="extract")
+
+        response = client.post("/api/v1/upload", files=upload_files())
+
+        stages = [entry.split(";")[0] for entry in response.headers["Server-Timing"].split(", ")]
+        assert stages == ["read", "extract", "persist", "total"]
+        assert UPLOAD_STAGE_SECONDS.count(stage="extract") == before + 1
+
+        metrics = client.get("/metrics")
+        assert metrics.headers["content-type"].startswith("text/plain; version=0.0.4")
+        assert 'upload_stage_duration_seconds_count{stage="extract"}' in metrics.text
+        assert 'extraction_document_bytes_count{type="pdf"}' in metrics.text
+
+    def test_llm_usage_and_parse_failures(self):
+        """Test token counts from usage metadata and the parse-failure counter"""
+        response = Mock()
+        response.text = json.dumps(MOCK_INTERVIEW_QUESTIONS)
+        response.usage_metadata = Mock(prompt_token_count=1200, candidates_token_count=800, total_token_count=2000)
+        broken = Mock(text="Sorry, I cannot help with that")
+        prompt_before, output_before = LLM_PROMPT_TOKENS.count(), LLM_OUTPUT_TOKENS.count()
+        empty_before = LLM_PARSE_FAILURES.value(outcome="empty")
+
+        with patch("app.services.genai.GenerativeModel") as mock_model, \
+                patch("app.services.get_llm_cache", return_value=LRUCache(1024 * 1024, ttl_seconds=60)):
+            mock_model.return_value.generate_content.side_effect = [response, broken]
+            service = LLMService()
+            service.generate_interview_questions(MOCK_RESUME_CONTENT, MOCK_JOB_DESCRIPTION_BACKEND)
+            service.generate_interview_questions(MOCK_RESUME_CONTENT, "another job")
+
+        assert LLM_PROMPT_TOKENS.count() == prompt_before + 1
+        assert LLM_OUTPUT_TOKENS.count() == output_before + 1
+        assert LLM_PARSE_FAILURES.value(outcome="empty") == empty_before + 1
+
+    def test_pool_checkout_wait_recorded(self, tmp_path):
+        """Test that instrumented pools time each checkout"""
+        engine = create_engine(f"sqlite:///{tmp_path / 'db.sqlite'}")
+        instrument_pool(engine.pool, "test")
+
+        with engine.connect():
+            pass
+
+        assert DB_POOL_CHECKOUT_SECONDS.count(pool="test") == 1
+        engine.dispose()
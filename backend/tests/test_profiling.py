@@ -0,0 +1,86 @@
+"""
+Request profiling tests
+"""
+import time
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.middleware import ProfilingMiddleware
+from app.services.compaction import clean_text
+from app.services.profiling import ProfileStore, RequestProfile, get_profile_store
+
+
+def profiled_client(**middleware_options) -> TestClient:
+    api = FastAPI()
+
+    @api.get("/work")
+    def work():
+        # A sync endpoint runs in a threadpool thread, like extraction
+        deadline = time.monotonic() + 0.2
+        while time.monotonic() < deadline:
+            clean_text("Page 1\nSome text with hyphen-\nated words\n" * 200)
+        return {"ok": True}
+
+    api.add_middleware(ProfilingMiddleware, **middleware_options)
+    return TestClient(api)
+
+
+class TestProfilingMiddleware:
+    """Test request selection and the captured stacks"""
+
+    def test_header_trigger_captures_app_stacks(self):
+        """Test that a matching X-Profile header profiles the request's worker thread"""
+        response = profiled_client(token="secret").get("/work", headers={"X-Profile": "secret"})
+
+        profile = get_profile_store().get(response.headers["X-Profile-Id"])
+        assert profile.trigger == "header"
+        assert profile.status_code == 200
+        assert profile.samples > 0
+        assert "clean_text (app/services/compaction.py" in profile.folded()
+        # Stacks start at app code, not in the threadpool machinery
+        assert all("(app/" in line.split(";")[0] for line in profile.folded().splitlines())
+        functions = {f["function"].split(" (")[0]: f for f in profile.top_functions()}
+        assert functions["clean_text"]["total_samples"] > functions["clean_text"]["self_samples"]
+
+    def test_unselected_requests_are_not_profiled(self):
+        """Test that a wrong token, or no token configured, leaves the request alone"""
+        assert "X-Profile-Id" not in profiled_client(token="secret").get(
+            "/work", headers={"X-Profile": "guess"}
+        ).headers
+        assert "X-Profile-Id" not in profiled_client().get(
+            "/work", headers={"X-Profile": ""}
+        ).headers
+
+    def test_sample_rate(self):
+        """Test that a sample rate of 1 profiles every request"""
+        response = profiled_client(sample_rate=1.0).get("/work")
+
+        assert get_profile_store().get(response.headers["X-Profile-Id"]).trigger == "sample"
+
+
+class TestProfileStore:
+    """Test retention of finished profiles"""
+
+    def test_oldest_profiles_evicted(self):
+        """Test the hard cap on kept profiles"""
+        store = ProfileStore(max_profiles=2)
+        profiles = [RequestProfile("GET", f"/{i}", "sample", 0.005) for i in range(3)]
+        for profile in profiles:
+            store.add(profile)
+
+        assert store.get(profiles[0].id) is None
+        assert [p.id for p in store.list()] == [profiles[2].id, profiles[1].id]
+
+    def test_profile_endpoints(self, client):
+        """Test reading a stored profile through the API"""
+        profile = RequestProfile("POST", "/api/v1/upload", "header", 0.005)
+        profile.add("upload_documents (app/api/endpoints/__init__.py:1);extract (x.py:2)")
+        get_profile_store().add(profile)
+
+        detail = client.get(f"/api/v1/profiles/{profile.id}").json()
+        folded = client.get(f"/api/v1/profiles/{profile.id}/folded")
+
+        assert detail["functions"][0]["total_samples"] == 1
+        assert folded.text == "upload_documents (app/api/endpoints/__init__.py:1);extract (x.py:2) 1\n"
+        assert client.get("/api/v1/profiles/missing").status_code == 404
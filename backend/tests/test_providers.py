@@ -0,0 +1,175 @@
+"""
+LLM provider tests
+"""
+import json
+
+import pytest
+
+from app.services import LLMService
+from app.services.cache import LRUCache
+from app.services.providers import (
+    CassetteNotFoundError,
+    CassetteStore,
+    LLMProvider,
+    LLMResponse,
+    LLMStream,
+    LLMUsage,
+    RecordingProvider,
+    ReplayProvider,
+    create_provider,
+)
+from tests.mock_data import MOCK_INTERVIEW_QUESTIONS, MOCK_RESUME_CONTENT
+
+PARAMS = {"temperature": 0.7}
+TEXT = json.dumps(MOCK_INTERVIEW_QUESTIONS)
+USAGE = LLMUsage(prompt_tokens=100, output_tokens=50, total_tokens=150)
+
+
+class StubProvider(LLMProvider):
+    """Counts calls and answers every prompt with the mock questions"""
+
+    name = "stub"
+    model_name = "stub-model"
+
+    def __init__(self):
+        self.calls = 0
+
+    def generate(self, prompt, params):
+        self.calls += 1
+        return LLMResponse(TEXT, USAGE)
+
+    async def agenerate(self, prompt, params):
+        return self.generate(prompt, params)
+
+    async def astream(self, prompt, params):
+        self.calls += 1
+
+        async def chunks():
+            for i in range(0, len(TEXT), 40):
+                yield TEXT[i:i + 40]
+            stream.usage = USAGE
+
+        stream = LLMStream(chunks())
+        return stream
+
+    def count_tokens(self, text):
+        self.calls += 1
+        return 42
+
+
+@pytest.fixture
+def store(tmp_path):
+    return CassetteStore(str(tmp_path / "cassettes"))
+
+
+async def consume(stream):
+    return [chunk async for chunk in stream]
+
+
+class TestLLMProvider:
+    """Test the provider interface"""
+
+    def test_incomplete_provider_rejected(self):
+        """Test that a provider missing a method fails when created, not on its first request"""
+        class GenerateOnly(LLMProvider):
+            def generate(self, prompt, params):
+                return LLMResponse(TEXT, USAGE)
+
+        with pytest.raises(TypeError):
+            GenerateOnly()
+
+
+class TestRecordReplay:
+    """Test recording responses as cassettes and serving them back"""
+
+    def test_replay_serves_recorded_response(self, store):
+        """Test that a recorded response replays with its usage and no live call"""
+        inner = StubProvider()
+        recorded = RecordingProvider(inner, store).generate("prompt", PARAMS)
+
+        replayed = ReplayProvider(store, "stub-model").generate("prompt", PARAMS)
+
+        assert replayed == recorded == LLMResponse(TEXT, USAGE)
+        assert inner.calls == 1
+
+    def test_recording_fills_only_gaps(self, store):
+        """Test that record mode serves existing cassettes and calls the model for the rest"""
+        inner = StubProvider()
+        provider = RecordingProvider(inner, store)
+
+        provider.generate("prompt", PARAMS)
+        provider.generate("prompt", PARAMS)
+        provider.generate("another prompt", PARAMS)
+
+        assert inner.calls == 2
+
+    def test_unrecorded_request_fails(self, store):
+        """Test that replay never guesses: prompt, params and model are all part of the key"""
+        RecordingProvider(StubProvider(), store).generate("prompt", PARAMS)
+        replay = ReplayProvider(store, "stub-model")
+
+        with pytest.raises(CassetteNotFoundError):
+            replay.generate("prompt", {"temperature": 0.2})
+        with pytest.raises(CassetteNotFoundError):
+            ReplayProvider(store, "other-model").generate("prompt", PARAMS)
+
+    @pytest.mark.asyncio
+    async def test_stream_replays_recorded_chunks(self, store):
+        """Test that a recorded stream replays chunk by chunk, and is recorded only once consumed"""
+        inner = StubProvider()
+        live = await RecordingProvider(inner, store).astream("prompt", PARAMS)
+        with pytest.raises(CassetteNotFoundError):
+            ReplayProvider(store, "stub-model").generate("prompt", PARAMS)
+        live_chunks = await consume(live)
+
+        replayed = await ReplayProvider(store, "stub-model").astream("prompt", PARAMS)
+
+        assert await consume(replayed) == live_chunks
+        assert len(live_chunks) > 1
+        assert replayed.usage == live.usage == USAGE
+
+    @pytest.mark.asyncio
+    async def test_response_replays_as_stream(self, store):
+        """Test that a non-streamed recording can serve a streaming request"""
+        RecordingProvider(StubProvider(), store).generate("prompt", PARAMS)
+
+        stream = await ReplayProvider(store, "stub-model").astream("prompt", PARAMS)
+
+        assert await consume(stream) == [TEXT]
+
+    def test_token_counts_are_recorded(self, store):
+        """Test that count_tokens replays too, so compaction produces the recorded prompts"""
+        RecordingProvider(StubProvider(), store).count_tokens("some text")
+
+        assert ReplayProvider(store, "stub-model").count_tokens("some text") == 42
+
+
+class TestServiceWithProvider:
+    """Test LLMService on a non-Gemini provider"""
+
+    @pytest.mark.asyncio
+    async def test_replayed_generation(self, store, monkeypatch):
+        """Test that a replayed run generates the same questions without the model"""
+        monkeypatch.setattr("app.services.get_llm_cache", lambda: LRUCache(1024 * 1024))
+        inner = StubProvider()
+        recording = LLMService(provider=RecordingProvider(inner, store))
+        recorded = await recording.agenerate_interview_questions(MOCK_RESUME_CONTENT, "JD")
+
+        replaying = LLMService(provider=ReplayProvider(store, "stub-model"))
+        # Both calls below must reach the provider
+        replaying.cache = None
+        replayed = await replaying.agenerate_interview_questions(MOCK_RESUME_CONTENT, "JD")
+        streamed = [q async for q in replaying.astream_interview_questions(MOCK_RESUME_CONTENT, "JD")]
+
+        assert replayed == recorded == streamed == MOCK_INTERVIEW_QUESTIONS
+        assert inner.calls == 1
+
+    def test_replay_provider_from_settings(self, tmp_path, monkeypatch):
+        """Test that LLM_PROVIDER=replay builds a provider that needs no API key"""
+        monkeypatch.setattr("app.services.providers.settings.llm_provider", "replay")
+        monkeypatch.setattr("app.services.providers.settings.llm_cassette_dir", str(tmp_path))
+
+        provider = create_provider()
+
+        assert isinstance(provider, ReplayProvider)
+        assert provider.store.directory == str(tmp_path)
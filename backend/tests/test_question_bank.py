@@ -0,0 +1,177 @@
+"""
+Question bank tests
+"""
+import io
+import json
+
+import pytest
+
+from app.services import question_bank
+from app.services.question_bank import MinHasher, QuestionBank
+from tests.mock_data import (
+    MOCK_INTERVIEW_QUESTIONS,
+    MOCK_JOB_DESCRIPTION_BACKEND,
+    MOCK_JOB_DESCRIPTION_FULLSTACK,
+    MOCK_RESUME_CONTENT,
+)
+from tests.conftest import upload_files
+
+# The same posting with a couple of small edits
+REPOSTED_JD = MOCK_JOB_DESCRIPTION_BACKEND.replace("experienced", "seasoned").replace("Senior", "Sr.", 1)
+
+
+def similarity(a, b) -> float:
+    return float((a == b).mean())
+
+
+class TestMinHash:
+    """Test the similarity estimate"""
+
+    def test_near_duplicates_score_high(self):
+        """Test that small edits keep the estimate high and unrelated text scores low"""
+        hasher = MinHasher()
+        original = hasher.signature(MOCK_JOB_DESCRIPTION_BACKEND)
+
+        assert similarity(original, hasher.signature(MOCK_JOB_DESCRIPTION_BACKEND)) == 1.0
+        assert similarity(original, hasher.signature(REPOSTED_JD)) > 0.9
+        assert similarity(original, hasher.signature(MOCK_JOB_DESCRIPTION_FULLSTACK)) < 0.3
+
+    def test_blocked_signature_matches_single_pass(self, monkeypatch):
+        """Test that hashing shingles in blocks gives the same signature as hashing all at once"""
+        text = MOCK_JOB_DESCRIPTION_BACKEND * 3
+        whole = MinHasher().signature(text)
+        monkeypatch.setattr(question_bank, "SIGNATURE_BLOCK", 7)
+
+        assert len(question_bank.shingles(text)) > 7
+        assert (MinHasher().signature(text) == whole).all()
+
+    def test_signatures_are_stable(self):
+        """Test that two hashers agree, so signatures do not depend on the process"""
+        assert (MinHasher().signature("some text here") == MinHasher().signature("some text here")).all()
+
+
+class TestQuestionBank:
+    """Test lookups, additions and eviction"""
+
+    def test_near_duplicate_pair_hits(self):
+        """Test that a reposted JD with the same resume reuses the stored questions"""
+        bank = QuestionBank(max_entries=10, threshold=0.9)
+        bank.add(bank.key(MOCK_RESUME_CONTENT, MOCK_JOB_DESCRIPTION_BACKEND), MOCK_INTERVIEW_QUESTIONS)
+
+        match = bank.lookup(bank.key(MOCK_RESUME_CONTENT, REPOSTED_JD))
+
+        assert match.questions == MOCK_INTERVIEW_QUESTIONS
+        assert 0.9 <= match.similarity < 1.0
+        assert bank.stats()["hits"] == 1
+
+    def test_both_documents_and_context_must_match(self):
+        """Test that a different JD or different additional context is a miss"""
+        bank = QuestionBank(max_entries=10, threshold=0.9)
+        bank.add(bank.key(MOCK_RESUME_CONTENT, MOCK_JOB_DESCRIPTION_BACKEND), MOCK_INTERVIEW_QUESTIONS)
+
+        assert bank.lookup(bank.key(MOCK_RESUME_CONTENT, MOCK_JOB_DESCRIPTION_FULLSTACK)) is None
+        assert bank.lookup(bank.key(MOCK_RESUME_CONTENT, MOCK_JOB_DESCRIPTION_BACKEND, "Focus on Go")) is None
+        assert bank.stats()["misses"] == 2
+
+    def test_least_recently_used_entry_evicted(self):
+        """Test that a full bank replaces the entry that was used least recently"""
+        bank = QuestionBank(max_entries=2, threshold=0.9)
+        keys = [bank.key(MOCK_RESUME_CONTENT, f"job description number {i} " * 20) for i in range(3)]
+        bank.add(keys[0], [{"question": "q0", "answer": "a"}])
+        bank.add(keys[1], [{"question": "q1", "answer": "a"}])
+        bank.lookup(keys[0])
+
+        bank.add(keys[2], [{"question": "q2", "answer": "a"}])
+
+        assert bank.lookup(keys[1]) is None
+        assert bank.lookup(keys[0]).questions[0]["question"] == "q0"
+        assert bank.stats()["entries"] == 2
+        assert bank.stats()["evictions"] == 1
+
+    def test_stored_questions_are_copies(self):
+        """Test that a caller editing served questions does not change the bank"""
+        bank = QuestionBank(max_entries=2, threshold=0.9)
+        key = bank.key(MOCK_RESUME_CONTENT, MOCK_JOB_DESCRIPTION_BACKEND)
+        bank.add(key, [{"question": "q", "answer": "a"}])
+
+        bank.lookup(key).questions[0]["question"] = "edited"
+
+        assert bank.lookup(key).questions[0]["question"] == "q"
+
+
+@pytest.fixture
+def bank(monkeypatch):
+    """Enable the question bank with a fresh, empty instance"""
+    monkeypatch.setattr("app.api.endpoints.settings.question_bank_enabled", True)
+    bank = QuestionBank(max_entries=10, threshold=0.9)
+    monkeypatch.setattr(question_bank, "_bank", bank)
+    return bank
+
+
+def reposted_files():
+    files = upload_files()
+    files["job_desc_file"] = ("jd.txt", io.BytesIO(REPOSTED_JD.encode()), "text/plain")
+    return files
+
+
+class TestUploadWithQuestionBank:
+    """Test that uploads are served from the bank on a near-duplicate"""
+
+    def test_reposted_job_skips_llm(self, client, llm_service, bank):
+        """Test that the second, slightly edited upload reuses the first one's questions"""
+        first = client.post("/api/v1/upload", files=upload_files()).json()
+        second = client.post("/api/v1/upload", files=reposted_files()).json()
+
+        assert llm_service.calls == 1
+        assert second["questions"] == first["questions"]
+        # The reused questions are still stored as the new upload's own session
+        assert second["session_id"] != first["session_id"]
+        assert client.get("/api/v1/cache/stats").json()["question_bank"]["hits"] == 1
+
+    def test_stream_served_from_bank(self, client, llm_service, bank):
+        """Test that a streamed upload is answered from the bank too"""
+        client.post("/api/v1/upload/stream", files=upload_files())
+        response = client.post("/api/v1/upload/stream", files=reposted_files())
+
+        events = [json.loads(line) for line in response.text.splitlines()]
+        assert llm_service.calls == 1
+        assert [e["question"] for e in events if e["type"] == "question"] == [
+            q["question"] for q in MOCK_INTERVIEW_QUESTIONS
+        ]
+
+    def test_key_uses_prepared_text(self, client, llm_service, bank, monkeypatch):
+        """Test that uploads are compared as prepared for the prompt, not as uploaded"""
+        monkeypatch.setattr(llm_service, "prepare_inputs", lambda resume, job: (resume, "Backend role"))
+        files = upload_files()
+        files["job_desc_file"] = ("jd.txt", io.BytesIO(MOCK_JOB_DESCRIPTION_FULLSTACK.encode()), "text/plain")
+
+        client.post("/api/v1/upload", files=upload_files())
+        client.post("/api/v1/upload", files=files)
+
+        assert llm_service.calls == 1
+
+    def test_documents_prepared_once(self, client, llm_service, bank):
+        """Test that the text prepared for the bank key is what generation is given"""
+        client.post("/api/v1/upload", files=upload_files())
+        client.post("/api/v1/upload/stream", files=reposted_files())
+
+        assert llm_service.prepared == 2
+        assert llm_service.calls == 1
+
+    def test_partial_result_not_banked(self, client, llm_service, bank):
+        """Test that a result the LLM service reports incomplete is not reused"""
+        llm_service.complete = False
+
+        client.post("/api/v1/upload", files=upload_files())
+        client.post("/api/v1/upload/stream", files=reposted_files())
+
+        assert llm_service.calls == 2
+        assert bank.stats()["entries"] == 0
+
+    def test_disabled_by_default(self, client, llm_service):
+        """Test that without the setting every upload reaches the LLM"""
+        client.post("/api/v1/upload", files=upload_files())
+        client.post("/api/v1/upload", files=reposted_files())
+
+        assert llm_service.calls == 2
+        assert client.get("/api/v1/cache/stats").json()["question_bank"] is None
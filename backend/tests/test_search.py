@@ -0,0 +1,159 @@
+"""
+Full-text search tests
+"""
+import pytest
+from sqlalchemy import text
+
+from app.models import InterviewQuestion, InterviewSession, SessionStatus, User
+from app.services.search import SEARCH_TARGETS, ensure_search_schema, fts5_query
+from app.services.sessions import save_generated_session
+from tests.conftest import TestingSessionLocal, engine
+
+
+def add_session(db, user, title, jd_text, questions=()):
+    session = InterviewSession(
+        user_id=user.id,
+        title=title,
+        status=SessionStatus.IN_PROGRESS,
+        resume_filename="resume.pdf",
+        resume_text="resume",
+        jd_filename="jd.pdf",
+        jd_text=jd_text,
+        total_questions=len(questions),
+    )
+    session.questions = [
+        InterviewQuestion(question_number=i + 1, question_text=question)
+        for i, question in enumerate(questions)
+    ]
+    db.add(session)
+    db.commit()
+    return session
+
+
+@pytest.fixture
+def search_db(client):
+    """Seeded sessions and questions with the full-text indexes in place"""
+    ensure_search_schema(engine)
+    db = TestingSessionLocal()
+    users = [User(email=f"u{i}@example.com", username=f"u{i}", hashed_password="x") for i in range(2)]
+    db.add_all(users)
+    db.commit()
+    add_session(db, users[0], "Platform engineer", "Run Kubernetes clusters and scale services", [
+        "How would you scale a Kubernetes deployment?",
+        "Tell me about a time you disagreed with a teammate.",
+    ])
+    add_session(db, users[0], "Kubernetes operator", "Write controllers in Go", [
+        "Explain the reconcile loop of a Kubernetes controller.",
+    ])
+    add_session(db, users[1], "Data engineer", "Batch pipelines, some Kubernetes", [
+        "How do you make a pipeline idempotent?",
+        "What happens when a Kubernetes pod is evicted?",
+    ])
+    yield db
+    db.close()
+    with engine.begin() as conn:
+        for target in SEARCH_TARGETS:
+            conn.execute(text(f"DROP TABLE IF EXISTS {target.fts_table}"))
+
+
+class TestSearchEndpoints:
+    """Test ranked, paginated search over questions and sessions"""
+
+    def test_question_search_stems_words(self, client, search_db):
+        """Test that matching uses stems, so 'scaling' finds 'scale'"""
+        results = client.get("/api/v1/search/questions", params={"q": "scaling kubernetes"}).json()
+
+        assert [r["question_text"] for r in results] == ["How would you scale a Kubernetes deployment?"]
+        assert results[0]["score"] > 0
+
+    def test_title_match_ranks_first(self, client, search_db):
+        """Test that a title match outranks matches in job description text"""
+        results = client.get("/api/v1/search/sessions", params={"q": "kubernetes"}).json()
+
+        assert [r["title"] for r in results][0] == "Kubernetes operator"
+        assert len(results) == 3
+        assert results[0]["score"] >= results[1]["score"] >= results[2]["score"]
+        assert "jd_text" not in results[0]
+
+    def test_saved_sessions_are_titled(self, client, search_db):
+        """Test that a generated session is titled by its job description's first line"""
+        user_id = search_db.query(User.id).filter(User.username == "u0").scalar()
+        jd_text = "\n  Site   Reliability Engineer\nKeep production healthy"
+        save_generated_session(search_db, user_id, "resume.pdf", "jd.txt", "resume", jd_text, [])
+
+        results = client.get("/api/v1/search/sessions", params={"q": "reliability"}).json()
+
+        assert [r["title"] for r in results] == ["Site Reliability Engineer"]
+
+    def test_pagination_covers_every_match_once(self, client, search_db):
+        """Test that following X-Next-Cursor returns each result exactly once, in rank order"""
+        everything = client.get("/api/v1/search/questions", params={"q": "kubernetes"}).json()
+        paged, cursor = [], None
+        while True:
+            params = {"q": "kubernetes", "limit": 1, **({"cursor": cursor} if cursor else {})}
+            response = client.get("/api/v1/search/questions", params=params)
+            paged += response.json()
+            cursor = response.headers.get("X-Next-Cursor")
+            if not cursor:
+                break
+
+        assert len(everything) == 3
+        assert [r["id"] for r in paged] == [r["id"] for r in everything]
+
+    def test_user_filter(self, client, search_db):
+        """Test restricting question search to one user's sessions"""
+        user_id = search_db.query(User.id).filter(User.username == "u1").scalar()
+
+        results = client.get("/api/v1/search/questions", params={"q": "kubernetes", "user_id": user_id}).json()
+
+        assert [r["question_text"] for r in results] == ["What happens when a Kubernetes pod is evicted?"]
+
+    def test_index_follows_writes(self, client, search_db):
+        """Test that updates and deletes reach the index without a rebuild"""
+        question = search_db.query(InterviewQuestion).filter(
+            InterviewQuestion.question_text.like("%idempotent%")
+        ).one()
+        question.question_text = "How do you make a pipeline replayable?"
+        search_db.delete(search_db.query(InterviewSession).filter(InterviewSession.title == "Kubernetes operator").one())
+        search_db.commit()
+
+        assert client.get("/api/v1/search/questions", params={"q": "idempotent"}).json() == []
+        assert len(client.get("/api/v1/search/questions", params={"q": "replayable"}).json()) == 1
+        assert len(client.get("/api/v1/search/sessions", params={"q": "kubernetes"}).json()) == 2
+
+    def test_query_syntax_is_not_interpreted(self, client, search_db):
+        """Test that FTS operators and stray quotes in user input are plain words"""
+        assert fts5_query('kubernetes" OR NEAR(') == '"kubernetes" "OR" "NEAR"'
+        assert client.get("/api/v1/search/questions", params={"q": '"("'}).json() == []
+        assert client.get("/api/v1/search/questions", params={"q": "pod AND"}).status_code == 200
+
+    def test_invalid_cursor(self, client, search_db):
+        """Test that a malformed cursor is a 400"""
+        response = client.get("/api/v1/search/sessions", params={"q": "kubernetes", "cursor": "nope"})
+
+        assert response.status_code == 400
+
+
+class TestSearchSchema:
+    """Test creating the full-text indexes"""
+
+    def test_existing_rows_are_indexed(self, client):
+        """Test that rows written before the index existed are searchable, and setup is idempotent"""
+        db = TestingSessionLocal()
+        user = User(email="u@example.com", username="u", hashed_password="x")
+        db.add(user)
+        db.commit()
+        add_session(db, user, "Backend engineer", "Python services", ["Describe Python generators."])
+        db.close()
+
+        applied = ensure_search_schema(engine)
+        assert ensure_search_schema(engine) == []
+        with engine.begin() as conn:
+            hits = conn.execute(text(
+                "SELECT rowid FROM interview_questions_fts WHERE interview_questions_fts MATCH 'generators'"
+            )).all()
+            for target in SEARCH_TARGETS:
+                conn.execute(text(f"DROP TABLE {target.fts_table}"))
+
+        assert any("rebuild" in ddl for ddl in applied)
+        assert len(hits) == 1
@@ -0,0 +1,870 @@
+"""
+Service layer tests
+"""
+import asyncio
+import io
+import json
+import os
+import sqlite3
+from unittest.mock import AsyncMock, Mock, patch
+
+import pytest
+from google.api_core.exceptions import ResourceExhausted
+from starlette.datastructures import UploadFile
+
+from app import services
+from app.services import QUESTION_CATEGORIES, LLMService, get_llm_service, merge_questions
+from app.models import QuestionType
+from app.services.cache import LRUCache, SQLiteCache, TieredCache
+from app.services.compaction import (
+    append_additional_context,
+    clean_job_description,
+    clean_text,
+    compact_job_description,
+    compact_text,
+)
+from app.services import extraction
+from app.services.extraction import (
+    ExtractorRegistry,
+    extract_document,
+    extract_document_async,
+    extract_pdf_text,
+    extraction_cache_key,
+    garbage_ratio,
+    split_page_ranges,
+)
+from app.services.parsing import QuestionStreamParser, parse_questions
+from app.services.ratelimit import LLMRateLimiter, TokenBucket
+from app.services.singleflight import SingleFlight
+from app.services.uploads import FileTooLargeError, spool_upload
+from benchmarks.corpus import make_pdf
+from tests.mock_data import (
+    MOCK_INTERVIEW_QUESTIONS,
+    MOCK_JOB_DESCRIPTION_BACKEND,
+    MOCK_PDF_CONTENT,
+    MOCK_RESUME_CONTENT,
+)
+
+
+class TestLRUCache:
+    """Test the size-bounded in-process cache"""
+
+    def test_get_and_set(self):
+        """Test basic hit and miss accounting"""
+        cache = LRUCache(max_bytes=1024)
+
+        assert cache.get("missing") is None
+        cache.set("key", "value")
+        assert cache.get("key") == "value"
+
+        stats = cache.stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+
+    def test_evicts_least_recently_used(self):
+        """Test that entries are evicted once the byte budget is exceeded"""
+        cache = LRUCache(max_bytes=10)
+        cache.set("a", "aaaa")
+        cache.set("b", "bbbb")
+        cache.get("a")
+        cache.set("c", "cccc")
+
+        assert cache.get("b") is None
+        assert cache.get("a") == "aaaa"
+        assert cache.get("c") == "cccc"
+        assert cache.stats()["bytes"] <= 10
+        assert cache.stats()["evictions"] == 1
+
+    def test_skips_values_larger_than_budget(self):
+        """Test that a single oversized value does not flush the cache"""
+        cache = LRUCache(max_bytes=4)
+        cache.set("a", "aa")
+        cache.set("huge", "x" * 100)
+
+        assert cache.get("huge") is None
+        assert cache.get("a") == "aa"
+
+
+    def test_entries_expire_after_ttl(self):
+        """Test that entries older than the TTL are treated as misses"""
+        cache = LRUCache(max_bytes=1024, ttl_seconds=60)
+
+        with patch("app.services.cache.time.monotonic", return_value=1000.0):
+            cache.set("key", "value")
+        with patch("app.services.cache.time.monotonic", return_value=1059.0):
+            assert cache.get("key") == "value"
+        with patch("app.services.cache.time.monotonic", return_value=1061.0):
+            assert cache.get("key") is None
+        assert cache.stats()["entries"] == 0
+
+
+class TestSQLiteCache:
+    """Test the SQLite cache backend"""
+
+    def test_ttl(self, tmp_path):
+        """Test that expired rows are not served"""
+        cache = SQLiteCache(str(tmp_path / "cache.sqlite3"), ttl_seconds=60)
+
+        with patch("app.services.cache.time.time", return_value=1000.0):
+            cache.set("key", "value")
+        with patch("app.services.cache.time.time", return_value=1061.0):
+            assert cache.get("key") is None
+
+    def test_prune_keeps_newest_entries(self, tmp_path):
+        """Test that pruning bounds the table to max_entries"""
+        cache = SQLiteCache(str(tmp_path / "cache.sqlite3"), max_entries=2)
+        for i in range(5):
+            with patch("app.services.cache.time.time", return_value=1000.0 + i):
+                cache.set(f"key{i}", "value")
+        cache.prune()
+
+        assert cache.get("key0") is None
+        assert cache.get("key3") == "value"
+        assert cache.get("key4") == "value"
+
+
+class TestTieredCache:
+    """Test the LRU + SQLite tiered cache"""
+
+    def test_sqlite_tier_is_shared(self, tmp_path):
+        """Test that a second cache instance (another worker) sees stored entries"""
+        path = str(tmp_path / "cache.sqlite3")
+        first = TieredCache([LRUCache(1024), SQLiteCache(path)])
+        first.set("key", "extracted text")
+
+        second = TieredCache([LRUCache(1024), SQLiteCache(path)])
+        assert second.get("key") == "extracted text"
+
+        stats = second.stats()
+        assert stats["hits"] == 1
+        assert stats["tiers"]["sqlite"]["hits"] == 1
+
+        # Promoted into the memory tier
+        assert second.get("key") == "extracted text"
+        assert second.stats()["tiers"]["memory"]["hits"] == 1
+
+    def test_miss_counts(self):
+        """Test that a miss across every tier is counted once"""
+        cache = TieredCache([LRUCache(1024)])
+        assert cache.get("missing") is None
+        assert cache.stats()["misses"] == 1
+
+
+class TestPageParallelExtraction:
+    """Test page-parallel PDF extraction"""
+
+    def test_split_page_ranges(self):
+        """Test that ranges are contiguous, ordered and cover every page"""
+        assert split_page_ranges(10, 4) == [(0, 3), (3, 6), (6, 8), (8, 10)]
+        assert split_page_ranges(2, 4) == [(0, 1), (1, 2)]
+        assert split_page_ranges(1, 1) == [(0, 1)]
+
+    def test_parallel_matches_serial(self):
+        """Test that parallel extraction reassembles pages in order"""
+        pdf = make_pdf(pages=5, lines_per_page=3)
+
+        serial = extract_pdf_text(pdf, parallel=False)
+        assert extract_pdf_text(pdf, parallel=True) == serial
+        assert serial.index("Page 1 of 5") < serial.index("Page 5 of 5")
+
+    def test_process_executor_uses_forkserver(self, monkeypatch):
+        """Test that the "process" extraction executor starts its workers with forkserver"""
+        monkeypatch.setattr(extraction.settings, "extraction_executor", "process")
+        monkeypatch.setattr(extraction, "_executor", None)
+        try:
+            executor = extraction.get_extraction_executor()
+            text = executor.submit(extract_document, MOCK_JOB_DESCRIPTION_BACKEND.encode(), "jd.txt").result().text
+
+            assert executor._mp_context.get_start_method() == "forkserver"
+            assert "Senior" in text
+        finally:
+            extraction.shutdown_extraction_executor()
+
+
+class TestExtractorRegistry:
+    """Test the fast-path extractor registry"""
+
+    def test_text_layer_pdf_uses_fast_path(self):
+        """Test that a clean text-layer PDF is served by PyPDF2"""
+        result = extract_document(make_pdf(pages=2, lines_per_page=10), "resume.pdf")
+
+        assert result.extractor == "pypdf2"
+        assert [a.outcome for a in result.attempts] == ["accepted"]
+        assert "Page 2 of 2" in result.text
+
+    def test_short_output_falls_back(self):
+        """Test that output failing the quality check falls through to pdfplumber"""
+        result = extract_document(MOCK_PDF_CONTENT, "resume.pdf")
+
+        assert result.extractor == "pdfplumber"
+        assert [(a.extractor, a.outcome) for a in result.attempts] == [
+            ("pypdf2", "rejected"), ("pdfplumber", "accepted"),
+        ]
+
+    def test_txt_decoding_fallback(self):
+        """Test that non-UTF-8 text falls back to latin-1"""
+        assert extract_document("Café".encode("utf-8"), "jd.txt").extractor == "utf-8"
+        result = extract_document("Café".encode("latin-1"), "jd.txt")
+        assert result.extractor == "latin-1"
+        assert result.text == "Café"
+
+    def test_errors_fall_through_and_stats_are_recorded(self):
+        """Test error handling and per-extractor timing counters"""
+        registry = ExtractorRegistry()
+
+        def broken(file_bytes):
+            raise ValueError("bad file")
+
+        registry.register(["pdf"], "broken", broken)
+        registry.register(["pdf"], "fallback", lambda b: "text")
+        registry.record(registry.extract(b"", "x.pdf"))
+
+        stats = registry.stats()
+        assert stats["broken"]["error"] == 1
+        assert stats["fallback"]["accepted"] == 1
+
+    def test_garbage_ratio(self):
+        """Test detection of broken text layers"""
+        assert garbage_ratio("Plain readable text") == 0.0
+        assert garbage_ratio("\ufffd\ufffd ab") == 0.5
+
+
+class TestExtractionCacheKey:
+    """Test content-addressed extraction cache keys"""
+
+    def test_key_depends_on_content_and_extension(self):
+        """Test that the key changes with bytes and extension but not filename"""
+        key = extraction_cache_key(b"content", "resume.pdf")
+
+        assert key == extraction_cache_key(b"content", "other-name.PDF")
+        assert key != extraction_cache_key(b"content", "resume.txt")
+        assert key != extraction_cache_key(b"different", "resume.pdf")
+
+
+class BrokenCache:
+    """A cache tier whose backend is down"""
+
+    name = "broken"
+
+    def get(self, key):
+        raise sqlite3.OperationalError("database is locked")
+
+    def set(self, key, value):
+        raise sqlite3.OperationalError("database is locked")
+
+
+class TestExtractionCache:
+    """Test the extracted-text cache around extraction"""
+
+    @pytest.mark.asyncio
+    async def test_cache_errors_do_not_fail_extraction(self, monkeypatch):
+        """Test that a failing cache tier is treated as a miss and a skipped write"""
+        monkeypatch.setattr(extraction, "_cache", TieredCache([BrokenCache()]))
+
+        result = await extract_document_async(MOCK_JOB_DESCRIPTION_BACKEND.encode(), "jd.txt")
+
+        assert result.text == MOCK_JOB_DESCRIPTION_BACKEND
+        assert result.extractor == "utf-8"
+
+    def test_sqlite_tier_is_bounded(self, tmp_path, monkeypatch):
+        """Test that the shared SQLite tier gets the configured entry cap"""
+        monkeypatch.setattr(extraction, "_cache", None)
+        monkeypatch.setattr(extraction.settings, "extraction_cache_path", str(tmp_path / "cache.sqlite3"))
+        monkeypatch.setattr(extraction.settings, "extraction_cache_max_entries", 50)
+
+        sqlite_tier = extraction.get_extraction_cache().tiers[1]
+
+        assert sqlite_tier.max_entries == 50
+
+
+def make_upload(data: bytes, filename: str = "resume.pdf") -> UploadFile:
+    return UploadFile(file=io.BytesIO(data), filename=filename)
+
+
+class TestSpoolUpload:
+    """Test chunked, size-enforced upload spooling"""
+
+    @pytest.mark.asyncio
+    async def test_small_upload_stays_in_memory(self):
+        """Test that uploads under the threshold are not written to disk"""
+        with await spool_upload(make_upload(b"content"), max_bytes=1024, memory_threshold=1024) as document:
+            assert not document.on_disk
+            assert document.size == 7
+            assert document.read_bytes() == b"content"
+            assert extraction_cache_key(document, "resume.pdf") == extraction_cache_key(b"content", "resume.pdf")
+
+    @pytest.mark.asyncio
+    async def test_large_upload_spooled_and_removed(self):
+        """Test that uploads over the threshold go to a temp file that close() deletes"""
+        pdf = make_pdf(pages=3, lines_per_page=10)
+        document = await spool_upload(make_upload(pdf), max_bytes=len(pdf), memory_threshold=1024)
+
+        assert document.on_disk
+        path = document.path
+        with document.open() as f:
+            assert f.read() == pdf
+        assert extract_pdf_text(document, parallel=True) == extract_pdf_text(pdf, parallel=False)
+        assert extract_document(document, "resume.pdf").extractor == "pypdf2"
+
+        document.close()
+        assert not os.path.exists(path)
+
+    @pytest.mark.asyncio
+    async def test_oversized_upload_rejected_early(self):
+        """Test that reading stops once the limit is crossed, leaving no temp file"""
+        upload = make_upload(b"x" * (1024 * 1024))
+
+        with pytest.raises(FileTooLargeError):
+            await spool_upload(upload, max_bytes=100 * 1024, memory_threshold=1024)
+
+        # Stopped at the first chunk past the limit, not at the end of the file
+        assert upload.file.tell() < 1024 * 1024
+
+
+@pytest.fixture
+def gemini_model():
+    """Patch the Gemini model and give each test an empty in-memory result cache"""
+    with patch("app.services.genai.GenerativeModel") as mock_model, \
+            patch("app.services.get_llm_cache", return_value=LRUCache(1024 * 1024, ttl_seconds=60)):
+        response = Mock()
+        response.text = json.dumps(MOCK_INTERVIEW_QUESTIONS)
+        mock_model.return_value.generate_content.return_value = response
+        yield mock_model.return_value
+
+
+class TestLLMResultCache:
+    """Test caching of generated questions"""
+
+    def test_identical_inputs_hit_cache(self, gemini_model):
+        """Test that byte-identical (after normalization) inputs skip Gemini"""
+        service = LLMService()
+
+        first = service.generate_interview_questions(MOCK_RESUME_CONTENT, MOCK_JOB_DESCRIPTION_BACKEND)
+        second = service.generate_interview_questions(
+            MOCK_RESUME_CONTENT.replace("\n", "\r\n") + "  \n", MOCK_JOB_DESCRIPTION_BACKEND
+        )
+
+        assert first == second == MOCK_INTERVIEW_QUESTIONS
+        assert gemini_model.generate_content.call_count == 1
+
+    def test_different_inputs_miss_cache(self, gemini_model):
+        """Test that changed inputs trigger a new generation"""
+        service = LLMService()
+
+        service.generate_interview_questions(MOCK_RESUME_CONTENT, MOCK_JOB_DESCRIPTION_BACKEND)
+        service.generate_interview_questions(MOCK_RESUME_CONTENT, "A different job")
+
+        assert gemini_model.generate_content.call_count == 2
+
+    def test_failures_are_not_cached(self, gemini_model):
+        """Test that an empty result after an error is retried next time"""
+        service = LLMService()
+        response = gemini_model.generate_content.return_value
+        gemini_model.generate_content.side_effect = [Exception("API Error"), response]
+
+        assert service.generate_interview_questions(MOCK_RESUME_CONTENT, MOCK_JOB_DESCRIPTION_BACKEND) == []
+        assert service.generate_interview_questions(
+            MOCK_RESUME_CONTENT, MOCK_JOB_DESCRIPTION_BACKEND
+        ) == MOCK_INTERVIEW_QUESTIONS
+
+    def test_cache_key_covers_model_name(self, gemini_model):
+        """Test that switching models changes the cache key"""
+        service = LLMService()
+        key = service.cache_key("resume", "jd")
+
+        service.model_name = "gemini-1.5-pro"
+        assert service.cache_key("resume", "jd") != key
+
+
+def estimate(text):
+    return LLMService.estimate_tokens(text)
+
+
+class TestPromptCompaction:
+    """Test prompt compaction of extracted documents"""
+
+    def test_page_boilerplate_removed(self):
+        """Test that repeated headers/footers, page numbers and hyphen breaks are cleaned up"""
+        pages = [
+            f"Jane Doe - Resume\n{skill}   with\tdistri-\nbuted systems\n{i}\nConfidential"
+            for i, skill in enumerate(["Python", "Go", "Rust"], start=1)
+        ]
+        text = clean_text("\f".join(pages))
+
+        assert text == (
+            "Python with distributed systems\n"
+            "Go with distributed systems\n"
+            "Rust with distributed systems"
+        )
+
+    def test_extracted_pdf_headers_removed(self):
+        """Test that the "Page N of M" footers of an extracted PDF are dropped"""
+        text = extract_document(make_pdf(pages=3, lines_per_page=10), "resume.pdf").text
+
+        assert "Page 1 of 3" in text
+        assert "Page 1 of 3" not in clean_text(text)
+
+    def test_two_page_resume_keeps_repeated_content(self):
+        """Test that lines on both pages of a short resume are content, not headers"""
+        pages = [
+            "Acme Corp\nBackend engineer\nPython\nBuilt billing services",
+            "Acme Corp\nPlatform engineer\nPython\nRan Kubernetes clusters",
+        ]
+
+        text = clean_text("\f".join(pages))
+
+        assert text.count("Acme Corp") == 2
+        assert text.count("Python") == 2
+
+    def test_only_page_edges_are_headers(self):
+        """Test that a line repeated mid-page is kept while the running header goes"""
+        pages = [
+            f"Jane Doe - Resume\nRole {i}\nDetails {i}\nPython\nMore {i}\nEven more {i}\nLast {i}\nEnd {i}"
+            for i in "ABC"
+        ]
+
+        text = clean_text("\f".join(pages))
+
+        assert "Jane Doe" not in text
+        assert text.count("Python") == 3
+
+    def test_eeo_boilerplate_removed(self):
+        """Test that equal-opportunity paragraphs are dropped from job descriptions only"""
+        jd = (
+            "Backend engineer working on APIs.\n\n"
+            "We are an equal opportunity employer and value diversity."
+        )
+        assert clean_job_description(jd) == "Backend engineer working on APIs."
+        assert "equal opportunity" in clean_text(jd)
+
+    def test_trimmed_to_budget(self):
+        """Test that documents over budget are cut and token counts are reported"""
+        text = "\n".join(f"Line {i} of a very long resume section" for i in range(500))
+
+        result = compact_text(text, max_tokens=200, count_tokens=estimate)
+
+        assert result.truncated
+        assert result.tokens_before > result.tokens_after
+        assert result.tokens_after <= 200
+        assert text.startswith(result.text)
+
+    def test_additional_context_kept(self):
+        """Test that trimming a job description never drops the user's additional context"""
+        jd = append_additional_context("Requirement line\n" * 500, "Focus on system design")
+
+        result = compact_job_description(jd, max_tokens=100, count_tokens=estimate)
+
+        assert result.truncated
+        assert result.text.endswith("ADDITIONAL CONTEXT:\nFocus on system design")
+
+    def test_service_prompts_with_compacted_text(self, gemini_model):
+        """Test that LLMService sends compacted text and records the savings"""
+        service = LLMService()
+        resume = MOCK_RESUME_CONTENT + "\n\f" + MOCK_RESUME_CONTENT
+
+        service.generate_interview_questions(resume, MOCK_JOB_DESCRIPTION_BACKEND)
+
+        prompt = gemini_model.generate_content.call_args[0][0]
+        assert "\f" not in prompt
+        stats = service.compaction.stats()
+        assert stats["documents"] == 2
+        assert stats["tokens_after"] < stats["tokens_before"]
+
+    @pytest.mark.asyncio
+    async def test_prepared_inputs_not_prepared_again(self, gemini_model):
+        """Test that prepared=True generates from the given text without compacting it again"""
+        gemini_model.generate_content_async = AsyncMock(
+            return_value=Mock(text=json.dumps(MOCK_INTERVIEW_QUESTIONS), usage_metadata=None)
+        )
+        service = LLMService()
+        resume, job = service.prepare_inputs(MOCK_RESUME_CONTENT + "\n\f" + MOCK_RESUME_CONTENT, MOCK_JOB_DESCRIPTION_BACKEND)
+
+        questions = await service.agenerate_interview_questions(resume, job, prepared=True)
+
+        assert questions == MOCK_INTERVIEW_QUESTIONS
+        assert service.compaction.stats()["documents"] == 2
+
+
+class TestLLMStreaming:
+    """Test streaming generation through LLMService"""
+
+    @pytest.mark.asyncio
+    async def test_streams_questions_and_caches_result(self, gemini_model):
+        """Test that chunks are parsed incrementally and the full result is cached"""
+        text = json.dumps(MOCK_INTERVIEW_QUESTIONS)
+
+        async def chunks():
+            for i in range(0, len(text), 50):
+                yield Mock(text=text[i:i + 50])
+
+        async def generate_content_async(prompt, generation_config=None, stream=False):
+            assert stream is True
+            return chunks()
+
+        gemini_model.generate_content_async = generate_content_async
+        service = LLMService()
+
+        streamed = [q async for q in service.astream_interview_questions(MOCK_RESUME_CONTENT, "JD")]
+        assert streamed == MOCK_INTERVIEW_QUESTIONS
+
+        # Second call is served from the cache without touching Gemini
+        gemini_model.generate_content_async = None
+        cached = [q async for q in service.astream_interview_questions(MOCK_RESUME_CONTENT, "JD")]
+        assert cached == MOCK_INTERVIEW_QUESTIONS
+
+
+@pytest.fixture
+def fanout_model(gemini_model, monkeypatch):
+    """Gemini stub for fan-out mode: each call sleeps 0.2s and answers for its category"""
+    monkeypatch.setattr(services.settings, "question_generation_mode", "fanout")
+    failing = set()
+
+    async def generate_content_async(prompt, generation_config=None, stream=False):
+        await asyncio.sleep(0.2)
+        for question_type, focus in QUESTION_CATEGORIES.items():
+            if focus in prompt:
+                if question_type in failing:
+                    raise RuntimeError(f"{question_type.value} failed")
+                questions = [
+                    {"question": f"{question_type.value} question", "answer": "answer"},
+                    {"question": "Tell me about yourself.", "answer": "shared"},
+                ]
+                return Mock(text=json.dumps(questions), usage_metadata=None)
+
+    gemini_model.generate_content_async = generate_content_async
+    gemini_model.failing = failing
+    return gemini_model
+
+
+class TestFanoutGeneration:
+    """Test per-question-type fan-out generation"""
+
+    @pytest.mark.asyncio
+    async def test_categories_run_concurrently_and_merge_in_order(self, fanout_model):
+        """Test that latency tracks one call and results are merged, deduplicated and tagged"""
+        service = LLMService()
+
+        started = asyncio.get_running_loop().time()
+        questions = await service.agenerate_interview_questions(MOCK_RESUME_CONTENT, "JD")
+        elapsed = asyncio.get_running_loop().time() - started
+
+        assert elapsed < 0.6
+        assert [q["question"] for q in questions] == [
+            "technical question", "Tell me about yourself.",
+            "experience question", "behavioral question", "situational question",
+        ]
+        assert [q["type"] for q in questions] == [
+            "technical", "technical", "experience", "behavioral", "situational",
+        ]
+
+    @pytest.mark.asyncio
+    async def test_failed_category_is_skipped_and_not_cached(self, fanout_model):
+        """Test that one failing type still returns the others, and the partial result is retried"""
+        service = LLMService()
+        fanout_model.failing.add(QuestionType.BEHAVIORAL)
+
+        questions = await service.agenerate_interview_questions(MOCK_RESUME_CONTENT, "JD")
+        assert "behavioral question" not in [q["question"] for q in questions]
+        assert len(questions) == 4
+
+        fanout_model.failing.clear()
+        questions = await service.agenerate_interview_questions(MOCK_RESUME_CONTENT, "JD")
+        assert "behavioral question" in [q["question"] for q in questions]
+
+    @pytest.mark.asyncio
+    async def test_only_complete_results_reported(self, fanout_model):
+        """Test that on_complete sees the full result, and neither a partial one nor a partial stream"""
+        service = LLMService()
+        completed = []
+        fanout_model.failing.add(QuestionType.BEHAVIORAL)
+
+        await service.agenerate_interview_questions(MOCK_RESUME_CONTENT, "JD", on_complete=completed.append)
+        [q async for q in service.astream_interview_questions(MOCK_RESUME_CONTENT, "JD", on_complete=completed.append)]
+        assert completed == []
+
+        fanout_model.failing.clear()
+        questions = await service.agenerate_interview_questions(MOCK_RESUME_CONTENT, "JD", on_complete=completed.append)
+        # Served from the cache
+        await service.agenerate_interview_questions(MOCK_RESUME_CONTENT, "JD", on_complete=completed.append)
+        assert completed == [questions, questions]
+
+    @pytest.mark.asyncio
+    async def test_streaming_fanout(self, fanout_model):
+        """Test that streaming yields every type's questions once, and raises only if all fail"""
+        service = LLMService()
+
+        streamed = [q async for q in service.astream_interview_questions(MOCK_RESUME_CONTENT, "JD")]
+        assert sorted(q["question"] for q in streamed) == sorted([
+            "technical question", "experience question", "behavioral question",
+            "situational question", "Tell me about yourself.",
+        ])
+
+        fanout_model.failing.update(QUESTION_CATEGORIES)
+        with pytest.raises(RuntimeError):
+            [q async for q in service.astream_interview_questions(MOCK_RESUME_CONTENT, "Other JD")]
+
+    def test_merge_questions_dedupes_case_and_punctuation(self):
+        """Test that near-identical question texts are merged"""
+        merged = merge_questions([
+            [{"question": "What is REST?"}], [{"question": "what is rest"}, {"question": "Why Go?"}],
+        ])
+        assert merged == [{"question": "What is REST?"}, {"question": "Why Go?"}]
+
+
+class TestQuestionStreamParser:
+    """Test incremental parsing of streamed model output"""
+
+    def feed_in_chunks(self, text, size):
+        parser = QuestionStreamParser()
+        questions = []
+        for i in range(0, len(text), size):
+            questions.extend(parser.feed(text[i:i + size]))
+        return questions
+
+    @pytest.mark.parametrize("size", [1, 7, 64, 100000])
+    def test_parses_array_across_chunk_boundaries(self, size):
+        """Test that questions are recovered however the stream is split"""
+        text = json.dumps(MOCK_INTERVIEW_QUESTIONS, indent=2)
+
+        assert self.feed_in_chunks(text, size) == MOCK_INTERVIEW_QUESTIONS
+
+    def test_emits_each_question_as_soon_as_it_closes(self):
+        """Test that a question is returned before the array is finished"""
+        parser = QuestionStreamParser()
+
+        assert parser.feed('[{"question": "Q1", "answer": "A1"}, {"question": "Q2", ') == [
+            {"question": "Q1", "answer": "A1"}
+        ]
+        assert parser.feed('"answer": "A2"}]') == [{"question": "Q2", "answer": "A2"}]
+        assert parser.emitted == 2
+
+    def test_skips_markdown_fences_and_wrapper_object(self):
+        """Test fenced output and a {"questions": [...]} wrapper"""
+        text = "```json\n" + json.dumps({"questions": MOCK_INTERVIEW_QUESTIONS[:2]}) + "\n```"
+
+        assert self.feed_in_chunks(text, 5) == MOCK_INTERVIEW_QUESTIONS[:2]
+
+    def test_braces_and_quotes_inside_strings(self):
+        """Test that braces and escaped quotes in strings do not confuse the parser"""
+        question = {"question": 'What does "{}" mean in a dict {literal]?', "answer": "An empty dict \\ set"}
+
+        assert self.feed_in_chunks(json.dumps([question]), 3) == [question]
+
+
+class TestParseQuestions:
+    """Test parsing of complete (possibly truncated) model responses"""
+
+    def test_valid_json(self):
+        """Test that well-formed output is parsed without recovery"""
+        result = parse_questions(json.dumps(MOCK_INTERVIEW_QUESTIONS))
+
+        assert result.questions == MOCK_INTERVIEW_QUESTIONS
+        assert result.recovered is False
+
+    def test_fenced_json_and_wrapper(self):
+        """Test markdown fences and the questions_answers wrapper"""
+        text = "```json\n" + json.dumps({"questions_answers": MOCK_INTERVIEW_QUESTIONS}) + "\n```"
+
+        assert parse_questions(text).questions == MOCK_INTERVIEW_QUESTIONS
+
+    def test_truncated_output_is_salvaged(self):
+        """Test that output cut off mid-array keeps every complete question"""
+        full = json.dumps(MOCK_INTERVIEW_QUESTIONS[:3])
+        truncated = full[: full.index(MOCK_INTERVIEW_QUESTIONS[2]["answer"]) + 10]
+
+        result = parse_questions("```json\n" + truncated)
+
+        assert result.recovered is True
+        assert result.questions == MOCK_INTERVIEW_QUESTIONS[:2]
+
+    def test_garbage_returns_nothing(self):
+        """Test that non-JSON output yields an empty, recovered result"""
+        result = parse_questions("I'm sorry, I can't help with that.")
+
+        assert result.questions == []
+        assert result.recovered is True
+
+    def test_service_returns_salvaged_questions(self, gemini_model):
+        """Test that LLMService keeps questions from a truncated response"""
+        full = json.dumps(MOCK_INTERVIEW_QUESTIONS)
+        gemini_model.generate_content.return_value.text = full[:-40]
+
+        questions = LLMService().generate_interview_questions(MOCK_RESUME_CONTENT, "JD")
+
+        assert questions == MOCK_INTERVIEW_QUESTIONS[:-1]
+
+    def test_structured_output_config(self, gemini_model):
+        """Test that structured-output mode requests JSON with a schema"""
+        params = LLMService()._generation_params()
+
+        assert params["response_mime_type"] == "application/json"
+        assert params["response_schema"]["items"]["required"] == ["question", "answer"]
+
+
+class TestTokenBucket:
+    """Test the requests/tokens-per-minute bucket"""
+
+    def test_queues_instead_of_rejecting(self):
+        """Test that callers beyond the budget are told to wait, in order"""
+        with patch("app.services.ratelimit.time.monotonic", return_value=0.0):
+            bucket = TokenBucket(rate_per_minute=60)
+            assert bucket.reserve(60) == 0.0
+            assert bucket.reserve(1) == pytest.approx(1.0)
+            assert bucket.reserve(1) == pytest.approx(2.0)
+
+    def test_refills_over_time(self):
+        """Test that tokens come back at the configured rate"""
+        with patch("app.services.ratelimit.time.monotonic", return_value=0.0):
+            bucket = TokenBucket(rate_per_minute=60)
+            bucket.reserve(60)
+        with patch("app.services.ratelimit.time.monotonic", return_value=30.0):
+            assert bucket.reserve(30) == 0.0
+
+    def test_adjust_refunds_overestimate(self):
+        """Test that reporting actual usage corrects the balance"""
+        with patch("app.services.ratelimit.time.monotonic", return_value=0.0):
+            bucket = TokenBucket(rate_per_minute=100)
+            bucket.reserve(100)
+            bucket.adjust(-50)
+            assert bucket.reserve(50) == 0.0
+
+
+class TestLLMRateLimiter:
+    """Test the outbound concurrency limiter"""
+
+    @pytest.mark.asyncio
+    async def test_caps_concurrency(self):
+        """Test that no more than max_concurrency calls run at once"""
+        limiter = LLMRateLimiter(max_concurrency=2)
+        peak = 0
+
+        async def call():
+            nonlocal peak
+            async with limiter.limit():
+                peak = max(peak, limiter.in_flight)
+                await asyncio.sleep(0.01)
+
+        await asyncio.gather(*(call() for _ in range(10)))
+
+        assert peak == 2
+        assert limiter.stats()["in_flight"] == 0
+
+
+class TestPooledLLMService:
+    """Test the shared LLM client"""
+
+    def test_service_is_reused(self):
+        """Test that get_llm_service returns one instance per process"""
+        assert get_llm_service() is get_llm_service()
+
+    def test_quota_errors_are_retried(self, gemini_model):
+        """Test that a 429 is retried instead of surfacing as an empty result"""
+        response = gemini_model.generate_content.return_value
+        gemini_model.generate_content.side_effect = [ResourceExhausted("quota"), response]
+
+        with patch("app.services.time.sleep") as sleep:
+            questions = LLMService().generate_interview_questions(MOCK_RESUME_CONTENT, "JD")
+
+        assert questions == MOCK_INTERVIEW_QUESTIONS
+        assert sleep.call_count == 1
+
+
+class TestSingleFlight:
+    """Test coalescing of identical in-flight calls"""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_callers_share_one_execution(self):
+        """Test that callers with the same key get one result from one call"""
+        flight = SingleFlight()
+        calls = 0
+
+        async def work():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return "result"
+
+        results = await asyncio.gather(*(flight.do("key", work) for _ in range(5)))
+
+        assert results == ["result"] * 5
+        assert calls == 1
+        assert flight.stats() == {"executions": 1, "coalesced": 4, "in_flight": 0}
+
+    @pytest.mark.asyncio
+    async def test_error_reaches_every_waiter_and_is_not_cached(self):
+        """Test error propagation and that the next call retries"""
+        flight = SingleFlight()
+
+        async def fail():
+            await asyncio.sleep(0.01)
+            raise RuntimeError("boom")
+
+        results = await asyncio.gather(*(flight.do("key", fail) for _ in range(3)), return_exceptions=True)
+        assert all(isinstance(r, RuntimeError) for r in results)
+
+        async def succeed():
+            return "ok"
+
+        assert await flight.do("key", succeed) == "ok"
+
+    @pytest.mark.asyncio
+    async def test_cancelling_one_waiter_keeps_shared_call(self):
+        """Test that a cancelled caller does not cancel the call for others"""
+        flight = SingleFlight()
+
+        async def work():
+            await asyncio.sleep(0.05)
+            return "result"
+
+        first = asyncio.create_task(flight.do("key", work))
+        second = asyncio.create_task(flight.do("key", work))
+        await asyncio.sleep(0.01)
+        first.cancel()
+
+        assert await second == "result"
+        with pytest.raises(asyncio.CancelledError):
+            await first
+
+    @pytest.mark.asyncio
+    async def test_cancelling_all_waiters_cancels_call(self):
+        """Test that the shared call is cancelled once nobody is waiting"""
+        flight = SingleFlight()
+        started = asyncio.Event()
+        cancelled = asyncio.Event()
+
+        async def work():
+            started.set()
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        waiter = asyncio.create_task(flight.do("key", work))
+        await started.wait()
+        waiter.cancel()
+        await asyncio.wait_for(cancelled.wait(), timeout=1)
+
+        assert flight.stats()["in_flight"] == 0
+
+    @pytest.mark.asyncio
+    async def test_service_coalesces_identical_generations(self, gemini_model):
+        """Test that concurrent identical uploads make one Gemini call"""
+        calls = 0
+
+        async def generate_content_async(prompt, generation_config=None):
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.02)
+            return Mock(text=json.dumps(MOCK_INTERVIEW_QUESTIONS), usage_metadata=None)
+
+        gemini_model.generate_content_async = generate_content_async
+        service = LLMService()
+        service.cache = None
+
+        results = await asyncio.gather(
+            *(service.agenerate_interview_questions(MOCK_RESUME_CONTENT, "JD") for _ in range(5))
+        )
+
+        assert calls == 1
+        assert all(r == MOCK_INTERVIEW_QUESTIONS for r in results)
@@ -0,0 +1,37 @@
+"""
+Startup cost tests
+"""
+import os
+import subprocess
+import sys
+
+from app import services
+
+HEAVY_MODULES = ("google.generativeai", "pdfplumber", "docx", "PyPDF2", "numpy")
+
+
+class TestLazyImports:
+    """Test that importing the app leaves the heavy libraries unloaded"""
+
+    def test_app_import_skips_heavy_modules(self, tmp_path):
+        """Test that app.main imports without the parsers or the Gemini client"""
+        code = (
+            "import sys, app.main; "
+            f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+        )
+        env = dict(os.environ, DATABASE_URL=f"sqlite:///{tmp_path / 'db.sqlite'}")
+        result = subprocess.run(
+            [sys.executable, "-c", code],
+            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+            env=env, capture_output=True, text=True, check=True,
+        )
+
+        assert result.stdout.strip() == ""
+        # Importing must not create the schema either
+        assert not (tmp_path / "db.sqlite").exists()
+
+    def test_genai_resolves_on_attribute_access(self):
+        """Test that app.services.genai still names the client module"""
+        import google.generativeai
+
+        assert services.genai is google.generativeai
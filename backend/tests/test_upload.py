@@ -0,0 +1,387 @@
+"""
+Upload pipeline tests
+"""
+import asyncio
+import io
+import json
+import time
+
+import httpx
+import pytest
+from fastapi import FastAPI, File, UploadFile
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+
+from app.api import endpoints
+from app.api.middleware import RequestSizeLimitMiddleware
+from app.database import Base, get_async_db, get_db
+from app.main import app
+from app.models import User
+from app.services.extraction import get_extraction_cache
+from app.services.sessions import get_or_create_anonymous_user
+from tests.conftest import TestingSessionLocal, override_get_db, upload_files
+from tests.mock_data import MOCK_INTERVIEW_QUESTIONS
+
+
+class TestAsyncUpload:
+    """Test that /upload does not block the event loop"""
+
+    def test_upload_returns_questions(self, client, llm_service):
+        """Test the upload pipeline end to end with a stubbed LLM"""
+        response = client.post("/api/v1/upload", files=upload_files())
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["questions_count"] == len(MOCK_INTERVIEW_QUESTIONS)
+        assert llm_service.calls == 1
+
+    @pytest.mark.asyncio
+    async def test_health_served_during_generation(self, db_session, llm_service, monkeypatch):
+        """Test that /health answers while a slow generation is in flight"""
+        # No lifespan runs here, so point the upload at the test database
+        monkeypatch.setitem(app.dependency_overrides, get_db, override_get_db)
+        llm_service.delay = 1.0
+        transport = httpx.ASGITransport(app=app)
+
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as ac:
+            upload = asyncio.create_task(ac.post("/api/v1/upload", files=upload_files()))
+            await asyncio.sleep(0.1)
+
+            started = time.perf_counter()
+            health = await ac.get("/health")
+            health_latency = time.perf_counter() - started
+
+            assert health.status_code == 200
+            assert not upload.done()
+            assert health_latency < 0.5
+            assert (await upload).status_code == 200
+
+
+class TestExtractionCache:
+    """Test that repeat uploads are served from the extraction cache"""
+
+    def test_repeat_upload_hits_cache(self, client, llm_service):
+        """Test that uploading the same documents twice skips re-extraction"""
+        cache = get_extraction_cache()
+        cache.clear()
+        before = client.get("/api/v1/cache/stats").json()["extraction"]
+
+        client.post("/api/v1/upload", files=upload_files())
+        client.post("/api/v1/upload", files=upload_files())
+
+        after = client.get("/api/v1/cache/stats").json()["extraction"]
+        assert after["misses"] - before["misses"] == 2
+        assert after["hits"] - before["hits"] == 2
+
+
+@pytest.fixture
+def unreachable_db(tmp_path, monkeypatch):
+    """Requests get a database session that cannot connect"""
+    broken = sessionmaker(bind=create_engine(f"sqlite:///{tmp_path}/missing/db.sqlite"))
+
+    def get_broken_db():
+        db = broken()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    monkeypatch.setitem(app.dependency_overrides, get_db, get_broken_db)
+
+
+class TestUploadPersistence:
+    """Test that upload results are stored as interview sessions"""
+
+    def test_upload_stores_session_and_questions(self, client, llm_service):
+        """Test that /upload returns a session id whose questions are stored in order"""
+        data = client.post("/api/v1/upload", files=upload_files()).json()
+
+        questions = client.get(f"/api/v1/sessions/{data['session_id']}/questions").json()
+        assert [q["question_text"] for q in questions] == [q["question"] for q in MOCK_INTERVIEW_QUESTIONS]
+        assert [q["expected_answer"] for q in questions] == [q["answer"] for q in MOCK_INTERVIEW_QUESTIONS]
+
+        status = client.get(f"/api/v1/sessions/{data['session_id']}/status").json()
+        assert status["status"] == "in_progress"
+        assert status["total_questions"] == len(MOCK_INTERVIEW_QUESTIONS)
+
+    def test_stream_stores_session(self, client, llm_service):
+        """Test that the done event of a stream carries the stored session id"""
+        response = client.post("/api/v1/upload/stream", files=upload_files())
+        done = json.loads(response.text.splitlines()[-1])
+
+        questions = client.get(f"/api/v1/sessions/{done['session_id']}/questions").json()
+        assert len(questions) == done["questions_count"]
+
+    def test_unknown_user_rejected_before_generation(self, client, llm_service):
+        """Test that an unknown user_id is a 404 without calling the LLM"""
+        response = client.post("/api/v1/upload", files=upload_files(), data={"user_id": "999"})
+
+        assert response.status_code == 404
+        assert llm_service.calls == 0
+
+    def test_empty_result_not_stored(self, client, llm_service):
+        """Test that a failed generation does not create a session"""
+        async def no_questions(resume_content, job_description, on_complete=None):
+            return []
+
+        llm_service.agenerate_interview_questions = no_questions
+
+        assert client.post("/api/v1/upload", files=upload_files()).json()["session_id"] is None
+
+    def test_concurrent_anonymous_user_creation(self, db_session):
+        """Test that losing the race to create the anonymous user returns the winner's row"""
+        add = db_session.add
+
+        def add_after_concurrent_insert(instance):
+            # Another request commits the user between our query and our insert
+            other = TestingSessionLocal()
+            try:
+                get_or_create_anonymous_user(other)
+            finally:
+                other.close()
+            add(instance)
+
+        db_session.add = add_after_concurrent_insert
+        user = get_or_create_anonymous_user(db_session)
+
+        assert user.id is not None
+        assert db_session.query(User).count() == 1
+
+    def test_owner_lookup_releases_connection(self, db_session):
+        """Test that checking the owner does not keep a connection through generation"""
+        user = User(email="owner@example.com", username="owner", hashed_password="x")
+        db_session.add(user)
+        db_session.commit()
+
+        endpoints._check_owner(db_session, user.id)
+
+        assert not db_session.in_transaction()
+
+    def test_unstored_upload_does_not_need_database(self, client, llm_service, unreachable_db, monkeypatch):
+        """Test that with persist_uploads off, /upload works while the database is down"""
+        monkeypatch.setattr(endpoints.settings, "persist_uploads", False)
+
+        response = client.post("/api/v1/upload", files=upload_files())
+
+        assert response.status_code == 200
+        assert response.json()["session_id"] is None
+        assert llm_service.calls == 1
+
+    def test_storage_failure_still_returns_questions(self, client, llm_service, unreachable_db):
+        """Test that failing to store an anonymous upload is logged, not an error"""
+        response = client.post("/api/v1/upload", files=upload_files())
+
+        assert response.status_code == 200
+        assert response.json()["questions"] == MOCK_INTERVIEW_QUESTIONS
+        assert response.json()["session_id"] is None
+
+
+class TestUploadSizeLimits:
+    """Test that upload size limits are enforced while the body is read"""
+
+    def test_oversized_file_rejected(self, client, llm_service, monkeypatch):
+        """Test that a file over max_file_size_mb is a 413 and never reaches the LLM"""
+        monkeypatch.setattr(endpoints.settings, "max_file_size_mb", 1)
+        files = upload_files()
+        files["job_desc_file"] = ("jd.txt", io.BytesIO(b"x" * (1024 * 1024 + 1)), "text/plain")
+
+        response = client.post("/api/v1/upload", files=files)
+
+        assert response.status_code == 413
+        assert "jd.txt" in response.json()["detail"]
+        assert llm_service.calls == 0
+
+    def test_spooled_upload_extracted(self, client, llm_service, monkeypatch):
+        """Test that uploads above the spool threshold are extracted from disk"""
+        monkeypatch.setattr(endpoints.settings, "upload_spool_threshold_mb", 0)
+
+        response = client.post("/api/v1/upload", files=upload_files())
+
+        assert response.status_code == 200
+        assert llm_service.calls == 1
+
+    def test_declared_length_rejected_before_body(self):
+        """Test that a too-large Content-Length is rejected without reading the body"""
+        received = []
+        inner = FastAPI()
+
+        @inner.post("/upload")
+        async def upload(file: UploadFile = File(...)):
+            received.append(file.filename)
+            return {}
+
+        limited = TestClient(RequestSizeLimitMiddleware(inner, max_bytes=1024))
+        response = limited.post("/upload", files={"file": ("a.txt", b"x" * 4096, "text/plain")})
+
+        assert response.status_code == 413
+        assert received == []
+
+    def test_path_limit_overrides_default(self):
+        """Test that a path with its own limit accepts bodies above the default"""
+        inner = FastAPI()
+
+        @inner.post("/upload/batch")
+        async def upload(file: UploadFile = File(...)):
+            return {}
+
+        limited = TestClient(RequestSizeLimitMiddleware(inner, max_bytes=1024, path_limits={"/upload/batch": 8192}))
+        files = {"file": ("a.txt", b"x" * 4096, "text/plain")}
+
+        assert limited.post("/upload/batch", files=files).status_code == 200
+        assert limited.post("/upload", files=files).status_code == 413
+
+    @pytest.mark.asyncio
+    async def test_streamed_body_cut_off(self):
+        """Test that a body without Content-Length is cut off once it crosses the limit"""
+        chunks_read = []
+
+        async def body_app(scope, receive, send):
+            while True:
+                message = await receive()
+                chunks_read.append(message)
+                if not message.get("more_body"):
+                    break
+
+        chunks = [{"type": "http.request", "body": b"x" * 512, "more_body": True}] * 10
+        messages = iter(chunks)
+        sent = []
+
+        async def receive():
+            return next(messages)
+
+        async def send(message):
+            sent.append(message)
+
+        middleware = RequestSizeLimitMiddleware(body_app, max_bytes=1024)
+        await middleware({"type": "http", "method": "POST", "headers": []}, receive, send)
+
+        assert len(chunks_read) == 2
+        assert sent[0]["status"] == 413
+
+
+class TestStreamingUpload:
+    """Test the streaming variant of /upload"""
+
+    def test_ndjson_stream(self, client, llm_service):
+        """Test that each question arrives as its own NDJSON line"""
+        response = client.post("/api/v1/upload/stream", files=upload_files())
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        events = [json.loads(line) for line in response.text.splitlines()]
+        assert [e["type"] for e in events] == ["question"] * len(MOCK_INTERVIEW_QUESTIONS) + ["done"]
+        assert events[0]["question"] == MOCK_INTERVIEW_QUESTIONS[0]["question"]
+        assert events[-1]["questions_count"] == len(MOCK_INTERVIEW_QUESTIONS)
+
+    def test_sse_stream(self, client, llm_service):
+        """Test server-sent event framing"""
+        response = client.post("/api/v1/upload/stream?format=sse", files=upload_files())
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        assert response.text.count("event: question\n") == len(MOCK_INTERVIEW_QUESTIONS)
+        assert "event: done\n" in response.text
+
+    def test_generation_error_is_reported_in_stream(self, client, llm_service):
+        """Test that a failure mid-stream becomes an error event"""
+        async def failing_stream(resume_content, job_description, on_complete=None):
+            yield MOCK_INTERVIEW_QUESTIONS[0]
+            raise RuntimeError("quota exceeded")
+
+        llm_service.astream_interview_questions = failing_stream
+        response = client.post("/api/v1/upload/stream", files=upload_files())
+
+        events = [json.loads(line) for line in response.text.splitlines()]
+        assert [e["type"] for e in events] == ["question", "error"]
+        assert "quota exceeded" in events[-1]["detail"]
+
+    def test_invalid_file_rejected_before_streaming(self, client, llm_service):
+        """Test that validation errors are plain HTTP errors"""
+        files = upload_files()
+        files["resume_file"] = ("resume.exe", io.BytesIO(b"binary"), "application/octet-stream")
+
+        response = client.post("/api/v1/upload/stream", files=files)
+
+        assert response.status_code == 400
+
+
+@pytest.fixture
+def file_db_client(tmp_path):
+    """
+    Test client backed by its own file SQLite database.
+    Background jobs write from another thread while requests come and go, so
+    this database is isolated from the shared test one.
+    """
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'jobs.db'}", connect_args={"check_same_thread": False}
+    )
+    Base.metadata.create_all(bind=engine)
+    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    AsyncSessionLocal = async_sessionmaker(
+        create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'jobs.db'}", poolclass=NullPool),
+        expire_on_commit=False,
+    )
+
+    def override_get_db():
+        db = SessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    async def override_get_async_db():
+        async with AsyncSessionLocal() as db:
+            yield db
+
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    with TestClient(app) as test_client:
+        yield test_client
+    app.dependency_overrides.pop(get_db, None)
+    app.dependency_overrides.pop(get_async_db, None)
+    engine.dispose()
+
+
+class TestGenerationJobs:
+    """Test the job-based upload mode"""
+
+    def test_job_completes_and_persists_questions(self, file_db_client, llm_service):
+        """Test that a job moves to in_progress with its questions stored"""
+        response = file_db_client.post("/api/v1/upload/jobs", files=upload_files())
+
+        assert response.status_code == 202
+        job = response.json()
+        assert job["status"] == "created"
+
+        status = file_db_client.get(f"{job['status_url']}?wait=5").json()
+        assert status["status"] == "in_progress"
+        assert status["total_questions"] == len(MOCK_INTERVIEW_QUESTIONS)
+
+        questions = file_db_client.get(f"/api/v1/sessions/{job['session_id']}/questions").json()
+        assert [q["question_text"] for q in questions] == [q["question"] for q in MOCK_INTERVIEW_QUESTIONS]
+        assert [q["question_number"] for q in questions] == list(range(1, len(questions) + 1))
+
+    def test_failed_generation_marks_session_failed(self, file_db_client, llm_service):
+        """Test that an empty generation result is recorded as a failure"""
+        async def no_questions(resume_content, job_description, on_complete=None):
+            return []
+
+        llm_service.agenerate_interview_questions = no_questions
+        job = file_db_client.post("/api/v1/upload/jobs", files=upload_files()).json()
+
+        status = file_db_client.get(f"{job['status_url']}?wait=5").json()
+        assert status["status"] == "failed"
+        assert status["error_message"] == "No questions were generated"
+
+    def test_unknown_user_rejected(self, file_db_client, llm_service):
+        """Test that a user_id that does not exist is a 404"""
+        response = file_db_client.post("/api/v1/upload/jobs", files=upload_files(), data={"user_id": "999"})
+
+        assert response.status_code == 404
+
+    def test_status_of_unknown_session(self, file_db_client):
+        """Test that polling a missing session is a 404"""
+        assert file_db_client.get("/api/v1/sessions/999/status").status_code == 404